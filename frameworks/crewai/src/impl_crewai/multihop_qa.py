@@ -16,6 +16,7 @@ import chromadb
 from crewai import Agent, Crew, LLM, Task
 from openai import OpenAI
 
+from shared.embeddings import embed_queries, embed_texts
 from shared.interface import Answer, Document, RunResult, UsageStats
 from shared.retrieval import EmbeddingStore, RetrievalResult, chunk_text
 
@@ -106,6 +107,7 @@ class CrewAIRAG:
         self._max_context_chunks = TOP_K
         self._max_plan_queries = 1
         self._max_validation_queries = 0
+        self._expand_hops = 0
 
     @property
     def name(self) -> str:
@@ -130,6 +132,7 @@ class CrewAIRAG:
         self._max_validation_queries = int(
             mode_config.get("max_validation_queries", 2 if mode == "capability" else 0)
         )
+        self._expand_hops = int(mode_config.get("expand_hops", 0))
 
     def _ensure_openai(self) -> OpenAI:
         if self._openai_client is None:
@@ -174,13 +177,16 @@ class CrewAIRAG:
             )
         return self._checker_agent
 
-    def _retrieve_once(self, query: str, top_k: int) -> RetrievalResult:
+    def _retrieve_once(
+        self, query: str, top_k: int, entity_hops: bool = False
+    ) -> RetrievalResult:
         if self._embedding_store is not None:
-            return self._embedding_store.retrieve(query, top_k=top_k)
+            return self._embedding_store.retrieve(
+                query, top_k=top_k, entity_hops=entity_hops
+            )
 
         openai_client = self._ensure_openai()
-        embed_response = openai_client.embeddings.create(model=EMBEDDING_MODEL, input=query)
-        query_embedding = embed_response.data[0].embedding
+        query_embedding = embed_queries(openai_client, EMBEDDING_MODEL, [query])[0]
 
         results = self._collection.query(
             query_embeddings=[query_embedding],
@@ -197,6 +203,26 @@ class CrewAIRAG:
                     sources.append(source)
         return RetrievalResult(chunks=chunks, sources=sources)
 
+    def _retrieve_batch(
+        self,
+        queries: list[str],
+        top_k: int,
+        entity_hops: bool = False,
+        expand_hops: int = 0,
+    ) -> list[RetrievalResult]:
+        """Retrieve for several queries; the shared store batches them in one call.
+
+        With *entity_hops*, queries naming a known entity are answered from
+        the store's entity index without an embedding request.  With
+        *expand_hops*, each result also carries its chunk-graph neighbourhood.
+        """
+        if self._embedding_store is not None:
+            result = self._embedding_store.retrieve_many(
+                queries, top_k=top_k, entity_hops=entity_hops, expand_hops=expand_hops
+            )
+            return result.results
+        return [self._retrieve_once(query, top_k) for query in queries]
+
     def _retrieve_queries(
         self,
         queries: list[str],
@@ -204,13 +230,15 @@ class CrewAIRAG:
         query_trace: list[str],
         chunks: list[str],
         sources: list[str],
+        entity_hops: bool = False,
+        expand_hops: int = 0,
     ) -> None:
         seen_chunks = set(chunks)
-        for query in queries[:max_queries]:
-            cleaned = query.strip()
-            if not cleaned:
-                continue
-            retrieval = self._retrieve_once(cleaned, self._top_k)
+        cleaned_queries = [q.strip() for q in queries[:max_queries] if q.strip()]
+        retrievals = self._retrieve_batch(
+            cleaned_queries, self._top_k, entity_hops, expand_hops
+        )
+        for cleaned, retrieval in zip(cleaned_queries, retrievals):
             query_trace.append(cleaned)
             for chunk in retrieval.chunks:
                 if chunk not in seen_chunks and len(chunks) < self._max_context_chunks:
@@ -252,8 +280,7 @@ class CrewAIRAG:
                 all_ids.append(f"{doc.source}_{i}")
                 all_metadatas.append({"source": doc.source})
 
-        response = openai_client.embeddings.create(model=EMBEDDING_MODEL, input=all_chunks)
-        embeddings = [item.embedding for item in response.data]
+        embeddings = embed_texts(openai_client, EMBEDDING_MODEL, all_chunks)
 
         self._collection.add(
             ids=all_ids,
@@ -312,7 +339,16 @@ class CrewAIRAG:
                 planned_queries.insert(0, question)
 
             # Step 2: Retrieve for planned queries
-            self._retrieve_queries(planned_queries, self._max_plan_queries, query_trace, chunks, sources)
+            # The plan round also pulls in the seeds' chunk-graph neighbourhood,
+            # which often leaves nothing for the validation round to fetch.
+            self._retrieve_queries(
+                planned_queries,
+                self._max_plan_queries,
+                query_trace,
+                chunks,
+                sources,
+                expand_hops=self._expand_hops,
+            )
 
             # Step 3: Generate draft answer
             context = "\n\n---\n\n".join(chunks)
@@ -350,7 +386,14 @@ class CrewAIRAG:
             # Step 5: If not sufficient, retrieve more and re-generate
             if not is_sufficient and self._max_validation_queries > 0:
                 missing_queries = [q.strip() for q in check_data.get("missing_queries", []) if q and q.strip()]
-                self._retrieve_queries(missing_queries, self._max_validation_queries, query_trace, chunks, sources)
+                self._retrieve_queries(
+                    missing_queries,
+                    self._max_validation_queries,
+                    query_trace,
+                    chunks,
+                    sources,
+                    entity_hops=True,
+                )
 
                 context = "\n\n---\n\n".join(chunks)
                 final_result = await self._run_crew(
@@ -19,7 +19,8 @@ from shared.agentic_sql import (
     get_system_prompt_hash,
 )
 from shared.interface import Answer, Document, RunResult, UsageStats
-from shared.retrieval import EmbeddingStore
+from shared.retrieval import ContextPacker, EmbeddingStore
+from shared.sql_limits import SQLQueryLimits
 
 MODEL = "gpt-5-mini"
 TOP_K = 4
@@ -55,6 +56,8 @@ class LangGraphRAG:
         self._database_seed_file = "data/seed.sql"
         self._top_k = TOP_K
         self._max_context_chunks = TOP_K
+        self._context_packer: ContextPacker | None = None
+        self._sql_limits = SQLQueryLimits()
         self._max_steps = 1
         self._max_tool_calls = 1
 
@@ -82,6 +85,8 @@ class LangGraphRAG:
         self._max_context_chunks = int(
             mode_config.get("max_context_chunks", self._top_k)
         )
+        self._context_packer = ContextPacker.from_config(mode_config, self._top_k)
+        self._sql_limits = SQLQueryLimits.from_config(mode_config)
         default_steps = 1 if mode == "baseline" else 8
         self._max_steps = int(mode_config.get("max_steps", default_steps))
         default_tool_calls = 1 if mode == "baseline" else 8
@@ -91,6 +96,8 @@ class LangGraphRAG:
             self._runtime.set_limits(
                 top_k=self._top_k,
                 max_context_chunks=self._max_context_chunks,
+                context_packer=self._context_packer,
+                sql_limits=self._sql_limits,
             )
 
     @staticmethod
@@ -136,9 +143,9 @@ class LangGraphRAG:
             return runtime.run_sql(query)
 
         @tool("lookup_doc")
-        def lookup_doc(query: str) -> str:
+        async def lookup_doc(query: str) -> str:
             """Search scenario policy/process documents for relevant evidence."""
-            return runtime.lookup_doc(query)
+            return await runtime.alookup_doc(query)
 
         llm_with_tools = llm.bind_tools([run_sql, lookup_doc])
         tool_node = ToolNode([run_sql, lookup_doc])
@@ -169,6 +176,8 @@ class LangGraphRAG:
             embedding_store=self._embedding_store,
             top_k=self._top_k,
             max_context_chunks=self._max_context_chunks,
+            context_packer=self._context_packer,
+            sql_limits=self._sql_limits,
         )
         self._runtime.prepare(documents)
         self._graph = self._build_graph()
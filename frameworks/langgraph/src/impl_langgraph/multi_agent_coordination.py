@@ -26,7 +26,8 @@ from shared.multi_agent_coordination import (
     get_coordinator_prompt_hash,
     get_specialist_prompt,
 )
-from shared.retrieval import EmbeddingStore
+from shared.retrieval import ContextPacker, EmbeddingStore
+from shared.sql_limits import SQLQueryLimits
 
 MODEL = "gpt-5-mini"
 TOP_K = 4
@@ -73,6 +74,8 @@ class LangGraphRAG:
         self._database_seed_file = "data/seed.sql"
         self._top_k = TOP_K
         self._max_context_chunks = TOP_K
+        self._context_packer: ContextPacker | None = None
+        self._sql_limits = SQLQueryLimits()
         self._max_steps = 1
         self._max_tool_calls = 3
 
@@ -101,6 +104,8 @@ class LangGraphRAG:
         self._max_context_chunks = int(
             mode_config.get("max_context_chunks", self._top_k)
         )
+        self._context_packer = ContextPacker.from_config(mode_config, self._top_k)
+        self._sql_limits = SQLQueryLimits.from_config(mode_config)
         default_steps = 1 if mode == "baseline" else 15
         self._max_steps = int(mode_config.get("max_steps", default_steps))
         default_calls = 3 if mode == "baseline" else 15
@@ -110,6 +115,8 @@ class LangGraphRAG:
             self._runtime.set_limits(
                 top_k=self._top_k,
                 max_context_chunks=self._max_context_chunks,
+                context_packer=self._context_packer,
+                sql_limits=self._sql_limits,
             )
 
     @staticmethod
@@ -160,9 +167,9 @@ class LangGraphRAG:
             return runtime.query_security(query)
 
         @tool("lookup_runbook")
-        def lookup_runbook(query: str) -> str:
+        async def lookup_runbook(query: str) -> str:
             """Search operational runbooks and policy documents for relevant evidence."""
-            return runtime.lookup_runbook(query)
+            return await runtime.alookup_runbook(query)
 
         all_tools = [query_infrastructure, query_security, lookup_runbook]
         llm_with_tools = llm.bind_tools(all_tools)
@@ -203,9 +210,9 @@ class LangGraphRAG:
             return runtime.query_security(query)
 
         @tool("lookup_runbook")
-        def lookup_runbook(query: str) -> str:
+        async def lookup_runbook(query: str) -> str:
             """Search operational runbooks and policy documents for relevant evidence."""
-            return runtime.lookup_runbook(query)
+            return await runtime.alookup_runbook(query)
 
         # --- Specialist agent nodes (each with one tool) ---
         infra_llm = llm.bind_tools([query_infrastructure])
@@ -337,6 +344,8 @@ class LangGraphRAG:
             embedding_store=self._embedding_store,
             top_k=self._top_k,
             max_context_chunks=self._max_context_chunks,
+            context_packer=self._context_packer,
+            sql_limits=self._sql_limits,
         )
         self._runtime.prepare(documents)
 
@@ -16,6 +16,7 @@ from langgraph.graph import END, START, StateGraph
 from openai import OpenAI
 from typing_extensions import TypedDict
 
+from shared.embeddings import embed_queries, embed_texts
 from shared.interface import Answer, Document, RunResult, UsageStats
 from shared.retrieval import EmbeddingStore, RetrievalResult, chunk_text
 
@@ -92,6 +93,7 @@ class LangGraphRAG:
         self._max_context_chunks = TOP_K
         self._max_steps = 1
         self._max_new_queries_per_step = 1
+        self._expand_hops = 0
 
     @property
     def name(self) -> str:
@@ -115,6 +117,7 @@ class LangGraphRAG:
         self._max_steps = int(mode_config.get("max_steps", default_steps))
         default_new_q = 1 if mode == "baseline" else int(mode_config.get("max_followup_queries", 3))
         self._max_new_queries_per_step = int(mode_config.get("max_new_queries_per_step", default_new_q))
+        self._expand_hops = int(mode_config.get("expand_hops", 0))
 
     def _ensure_openai(self) -> OpenAI:
         if self._openai_client is None:
@@ -177,13 +180,16 @@ class LangGraphRAG:
         except Exception:
             return False, []
 
-    def _retrieve_once(self, query: str, top_k: int) -> RetrievalResult:
+    def _retrieve_once(
+        self, query: str, top_k: int, entity_hops: bool = False
+    ) -> RetrievalResult:
         if self._embedding_store is not None:
-            return self._embedding_store.retrieve(query, top_k=top_k)
+            return self._embedding_store.retrieve(
+                query, top_k=top_k, entity_hops=entity_hops
+            )
 
         openai_client = self._ensure_openai()
-        response = openai_client.embeddings.create(model=EMBEDDING_MODEL, input=query)
-        query_embedding = response.data[0].embedding
+        query_embedding = embed_queries(openai_client, EMBEDDING_MODEL, [query])[0]
 
         results = self._collection.query(
             query_embeddings=[query_embedding],
@@ -200,6 +206,26 @@ class LangGraphRAG:
                     sources.append(source)
         return RetrievalResult(chunks=chunks, sources=sources)
 
+    async def _retrieve_batch(
+        self,
+        queries: list[str],
+        top_k: int,
+        entity_hops: bool = False,
+        expand_hops: int = 0,
+    ) -> list[RetrievalResult]:
+        """Retrieve for several queries; the shared store batches them in one call.
+
+        With *entity_hops*, queries naming a known entity are answered from
+        the store's entity index without an embedding request.  With
+        *expand_hops*, each result also carries its chunk-graph neighbourhood.
+        """
+        if self._embedding_store is not None:
+            result = await self._embedding_store.aretrieve_many(
+                queries, top_k=top_k, entity_hops=entity_hops, expand_hops=expand_hops
+            )
+            return result.results
+        return [self._retrieve_once(query, top_k) for query in queries]
+
     def _build_graph(self):
         """Build iterative retrieve-assess-generate workflow."""
         model = self._model
@@ -213,14 +239,29 @@ class LangGraphRAG:
             if not queue:
                 return {"should_stop": True}
 
-            query = queue.pop(0)
-            retrieval = self._retrieve_once(query, top_k)
-            context_chunks = self._merge_unique(
-                state["context_chunks"], retrieval.chunks, limit=max_context
+            # Baseline retrieves one query per pass; capability drains the queue
+            # in a single batched retrieval.
+            batch_size = 1 if self._mode == "baseline" else len(queue)
+            batch, queue = queue[:batch_size], queue[batch_size:]
+            context_chunks = list(state["context_chunks"])
+            context_sources = list(state["context_sources"])
+            # Follow-up passes mostly hop on IDs found in earlier evidence; the
+            # first pass pulls in the seed chunks' graph neighbourhood, which
+            # often saves those passes entirely.
+            first_pass = state["steps"] == 0
+            retrievals = await self._retrieve_batch(
+                batch,
+                top_k,
+                entity_hops=not first_pass,
+                expand_hops=self._expand_hops if first_pass else 0,
             )
-            context_sources = self._merge_unique(state["context_sources"], retrieval.sources)
-            seen_queries = self._merge_unique(state["seen_queries"], [query])
-            query_trace = self._merge_unique(state["query_trace"], [query])
+            for retrieval in retrievals:
+                context_chunks = self._merge_unique(
+                    context_chunks, retrieval.chunks, limit=max_context
+                )
+                context_sources = self._merge_unique(context_sources, retrieval.sources)
+            seen_queries = self._merge_unique(state["seen_queries"], batch)
+            query_trace = self._merge_unique(state["query_trace"], batch)
 
             return {
                 "query_queue": queue,
@@ -330,8 +371,7 @@ class LangGraphRAG:
                 all_ids.append(f"{doc.source}_{i}")
                 all_metadatas.append({"source": doc.source})
 
-        response = openai_client.embeddings.create(model=EMBEDDING_MODEL, input=all_chunks)
-        embeddings = [item.embedding for item in response.data]
+        embeddings = embed_texts(openai_client, EMBEDDING_MODEL, all_chunks)
         self._collection.add(
             ids=all_ids,
             documents=all_chunks,
@@ -19,8 +19,9 @@ from langgraph.graph import END, START, StateGraph
 from openai import OpenAI
 from typing_extensions import TypedDict
 
+from shared.embeddings import embed_queries, embed_texts
 from shared.interface import Answer, Document, RunResult, UsageStats
-from shared.retrieval import EmbeddingStore, RetrievalResult, chunk_text
+from shared.retrieval import ContextPacker, EmbeddingStore, RetrievalResult, chunk_text
 
 MODEL = "gpt-5-mini"
 EMBEDDING_MODEL = "text-embedding-3-small"
@@ -58,6 +59,7 @@ class RAGState(TypedDict):
     input_tokens: int
     output_tokens: int
     query_trace: list[str]
+    context_metadata: dict[str, Any]
 
 
 class LangGraphRAG:
@@ -85,6 +87,7 @@ class LangGraphRAG:
         self._mode = "baseline"
         self._top_k = TOP_K
         self._max_context_chunks = TOP_K
+        self._context_packer: ContextPacker | None = None
 
     @property
     def name(self) -> str:
@@ -111,15 +114,15 @@ class LangGraphRAG:
         self._max_context_chunks = int(
             mode_config.get("max_context_chunks", self._top_k)
         )
+        self._context_packer = ContextPacker.from_config(mode_config, self._top_k)
 
-    def _retrieve_once(self, query: str, top_k: int) -> RetrievalResult:
+    async def _retrieve_once(self, query: str, top_k: int) -> RetrievalResult:
         """Retrieve top-k chunks for a single query from active store."""
         if self._embedding_store is not None:
-            return self._embedding_store.retrieve(query, top_k=top_k)
+            return await self._embedding_store.aretrieve(query, top_k=top_k)
 
         openai_client = self._ensure_openai()
-        response = openai_client.embeddings.create(model=EMBEDDING_MODEL, input=query)
-        query_embedding = response.data[0].embedding
+        query_embedding = embed_queries(openai_client, EMBEDDING_MODEL, [query])[0]
 
         results = self._collection.query(
             query_embeddings=[query_embedding],
@@ -144,7 +147,17 @@ class LangGraphRAG:
         async def retrieve(state: RAGState) -> dict:
             """Embed the question and retrieve top-k chunks."""
             question = state["question"]
-            retrieval_run = self._retrieve_once(question, top_k=self._top_k)
+            packer = self._context_packer
+            if packer is not None:
+                retrieval_run = await self._retrieve_once(question, top_k=packer.max_candidates)
+                packed = packer.pack(retrieval_run)
+                return {
+                    "context_chunks": packed.chunks,
+                    "context_sources": packed.sources,
+                    "query_trace": [question],
+                    "context_metadata": packed.as_metadata(),
+                }
+            retrieval_run = await self._retrieve_once(question, top_k=self._top_k)
             return {
                 "context_chunks": retrieval_run.chunks[: self._max_context_chunks],
                 "context_sources": retrieval_run.sources,
@@ -204,10 +217,7 @@ class LangGraphRAG:
                 all_ids.append(f"{doc.source}_{i}")
                 all_metadatas.append({"source": doc.source})
 
-        response = openai_client.embeddings.create(
-            model=EMBEDDING_MODEL, input=all_chunks
-        )
-        embeddings = [item.embedding for item in response.data]
+        embeddings = embed_texts(openai_client, EMBEDDING_MODEL, all_chunks)
 
         self._collection.add(
             ids=all_ids,
@@ -233,6 +243,7 @@ class LangGraphRAG:
                 "input_tokens": 0,
                 "output_tokens": 0,
                 "query_trace": [],
+                "context_metadata": {},
             }
         )
         elapsed = time.perf_counter() - start
@@ -248,6 +259,7 @@ class LangGraphRAG:
                 metadata={
                     "mode": self._mode,
                     "query_trace": result.get("query_trace", []),
+                    **result.get("context_metadata", {}),
                 },
             ),
             usage=UsageStats(
@@ -18,7 +18,8 @@ from shared.agentic_sql import (
     get_system_prompt_hash,
 )
 from shared.interface import Answer, Document, RunResult, UsageStats
-from shared.retrieval import EmbeddingStore
+from shared.retrieval import ContextPacker, EmbeddingStore
+from shared.sql_limits import SQLQueryLimits
 
 MODEL = "openai:gpt-5-mini"
 TOP_K = 4
@@ -47,6 +48,8 @@ class PydanticAIRAG:
         self._database_seed_file = "data/seed.sql"
         self._top_k = TOP_K
         self._max_context_chunks = TOP_K
+        self._context_packer: ContextPacker | None = None
+        self._sql_limits = SQLQueryLimits()
         self._max_tool_calls = 1
 
     @property
@@ -73,6 +76,8 @@ class PydanticAIRAG:
         self._max_context_chunks = int(
             mode_config.get("max_context_chunks", self._top_k)
         )
+        self._context_packer = ContextPacker.from_config(mode_config, self._top_k)
+        self._sql_limits = SQLQueryLimits.from_config(mode_config)
         default_calls = 1 if mode == "baseline" else 8
         self._max_tool_calls = int(mode_config.get("max_tool_calls", default_calls))
 
@@ -80,6 +85,8 @@ class PydanticAIRAG:
             self._runtime.set_limits(
                 top_k=self._top_k,
                 max_context_chunks=self._max_context_chunks,
+                context_packer=self._context_packer,
+                sql_limits=self._sql_limits,
             )
 
     def _ensure_agent(self) -> Agent[AgentDeps, str]:
@@ -101,7 +108,7 @@ class PydanticAIRAG:
         @self._agent.tool(description=LOOKUP_DOC_DESC)
         async def lookup_doc(ctx: RunContext[AgentDeps], query: str) -> str:
             """Search scenario policy/process docs."""
-            return ctx.deps.runtime.lookup_doc(query)
+            return await ctx.deps.runtime.alookup_doc(query)
 
         return self._agent
 
@@ -113,6 +120,8 @@ class PydanticAIRAG:
             embedding_store=self._embedding_store,
             top_k=self._top_k,
             max_context_chunks=self._max_context_chunks,
+            context_packer=self._context_packer,
+            sql_limits=self._sql_limits,
         )
         self._runtime.prepare(documents)
 
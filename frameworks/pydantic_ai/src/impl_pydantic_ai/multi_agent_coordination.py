@@ -28,7 +28,8 @@ from shared.multi_agent_coordination import (
     get_coordinator_prompt_hash,
     get_specialist_prompt,
 )
-from shared.retrieval import EmbeddingStore
+from shared.retrieval import ContextPacker, EmbeddingStore
+from shared.sql_limits import SQLQueryLimits
 
 MODEL = "openai:gpt-5-mini"
 TOP_K = 4
@@ -72,6 +73,8 @@ class PydanticAIRAG:
         self._database_seed_file = "data/seed.sql"
         self._top_k = TOP_K
         self._max_context_chunks = TOP_K
+        self._context_packer: ContextPacker | None = None
+        self._sql_limits = SQLQueryLimits()
         self._max_tool_calls = 3
 
     @property
@@ -99,6 +102,8 @@ class PydanticAIRAG:
         self._max_context_chunks = int(
             mode_config.get("max_context_chunks", self._top_k)
         )
+        self._context_packer = ContextPacker.from_config(mode_config, self._top_k)
+        self._sql_limits = SQLQueryLimits.from_config(mode_config)
         default_calls = 3 if mode == "baseline" else 15
         self._max_tool_calls = int(mode_config.get("max_tool_calls", default_calls))
 
@@ -106,6 +111,8 @@ class PydanticAIRAG:
             self._runtime.set_limits(
                 top_k=self._top_k,
                 max_context_chunks=self._max_context_chunks,
+                context_packer=self._context_packer,
+                sql_limits=self._sql_limits,
             )
 
     def _build_specialist_agents(self) -> tuple[Agent, Agent, Agent]:
@@ -148,7 +155,7 @@ class PydanticAIRAG:
         @runbook_agent.tool(description=LOOKUP_RUNBOOK_DESC)
         async def runbook_search(ctx: RunContext[SpecialistDeps], query: str) -> str:
             """Search operational runbooks and policy documents."""
-            return ctx.deps.runtime.lookup_runbook(query)
+            return await ctx.deps.runtime.alookup_runbook(query)
 
         return infra_agent, security_agent, runbook_agent
 
@@ -180,7 +187,7 @@ class PydanticAIRAG:
             ctx: RunContext[CoordinationDeps], query: str
         ) -> str:
             """Search operational runbooks and policy documents."""
-            return ctx.deps.runtime.lookup_runbook(query)
+            return await ctx.deps.runtime.alookup_runbook(query)
 
         return coordinator
 
@@ -234,7 +241,7 @@ class PydanticAIRAG:
             """Consult the runbook specialist."""
             agent = ctx.deps.runbook_agent
             if agent is None:
-                return ctx.deps.runtime.lookup_runbook(question)
+                return await ctx.deps.runtime.alookup_runbook(question)
             result = await agent.run(
                 question, deps=SpecialistDeps(runtime=ctx.deps.runtime)
             )
@@ -262,6 +269,8 @@ class PydanticAIRAG:
             embedding_store=self._embedding_store,
             top_k=self._top_k,
             max_context_chunks=self._max_context_chunks,
+            context_packer=self._context_packer,
+            sql_limits=self._sql_limits,
         )
         self._runtime.prepare(documents)
 
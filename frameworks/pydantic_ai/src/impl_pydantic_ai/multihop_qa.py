@@ -11,6 +11,7 @@ from openai import OpenAI
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent
 
+from shared.embeddings import embed_queries, embed_texts
 from shared.interface import Answer, Document, RunResult, UsageStats
 from shared.retrieval import EmbeddingStore, RetrievalResult, chunk_text
 
@@ -77,6 +78,7 @@ class PydanticAIRAG:
         self._max_context_chunks = TOP_K
         self._max_plan_queries = 1
         self._max_validation_queries = 0
+        self._expand_hops = 0
 
     @property
     def name(self) -> str:
@@ -99,6 +101,7 @@ class PydanticAIRAG:
         self._max_plan_queries = int(mode_config.get("max_plan_queries", default_plan_queries))
         self._max_context_chunks = int(mode_config.get("max_context_chunks", self._top_k))
         self._max_validation_queries = int(mode_config.get("max_validation_queries", 2 if mode == "capability" else 0))
+        self._expand_hops = int(mode_config.get("expand_hops", 0))
 
     def _ensure_openai(self) -> OpenAI:
         if self._openai_client is None:
@@ -140,13 +143,16 @@ class PydanticAIRAG:
         total = usage.total_tokens or (in_tokens + out_tokens)
         return in_tokens, out_tokens, total
 
-    def _retrieve_once(self, query: str, top_k: int) -> RetrievalResult:
+    def _retrieve_once(
+        self, query: str, top_k: int, entity_hops: bool = False
+    ) -> RetrievalResult:
         if self._embedding_store is not None:
-            return self._embedding_store.retrieve(query, top_k=top_k)
+            return self._embedding_store.retrieve(
+                query, top_k=top_k, entity_hops=entity_hops
+            )
 
         openai_client = self._ensure_openai()
-        embed_response = openai_client.embeddings.create(model=EMBEDDING_MODEL, input=query)
-        query_embedding = embed_response.data[0].embedding
+        query_embedding = embed_queries(openai_client, EMBEDDING_MODEL, [query])[0]
 
         results = self._collection.query(
             query_embeddings=[query_embedding],
@@ -163,20 +169,42 @@ class PydanticAIRAG:
                     sources.append(source)
         return RetrievalResult(chunks=chunks, sources=sources)
 
-    def _retrieve_queries(
+    async def _retrieve_batch(
+        self,
+        queries: list[str],
+        top_k: int,
+        entity_hops: bool = False,
+        expand_hops: int = 0,
+    ) -> list[RetrievalResult]:
+        """Retrieve for several queries; the shared store batches them in one call.
+
+        With *entity_hops*, queries naming a known entity are answered from
+        the store's entity index without an embedding request.  With
+        *expand_hops*, each result also carries its chunk-graph neighbourhood.
+        """
+        if self._embedding_store is not None:
+            result = await self._embedding_store.aretrieve_many(
+                queries, top_k=top_k, entity_hops=entity_hops, expand_hops=expand_hops
+            )
+            return result.results
+        return [self._retrieve_once(query, top_k) for query in queries]
+
+    async def _retrieve_queries(
         self,
         queries: list[str],
         max_queries: int,
         query_trace: list[str],
         chunks: list[str],
         sources: list[str],
+        entity_hops: bool = False,
+        expand_hops: int = 0,
     ) -> None:
         seen_chunks = set(chunks)
-        for query in queries[:max_queries]:
-            cleaned = query.strip()
-            if not cleaned:
-                continue
-            retrieval = self._retrieve_once(cleaned, self._top_k)
+        cleaned_queries = [q.strip() for q in queries[:max_queries] if q.strip()]
+        retrievals = await self._retrieve_batch(
+            cleaned_queries, self._top_k, entity_hops, expand_hops
+        )
+        for cleaned, retrieval in zip(cleaned_queries, retrievals):
             query_trace.append(cleaned)
             for chunk in retrieval.chunks:
                 if chunk not in seen_chunks and len(chunks) < self._max_context_chunks:
@@ -205,8 +233,7 @@ class PydanticAIRAG:
                 all_ids.append(f"{doc.source}_{i}")
                 all_metadatas.append({"source": doc.source})
 
-        response = openai_client.embeddings.create(model=EMBEDDING_MODEL, input=all_chunks)
-        embeddings = [item.embedding for item in response.data]
+        embeddings = embed_texts(openai_client, EMBEDDING_MODEL, all_chunks)
 
         self._collection.add(
             ids=all_ids,
@@ -231,7 +258,7 @@ class PydanticAIRAG:
         check_output: AnswerSufficiency | None = None
 
         if self._mode == "baseline":
-            self._retrieve_queries([question], 1, query_trace, chunks, sources)
+            await self._retrieve_queries([question], 1, query_trace, chunks, sources)
             context = "\n\n---\n\n".join(chunks)
             answer_result = await answer_agent.run(
                 f"Context:\n{context}\n\nQuestion: {question}"
@@ -259,12 +286,15 @@ class PydanticAIRAG:
             planned_queries = [q.strip() for q in plan_output.subqueries if q and q.strip()]
             if question not in planned_queries:
                 planned_queries.insert(0, question)
-            self._retrieve_queries(
+            # The plan round also pulls in the seeds' chunk-graph neighbourhood,
+            # which often leaves nothing for the validation round to fetch.
+            await self._retrieve_queries(
                 planned_queries,
                 self._max_plan_queries,
                 query_trace,
                 chunks,
                 sources,
+                expand_hops=self._expand_hops,
             )
 
             context = "\n\n---\n\n".join(chunks)
@@ -293,12 +323,13 @@ class PydanticAIRAG:
             total_tokens += tot_t
 
             if not check_output.sufficient and self._max_validation_queries > 0:
-                self._retrieve_queries(
+                await self._retrieve_queries(
                     check_output.missing_queries,
                     self._max_validation_queries,
                     query_trace,
                     chunks,
                     sources,
+                    entity_hops=True,
                 )
                 context = "\n\n---\n\n".join(chunks)
                 final_result = await answer_agent.run(
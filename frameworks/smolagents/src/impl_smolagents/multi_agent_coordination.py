@@ -30,7 +30,8 @@ from shared.multi_agent_coordination import (
     get_coordinator_prompt_hash,
     get_specialist_prompt,
 )
-from shared.retrieval import EmbeddingStore
+from shared.retrieval import ContextPacker, EmbeddingStore
+from shared.sql_limits import SQLQueryLimits
 
 MODEL_ID = "openai/gpt-5-mini"
 TOP_K = 4
@@ -200,6 +201,8 @@ class SmolAgentsRAG:
         self._database_seed_file = "data/seed.sql"
         self._top_k = TOP_K
         self._max_context_chunks = TOP_K
+        self._context_packer: ContextPacker | None = None
+        self._sql_limits = SQLQueryLimits()
         self._max_steps = 1
         self._max_tool_calls = 3
         self._planning_interval: int | None = None
@@ -229,6 +232,8 @@ class SmolAgentsRAG:
         self._max_context_chunks = int(
             mode_config.get("max_context_chunks", self._top_k)
         )
+        self._context_packer = ContextPacker.from_config(mode_config, self._top_k)
+        self._sql_limits = SQLQueryLimits.from_config(mode_config)
         default_steps = 1 if mode == "baseline" else 8
         self._max_steps = int(mode_config.get("max_steps", default_steps))
         default_calls = 3 if mode == "baseline" else 15
@@ -241,6 +246,8 @@ class SmolAgentsRAG:
             self._runtime.set_limits(
                 top_k=self._top_k,
                 max_context_chunks=self._max_context_chunks,
+                context_packer=self._context_packer,
+                sql_limits=self._sql_limits,
             )
 
     async def ingest(self, documents: list[Document]) -> None:
@@ -250,6 +257,8 @@ class SmolAgentsRAG:
             embedding_store=self._embedding_store,
             top_k=self._top_k,
             max_context_chunks=self._max_context_chunks,
+            context_packer=self._context_packer,
+            sql_limits=self._sql_limits,
         )
         self._runtime.prepare(documents)
 
@@ -13,6 +13,7 @@ import chromadb
 from openai import OpenAI
 from smolagents import CodeAgent, LiteLLMModel, Tool
 
+from shared.embeddings import embed_queries, embed_texts
 from shared.interface import Answer, Document, RunResult, UsageStats
 from shared.retrieval import EmbeddingStore, RetrievalResult, chunk_text
 
@@ -76,16 +77,18 @@ class RetrieverTool(Tool):
 
     def __init__(
         self,
-        retrieve_fn: Callable[[str, int], RetrievalResult],
+        retrieve_fn: Callable[[str, int, bool, int], RetrievalResult],
         top_k: int,
         max_chunks_per_call: int,
         max_calls: int,
+        expand_hops: int = 0,
     ) -> None:
         super().__init__()
         self._retrieve_fn = retrieve_fn
         self._top_k = top_k
         self._max_chunks_per_call = max_chunks_per_call
         self._max_calls = max_calls
+        self._expand_hops = expand_hops
         self.calls: list[RetrievalCall] = []
 
     def forward(self, query: str) -> str:
@@ -95,7 +98,13 @@ class RetrieverTool(Tool):
                 "Proceed with already retrieved evidence."
             )
 
-        retrieval = self._retrieve_fn(query, self._top_k)
+        # Calls after the first are follow-up hops: let known entity IDs
+        # resolve from the store's entity index.  The first call also returns
+        # its chunk-graph neighbourhood, which can spare the agent those hops.
+        follow_up = bool(self.calls)
+        retrieval = self._retrieve_fn(
+            query, self._top_k, follow_up, 0 if follow_up else self._expand_hops
+        )
         chunks = retrieval.chunks[: self._max_chunks_per_call]
         self.calls.append(
             RetrievalCall(
@@ -130,6 +139,7 @@ class SmolAgentsRAG:
         self._max_context_chunks = TOP_K
         self._max_agent_steps = 4
         self._max_retrieval_calls = 1
+        self._expand_hops = 0
 
     @property
     def name(self) -> str:
@@ -153,19 +163,23 @@ class SmolAgentsRAG:
         self._max_agent_steps = int(mode_config.get("max_steps", default_steps))
         default_calls = 1 if mode == "baseline" else int(mode_config.get("max_followup_queries", 4))
         self._max_retrieval_calls = int(mode_config.get("max_retrieval_calls", default_calls))
+        self._expand_hops = int(mode_config.get("expand_hops", 0))
 
     def _ensure_openai(self) -> OpenAI:
         if self._openai_client is None:
             self._openai_client = OpenAI()
         return self._openai_client
 
-    def _retrieve_once(self, query: str, top_k: int) -> RetrievalResult:
+    def _retrieve_once(
+        self, query: str, top_k: int, entity_hops: bool = False, expand_hops: int = 0
+    ) -> RetrievalResult:
         if self._embedding_store is not None:
-            return self._embedding_store.retrieve(query, top_k=top_k)
+            return self._embedding_store.retrieve(
+                query, top_k=top_k, entity_hops=entity_hops, expand_hops=expand_hops
+            )
 
         openai_client = self._ensure_openai()
-        embed_response = openai_client.embeddings.create(model=EMBEDDING_MODEL, input=query)
-        query_embedding = embed_response.data[0].embedding
+        query_embedding = embed_queries(openai_client, EMBEDDING_MODEL, [query])[0]
 
         results = self._collection.query(
             query_embeddings=[query_embedding],
@@ -201,8 +215,7 @@ class SmolAgentsRAG:
                 all_ids.append(f"{doc.source}_{i}")
                 all_metadatas.append({"source": doc.source})
 
-        response = openai_client.embeddings.create(model=EMBEDDING_MODEL, input=all_chunks)
-        embeddings = [item.embedding for item in response.data]
+        embeddings = embed_texts(openai_client, EMBEDDING_MODEL, all_chunks)
         self._collection.add(
             ids=all_ids,
             documents=all_chunks,
@@ -275,6 +288,7 @@ class SmolAgentsRAG:
             top_k=self._top_k,
             max_chunks_per_call=max(1, self._max_context_chunks),
             max_calls=max(1, self._max_retrieval_calls),
+            expand_hops=self._expand_hops,
         )
         agent = CodeAgent(
             tools=[retriever_tool],
@@ -18,8 +18,9 @@ import chromadb
 from openai import OpenAI
 from smolagents import LiteLLMModel
 
+from shared.embeddings import embed_queries, embed_texts
 from shared.interface import Answer, Document, RunResult, UsageStats
-from shared.retrieval import EmbeddingStore, RetrievalResult, chunk_text
+from shared.retrieval import ContextPacker, EmbeddingStore, RetrievalResult, chunk_text
 
 MODEL_ID = "openai/gpt-5-mini"
 EMBEDDING_MODEL = "text-embedding-3-small"
@@ -81,6 +82,7 @@ class SmolAgentsRAG:
         self._mode = "baseline"
         self._top_k = TOP_K
         self._max_context_chunks = TOP_K
+        self._context_packer: ContextPacker | None = None
 
     @property
     def name(self) -> str:
@@ -107,6 +109,7 @@ class SmolAgentsRAG:
         self._max_context_chunks = int(
             mode_config.get("max_context_chunks", self._top_k)
         )
+        self._context_packer = ContextPacker.from_config(mode_config, self._top_k)
 
     def _retrieve_once(self, query: str, top_k: int) -> RetrievalResult:
         """Retrieve top-k chunks for a single query from active store."""
@@ -114,11 +117,7 @@ class SmolAgentsRAG:
             return self._embedding_store.retrieve(query, top_k=top_k)
 
         openai_client = self._ensure_openai()
-        embed_response = openai_client.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=query,
-        )
-        query_embedding = embed_response.data[0].embedding
+        query_embedding = embed_queries(openai_client, EMBEDDING_MODEL, [query])[0]
 
         results = self._collection.query(
             query_embeddings=[query_embedding],
@@ -157,10 +156,7 @@ class SmolAgentsRAG:
                 all_ids.append(f"{doc.source}_{i}")
                 all_metadatas.append({"source": doc.source})
 
-        response = openai_client.embeddings.create(
-            model=EMBEDDING_MODEL, input=all_chunks
-        )
-        embeddings = [item.embedding for item in response.data]
+        embeddings = embed_texts(openai_client, EMBEDDING_MODEL, all_chunks)
 
         self._collection.add(
             ids=all_ids,
@@ -178,9 +174,16 @@ class SmolAgentsRAG:
 
         start = time.perf_counter()
 
-        retrieval = self._retrieve_once(question, self._top_k)
-        context_chunks = retrieval.chunks[: self._max_context_chunks]
-        sources = retrieval.sources
+        context_metadata: dict[str, Any] = {}
+        if self._context_packer is not None:
+            retrieval = self._retrieve_once(question, self._context_packer.max_candidates)
+            packed = self._context_packer.pack(retrieval)
+            context_chunks, sources = packed.chunks, packed.sources
+            context_metadata = packed.as_metadata()
+        else:
+            retrieval = self._retrieve_once(question, self._top_k)
+            context_chunks = retrieval.chunks[: self._max_context_chunks]
+            sources = retrieval.sources
 
         context = "\n\n---\n\n".join(context_chunks)
         user_message = f"Context:\n{context}\n\nQuestion: {question}"
@@ -204,6 +207,7 @@ class SmolAgentsRAG:
                 metadata={
                     "mode": self._mode,
                     "query_trace": [question],
+                    **context_metadata,
                 },
             ),
             usage=UsageStats(
@@ -0,0 +1,148 @@
+"""CLI: benchmark vector index backends from 1k to 1M synthetic chunks.
+
+With ``--threads``, also measure concurrent search throughput (query-cache
+lookup + index search, plus BM25 search in ``hybrid`` mode, from a thread
+pool) with and without a global lock.
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import sys
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "shared-lib" / "src"))
+
+from shared.index_benchmark import (  # noqa: E402
+    IndexBenchmarkResult,
+    SearchContentionResult,
+    run_scaling_benchmark,
+    run_search_contention_benchmark,
+)
+from shared.vector_index import available_backends  # noqa: E402
+
+SCENARIOS_DIR = ROOT / "scenarios"
+
+
+def scenario_backend(name: str) -> tuple[str, dict]:
+    """Return the ``vector_backend`` and ``vector_index_params`` of a scenario."""
+    spec = yaml.safe_load((SCENARIOS_DIR / name / "spec.yaml").read_text())
+    config = spec.get("config", {})
+    return config.get("vector_backend", "chroma"), config.get("vector_index_params") or {}
+
+
+def format_table(results: list[IndexBenchmarkResult]) -> str:
+    lines = [
+        "| Backend | Params | Chunks | Build (s) | p50 (ms) | p99 (ms) | Recall@k |",
+        "|---|---|---:|---:|---:|---:|---:|",
+    ]
+    for r in results:
+        params = json.dumps(r.params, sort_keys=True) if r.params else "-"
+        lines.append(
+            f"| {r.backend} | {params} | {r.size:,} | {r.build_seconds:.2f} | "
+            f"{r.p50_ms:.2f} | {r.p99_ms:.2f} | {r.recall_at_k:.3f} |"
+        )
+    return "\n".join(lines)
+
+
+def format_contention_table(results: list[SearchContentionResult]) -> str:
+    lines = [
+        "| Backend | Mode | Chunks | Global lock | Threads | Queries/s | p50 (ms) | p99 (ms) |",
+        "|---|---|---:|---|---:|---:|---:|---:|",
+    ]
+    for r in results:
+        lines.append(
+            f"| {r.backend} | {r.mode} | {r.size:,} | {'yes' if r.global_lock else 'no'} | "
+            f"{r.threads} | {r.queries_per_second:,.0f} | {r.p50_ms:.2f} | {r.p99_ms:.2f} |"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark vector index backends")
+    parser.add_argument(
+        "--backends",
+        default="numpy,ivf_flat",
+        help=f"Comma-separated backends ({', '.join(available_backends())})",
+    )
+    parser.add_argument(
+        "--index-params",
+        default="{}",
+        help='JSON mapping backend → constructor params, e.g. \'{"ivf_flat": {"nprobe": 16}}\'',
+    )
+    parser.add_argument(
+        "--scenario",
+        default=None,
+        help="Also benchmark the backend and params configured in this scenario's spec.yaml",
+    )
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="Corpus sizes")
+    parser.add_argument("--dim", type=int, default=256, help="Embedding dimensionality")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per size")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument(
+        "--threads",
+        default=None,
+        help="Comma-separated thread counts for the search contention benchmark, e.g. 1,2,4,8 "
+        "(runs at the largest --sizes value)",
+    )
+    parser.add_argument(
+        "--modes",
+        default="vector,hybrid",
+        help="Comma-separated retrieval modes for the search contention benchmark "
+        "(vector: index search only; hybrid: index + BM25 search, fused)",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help='Write results as JSON to this path: {"backends": [...], "search_contention": [...]}',
+    )
+    args = parser.parse_args()
+
+    all_params = json.loads(args.index_params)
+    backends = {
+        name: all_params.get(name, {}) for name in args.backends.split(",") if name
+    }
+    if args.scenario:
+        name, params = scenario_backend(args.scenario)
+        backends[name] = params
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = run_scaling_benchmark(
+        backends,
+        sizes=sizes,
+        dim=args.dim,
+        num_queries=args.queries,
+        k=args.k,
+    )
+    print(format_table(results))
+
+    contention: list[SearchContentionResult] = []
+    if args.threads:
+        contention = run_search_contention_benchmark(
+            backends,
+            size=max(sizes),
+            thread_counts=[int(count) for count in args.threads.split(",")],
+            dim=args.dim,
+            num_queries=max(args.queries, 1000),
+            k=args.k,
+            modes=[mode for mode in args.modes.split(",") if mode],
+        )
+        print()
+        print(format_contention_table(contention))
+
+    if args.output:
+        payload = {
+            "backends": [dataclasses.asdict(r) for r in results],
+            "search_contention": [dataclasses.asdict(r) for r in contention],
+        }
+        Path(args.output).write_text(json.dumps(payload, indent=2))
+        print(f"\nResults written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
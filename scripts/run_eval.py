@@ -21,6 +21,7 @@ sys.path.insert(0, str(ROOT / "shared-lib" / "src"))
 for _framework in ("langgraph", "pydantic_ai", "smolagents", "crewai"):
     sys.path.insert(0, str(ROOT / "frameworks" / _framework / "src"))
 
+from shared.embeddings import get_embedding_batcher, get_query_cache  # noqa: E402
 from shared.eval.harness import FrameworkEvaluation, average_evaluations, evaluate_framework  # noqa: E402
 from shared.eval.profiles import ProfileContext, get_scenario_profile  # noqa: E402
 from shared.interface import ConfigurableFramework  # noqa: E402
@@ -29,6 +30,7 @@ from shared.scenario import (  # noqa: E402
     ScenarioDefinition,
     load_scenario as load_scenario_definition,
 )
+from shared.vector_index import QuantizedIndex  # noqa: E402
 
 from compare import generate_comparison_report  # noqa: E402
 
@@ -45,16 +47,60 @@ def load_scenario(scenario_name: str) -> ScenarioDefinition:
         sys.exit(1)
 
 
-def create_embedding_store(scenario: ScenarioDefinition) -> EmbeddingStore:
-    """Create and populate a shared EmbeddingStore from scenario config."""
+def create_embedding_store(
+    scenario: ScenarioDefinition, snapshot_dir: Path | None = None
+) -> EmbeddingStore:
+    """Create and populate a shared EmbeddingStore from scenario config.
+
+    With *snapshot_dir*, a snapshot matching the scenario corpus and chunking
+    config is loaded (memory-mapped) instead of re-ingesting; otherwise the
+    freshly built store is saved there for the next process.
+    """
     config = scenario.config
-    store = EmbeddingStore(
+    options: dict[str, Any] = dict(
         embedding_model=config.get("embedding_model", "text-embedding-3-small"),
         chunk_size=config.get("chunk_size", 500),
         chunk_overlap=config.get("chunk_overlap", 50),
+        chunk_strategy=config.get("chunk_strategy", "character"),
+        retrieval_mode=config.get("retrieval_mode", "vector"),
         top_k=config.get("top_k", 3),
+        dimensions=config.get("embedding_dimensions"),
+        backend=config.get("vector_backend", "chroma"),
+        index_params=config.get("vector_index_params"),
+        max_concurrent_requests=config.get("embedding_concurrency", 4),
+        merge_adjacent=config.get("merge_adjacent_chunks", False),
+        mmr_lambda=config.get("mmr_lambda"),
+        duplicate_threshold=config.get("duplicate_threshold"),
+        entity_patterns=config.get("entity_patterns"),
+        chunk_graph=config.get("chunk_graph", False),
     )
-    store.ingest(scenario.documents)
+    snapshot_path = None
+    if snapshot_dir is not None:
+        key = EmbeddingStore.options_key(scenario.documents, **options)
+        snapshot_path = snapshot_dir / f"{scenario.name}-{key[:16]}"
+        if (snapshot_path / "manifest.json").exists():
+            store = EmbeddingStore.load(snapshot_path, **options)
+            print(f"  Loaded index snapshot {snapshot_path} (no embedding needed)")
+            return store
+
+    store = EmbeddingStore(**options)
+    stats = store.ingest(scenario.documents).embedding
+    print(
+        f"  Embedded {stats.texts} chunks ({stats.tokens} tokens, "
+        f"{stats.cache_hits} cached) in {stats.elapsed_seconds:.2f}s "
+        f"[{stats.texts_per_second:.0f} chunks/s, {stats.requests} requests]"
+    )
+    if isinstance(store.index, QuantizedIndex):
+        print(
+            f"  Quantised index ({store.index.dtype}, {store.index.nbytes / 1e6:.1f} MB): "
+            f"recall@10 vs exact search = {store.index.recall_check():.3f}"
+        )
+    if snapshot_path is not None:
+        try:
+            store.save(snapshot_path)
+            print(f"  Saved index snapshot to {snapshot_path}")
+        except ValueError as err:
+            print(f"  Index snapshot skipped: {err}")
     return store
 
 
@@ -393,6 +439,16 @@ async def main():
         action="store_true",
         help="Disable shared embedding store (each framework embeds independently)",
     )
+    parser.add_argument(
+        "--index-snapshots",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help=(
+            "Load the shared store from a saved index snapshot in DIR when one matches "
+            "the corpus and chunking config (numpy/ivf_flat backends), else build and save it"
+        ),
+    )
     parser.add_argument(
         "--runs",
         type=int,
@@ -409,7 +465,7 @@ async def main():
     embedding_store = None
     if not args.no_shared_store:
         print("Creating shared embedding store...")
-        embedding_store = create_embedding_store(scenario)
+        embedding_store = create_embedding_store(scenario, args.index_snapshots)
         print(f"  Ingested {len(scenario.documents)} documents, store ready.")
 
     if args.model:
@@ -448,8 +504,21 @@ async def main():
         comparison_path.write_text(comparison_report)
         print(f"\nComparison report written to: {comparison_path}")
 
+    cache_stats = get_query_cache().stats()
+    print(
+        f"\nQuery embedding cache: {cache_stats.hits} memory hits, "
+        f"{cache_stats.disk_hits} disk hits, {cache_stats.misses} misses "
+        f"({cache_stats.hit_rate:.0%} hit rate)"
+    )
+    batch_stats = get_embedding_batcher().stats()
+    print(
+        f"Query embedding requests: {batch_stats.requests} "
+        f"({batch_stats.texts_per_request:.1f} queries/request, "
+        f"{batch_stats.coalesced} coalesced with in-flight requests)"
+    )
+
     if embedding_store is not None:
-        embedding_store.cleanup()
+        await embedding_store.acleanup()
 
 
 if __name__ == "__main__":
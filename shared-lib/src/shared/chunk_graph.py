@@ -0,0 +1,113 @@
+"""Sparse chunk graph for one-call neighbourhood expansion in multihop retrieval.
+
+Ingest keeps its chunk table current next to the other indexes; edges are
+not stored but derived on lookup.  Two chunks are neighbours when
+
+- they are consecutive chunks of the same document (chunk ids are
+  ``{source}_{i}``, so ``i - 1`` and ``i + 1``), or
+- they mention the same entity (see :mod:`shared.entity_index`), unless the
+  entity is a hub mentioned by more than ``max_entity_degree`` chunks.
+
+:meth:`ChunkGraph.expand` walks the neighbourhood of a set of retrieved
+chunks breadth-first, so one retrieval can return the facts that would
+otherwise take several retrieve→assess rounds to reach.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Sequence
+
+from shared.entity_index import EntityIndex
+from shared.vector_index import SearchHit
+
+# Entities mentioned by more chunks than this add no edges (they would
+# link most of the corpus, e.g. a datacenter name on every server).
+MAX_ENTITY_DEGREE = 8
+
+
+class ChunkGraph:
+    """Adjacency over chunks: previous/next in a document plus shared entities.
+
+    Edges are not stored pairwise: a chunk's neighbours are read from the
+    chunk table and the entity index, which ingest keeps current, so
+    deletions and re-ingests need no edge maintenance.
+    """
+
+    def __init__(
+        self, entities: EntityIndex | None = None, max_entity_degree: int = MAX_ENTITY_DEGREE
+    ) -> None:
+        self._entities = entities
+        self._max_entity_degree = max_entity_degree
+        self._lock = threading.Lock()
+        # chunk id → (text, source)
+        self._chunks: dict[str, tuple[str, str]] = {}
+
+    def add(self, ids: Sequence[str], texts: Sequence[str], sources: Sequence[str]) -> None:
+        with self._lock:
+            for chunk_id, text, source in zip(ids, texts, sources):
+                self._chunks[chunk_id] = (text, source)
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            for chunk_id in ids:
+                self._chunks.pop(chunk_id, None)
+
+    def neighbours(self, chunk_id: str) -> list[str]:
+        """Adjacent chunks of the same document first, then entity neighbours."""
+        found: list[str] = []
+        source, _, position = chunk_id.rpartition("_")
+        if source and position.isdigit():
+            index = int(position)
+            for adjacent in (f"{source}_{index - 1}", f"{source}_{index + 1}"):
+                if adjacent in self._chunks:
+                    found.append(adjacent)
+        if self._entities is not None:
+            for entity in self._entities.entities_of(chunk_id):
+                mentions = self._entities.lookup(entity)
+                if len(mentions) <= self._max_entity_degree:
+                    found.extend(other for other in mentions if other != chunk_id)
+        return list(dict.fromkeys(found))
+
+    def expand(self, hits: Sequence[SearchHit], hops: int, per_hop: int) -> list[SearchHit]:
+        """Chunks within *hops* edges of *hits*, nearest first, at most *per_hop* per hop.
+
+        Capping each hop rather than the total keeps the first hop (every
+        chunk has a previous and a next neighbour) from crowding out the
+        later ones.  *hits* themselves are not returned.  Each neighbour
+        carries the score of the hit it was reached from.
+        """
+        seen = {hit.id for hit in hits}
+        frontier = [(hit.id, hit.score) for hit in hits]
+        expanded: list[SearchHit] = []
+        for _ in range(hops):
+            next_frontier: list[tuple[str, float]] = []
+            for chunk_id, score in frontier:
+                for neighbour in self.neighbours(chunk_id):
+                    chunk = self._chunks.get(neighbour)
+                    if neighbour in seen or chunk is None:
+                        continue
+                    seen.add(neighbour)
+                    text, source = chunk
+                    expanded.append(SearchHit(id=neighbour, text=text, source=source, score=score))
+                    next_frontier.append((neighbour, score))
+                    if len(next_frontier) >= per_hop:
+                        break
+                if len(next_frontier) >= per_hop:
+                    break
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return expanded
+
+    @property
+    def nbytes(self) -> int:
+        """Upper bound on the chunk texts held (ingest shares them with the indexes)."""
+        return sum(len(text) for text, _ in list(self._chunks.values()))
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def close(self) -> None:
+        with self._lock:
+            self._chunks = {}
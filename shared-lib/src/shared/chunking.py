@@ -0,0 +1,221 @@
+"""Chunking engine: splits documents into ``(doc_id, start, end)`` spans.
+
+Chunkers never copy text — they return character offsets into the original
+document, and callers slice only the chunks they actually need.
+
+Strategies are selected by key (``chunk_strategy`` in the scenario ``config``):
+
+- ``character`` — fixed-size character windows (the historical behaviour).
+- ``token`` — fixed-size windows of ``cl100k_base`` tokens, so chunk sizes
+  map directly onto prompt budgets.
+- ``markdown`` — packs headings, paragraphs, lists, tables and fenced code
+  blocks into chunks without splitting them, starting a new chunk at every
+  heading.  Blocks larger than ``chunk_size`` fall back to character windows.
+"""
+
+from __future__ import annotations
+
+import re
+import warnings
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from shared.embeddings import get_token_encoding
+
+# Used by the token strategy when tiktoken's encoding is unavailable.
+CHARS_PER_TOKEN = 4
+
+
+class ChunkSpan(NamedTuple):
+    """Half-open character range ``[start, end)`` of one chunk of a document."""
+
+    doc_id: str
+    start: int
+    end: int
+
+    def text(self, document: str) -> str:
+        return document[self.start : self.end]
+
+
+def fixed_size_windows(length: int, size: int, overlap: int) -> tuple[np.ndarray, np.ndarray]:
+    """Start and end offsets of overlapping fixed-size windows over ``length`` units."""
+    starts = np.arange(0, length, size - overlap, dtype=np.int64)
+    ends = np.minimum(starts + size, length)
+    return starts, ends
+
+
+class Chunker(ABC):
+    """Extension point for chunking strategies."""
+
+    key: str = ""
+
+    def __init__(self, chunk_size: int, chunk_overlap: int = 0) -> None:
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError(
+                f"chunk_overlap must be in [0, chunk_size), got {chunk_overlap} "
+                f"with chunk_size {chunk_size}"
+            )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    @abstractmethod
+    def iter_spans(self, doc_id: str, text: str) -> Iterator[ChunkSpan]:
+        """Yield the chunk spans of one document, in order."""
+
+    def chunk(self, text: str) -> list[str]:
+        """Materialise the chunks of *text* as strings."""
+        return [span.text(text) for span in self.iter_spans("", text)]
+
+
+class CharacterChunker(Chunker):
+    """Fixed-size character windows with overlap, computed in one vectorised step."""
+
+    key = "character"
+
+    def iter_spans(self, doc_id: str, text: str) -> Iterator[ChunkSpan]:
+        starts, ends = fixed_size_windows(len(text), self.chunk_size, self.chunk_overlap)
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            yield ChunkSpan(doc_id, start, end)
+
+
+class TokenChunker(Chunker):
+    """Fixed-size windows of ``cl100k_base`` tokens, mapped back to character offsets.
+
+    ``chunk_size`` and ``chunk_overlap`` are in tokens.  When the encoding
+    cannot be loaded (tiktoken missing, or its BPE file not downloadable
+    offline) the windows are approximated as ``CHARS_PER_TOKEN`` characters
+    per token, with a :class:`RuntimeWarning`, so chunk boundaries differ
+    from a run with the encoding.
+    """
+
+    key = "token"
+
+    def iter_spans(self, doc_id: str, text: str) -> Iterator[ChunkSpan]:
+        encoding = get_token_encoding()
+        if encoding is None:
+            warnings.warn(
+                "cl100k_base encoding unavailable: token chunks are approximated as "
+                f"{CHARS_PER_TOKEN} characters per token",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+            starts, ends = fixed_size_windows(
+                len(text),
+                self.chunk_size * CHARS_PER_TOKEN,
+                self.chunk_overlap * CHARS_PER_TOKEN,
+            )
+        else:
+            tokens = encoding.encode(text, disallowed_special=())
+            _, offsets = encoding.decode_with_offsets(tokens)
+            # Character offset of every token boundary, including the end of text.
+            boundaries = np.append(np.asarray(offsets, dtype=np.int64), len(text))
+            token_starts, token_ends = fixed_size_windows(
+                len(tokens), self.chunk_size, self.chunk_overlap
+            )
+            starts, ends = boundaries[token_starts], boundaries[token_ends]
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if end > start:
+                yield ChunkSpan(doc_id, start, end)
+
+
+_LINE_RE = re.compile(r"[^\n]*\n|[^\n]+$")
+_HEADING_RE = re.compile(r" {0,3}#{1,6}(?:\s|$)")
+_FENCE_RE = re.compile(r" {0,3}(?:```|~~~)")
+
+
+class MarkdownChunker(Chunker):
+    """Heading- and paragraph-aligned chunks of at most ``chunk_size`` characters.
+
+    Overlap only applies where an oversized block has to be cut into
+    character windows; block-aligned chunks end on natural boundaries.
+    """
+
+    key = "markdown"
+
+    @staticmethod
+    def _blocks(text: str) -> list[tuple[int, int, bool]]:
+        """``(start, end, is_heading)`` for each block, separated by blank lines."""
+        blocks: list[tuple[int, int, bool]] = []
+        block_start: int | None = None
+        block_end = 0
+        in_fence = False
+
+        def close() -> None:
+            nonlocal block_start
+            if block_start is not None:
+                blocks.append((block_start, block_end, False))
+                block_start = None
+
+        for match in _LINE_RE.finditer(text):
+            line = match.group()
+            if in_fence or _FENCE_RE.match(line):
+                if _FENCE_RE.match(line):
+                    in_fence = not in_fence
+                if block_start is None:
+                    block_start = match.start()
+                block_end = match.end()
+            elif not line.strip():
+                close()
+            elif _HEADING_RE.match(line):
+                close()
+                blocks.append((match.start(), match.end(), True))
+            else:
+                if block_start is None:
+                    block_start = match.start()
+                block_end = match.end()
+        close()
+        return blocks
+
+    def iter_spans(self, doc_id: str, text: str) -> Iterator[ChunkSpan]:
+        chunk_start: int | None = None
+        chunk_end = 0
+        has_body = False  # consecutive headings stay with the body that follows
+        for start, end, is_heading in self._blocks(text):
+            fits = chunk_start is not None and end - chunk_start <= self.chunk_size
+            if chunk_start is not None and ((is_heading and has_body) or not fits):
+                yield ChunkSpan(doc_id, chunk_start, chunk_end)
+                chunk_start = None
+            if end - start > self.chunk_size:
+                starts, ends = fixed_size_windows(
+                    end - start, self.chunk_size, self.chunk_overlap
+                )
+                for s, e in zip(starts.tolist(), ends.tolist()):
+                    yield ChunkSpan(doc_id, start + s, start + e)
+                continue
+            if chunk_start is None:
+                chunk_start = start
+                has_body = False
+            chunk_end = end
+            has_body = has_body or not is_heading
+        if chunk_start is not None:
+            yield ChunkSpan(doc_id, chunk_start, chunk_end)
+
+
+_CHUNKER_REGISTRY: dict[str, type[Chunker]] = {
+    CharacterChunker.key: CharacterChunker,
+    TokenChunker.key: TokenChunker,
+    MarkdownChunker.key: MarkdownChunker,
+}
+
+
+def available_strategies() -> list[str]:
+    """Return the keys of all registered chunking strategies."""
+    return sorted(_CHUNKER_REGISTRY)
+
+
+def create_chunker(
+    strategy: str, chunk_size: int, chunk_overlap: int = 0, **params: Any
+) -> Chunker:
+    """Instantiate a registered chunking strategy by key."""
+    try:
+        chunker_cls = _CHUNKER_REGISTRY[strategy]
+    except KeyError:
+        raise ValueError(
+            f"Unknown chunk strategy '{strategy}'. Available: {', '.join(available_strategies())}"
+        ) from None
+    return chunker_cls(chunk_size, chunk_overlap, **params)
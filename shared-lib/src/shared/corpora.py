@@ -0,0 +1,336 @@
+"""Several named corpora in one process, kept warm under a memory cap.
+
+:class:`CorpusRegistry` holds one :class:`~shared.retrieval.EmbeddingStore`
+per namespace, e.g. one per ``(scenario, chunking config)``.  All stores
+share the process-wide caches: the on-disk document embedding cache, the
+query-embedding cache and the request batcher (see :mod:`shared.embeddings`).
+
+When the stores together exceed ``max_bytes``, the least recently used ones
+are evicted.  An evicted corpus is rebuilt on its next access, from its
+index snapshot when ``snapshot_dir`` is set (memory-mapped, see
+:meth:`EmbeddingStore.load`), otherwise by re-ingesting, which the
+embedding cache serves without any API call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from concurrent.futures import Future
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from shared.interface import Document
+from shared.retrieval import EmbeddingStore, MultiRetrievalResult, RetrievalResult
+
+
+@dataclass
+class _Corpus:
+    documents: list[Document]
+    options: dict[str, Any]
+    store: EmbeddingStore | None = None
+    snapshot: Path | None = None
+    # Set while the store is being rebuilt; resolved when the rebuild ends.
+    building: Future[None] | None = None
+
+
+class CorpusRegistry:
+    """Namespaced :class:`EmbeddingStore` instances with LRU eviction.
+
+    Thread-safe: registration, lookup and eviction are serialised by one
+    lock, while builds (ingest or snapshot load) and retrieval run without
+    it, so one corpus being rebuilt never blocks the others.  Async callers
+    (:meth:`alease`, :meth:`aretrieve`) rebuild on a worker thread, so a
+    rebuild does not stall the event loop either.  Retrieval runs on a
+    store leased with :meth:`lease` or :meth:`alease` (as :meth:`retrieve`
+    and friends do).  Evicting or replacing a leased store only releases it
+    once its last lease ends.  A store obtained from :meth:`get` is not
+    leased and may be released under the caller at any time.
+
+    Parameters
+    ----------
+    max_bytes:
+        Memory cap over all loaded stores (:attr:`EmbeddingStore.nbytes`);
+        ``None`` disables eviction.  The most recently used store is never
+        evicted, even if it alone exceeds the cap.
+    snapshot_dir:
+        Directory for index snapshots.  Registered corpora are loaded from
+        a matching snapshot or saved to one after ingest (``numpy`` and
+        ``ivf_flat`` backends).
+    """
+
+    def __init__(
+        self,
+        max_bytes: int | None = None,
+        snapshot_dir: str | os.PathLike[str] | None = None,
+    ) -> None:
+        self._max_bytes = max_bytes
+        self._snapshot_dir = Path(snapshot_dir) if snapshot_dir is not None else None
+        self._corpora: OrderedDict[str, _Corpus] = OrderedDict()  # LRU order
+        # Active leases per store, and evicted stores waiting for theirs to end.
+        self._leases: dict[EmbeddingStore, int] = {}
+        self._retired: set[EmbeddingStore] = set()
+        self._lock = threading.RLock()
+        self.evictions = 0
+
+    def register(
+        self, namespace: str, documents: Sequence[Document], **store_options: Any
+    ) -> EmbeddingStore:
+        """Build (or replace) the corpus *namespace*; *store_options* go to :class:`EmbeddingStore`."""
+        corpus = _Corpus(documents=list(documents), options=dict(store_options))
+        store = corpus.store = self._build(namespace, corpus)
+        with self._lock:
+            previous = self._corpora.pop(namespace, None)
+            if previous is not None and previous.store is not None:
+                self._retire(previous.store)
+            self._corpora[namespace] = corpus
+            self._enforce_cap()
+        return store
+
+    def _build(self, namespace: str, corpus: _Corpus) -> EmbeddingStore:
+        if self._snapshot_dir is not None and corpus.snapshot is None:
+            key = EmbeddingStore.options_key(corpus.documents, **corpus.options)
+            corpus.snapshot = self._snapshot_dir / f"{namespace}-{key[:16]}"
+        if corpus.snapshot is not None and (corpus.snapshot / "manifest.json").exists():
+            return EmbeddingStore.load(corpus.snapshot, **corpus.options)
+        store = EmbeddingStore(**corpus.options)
+        try:
+            store.ingest(corpus.documents)
+        except BaseException:
+            store.cleanup()
+            raise
+        if corpus.snapshot is not None:
+            try:
+                store.save(corpus.snapshot)
+            except ValueError:
+                corpus.snapshot = None  # backend without snapshot support
+        return store
+
+    def _claim(
+        self, namespace: str, *, lease: bool
+    ) -> tuple[EmbeddingStore | None, _Corpus, Future[None] | None, bool]:
+        """The loaded store (leased if asked), or else the rebuild to wait for.
+
+        The last item is True when the caller started the rebuild and must
+        run it with :meth:`_rebuild`.
+        """
+        with self._lock:
+            try:
+                corpus = self._corpora[namespace]
+            except KeyError:
+                raise KeyError(f"Unknown corpus namespace '{namespace}'") from None
+            self._corpora.move_to_end(namespace)
+            if corpus.store is not None:
+                if lease:
+                    self._leases[corpus.store] = self._leases.get(corpus.store, 0) + 1
+                return corpus.store, corpus, None, False
+            if corpus.building is not None:
+                return None, corpus, corpus.building, False
+            corpus.building = Future()
+            # Running futures cannot be cancelled, so an awaiter being
+            # cancelled (see asyncio.wrap_future) leaves the rebuild alone.
+            corpus.building.set_running_or_notify_cancel()
+            return None, corpus, corpus.building, True
+
+    def _rebuild(
+        self, namespace: str, corpus: _Corpus, building: Future[None], *, lease: bool = False
+    ) -> EmbeddingStore | None:
+        """Build *corpus* outside the lock and publish it; resolves *building*.
+
+        Returns the store (leased if asked), or None if the build failed
+        (the error is set on *building*) or the corpus was removed or
+        replaced meanwhile.
+        """
+        try:
+            store = self._build(namespace, corpus)
+        except BaseException as exc:
+            with self._lock:
+                corpus.building = None
+            building.set_exception(exc)
+            if not isinstance(exc, Exception):
+                raise
+            return None
+        with self._lock:
+            corpus.building = None
+            current = self._corpora.get(namespace) is corpus
+            if current:
+                corpus.store = store
+                self._corpora.move_to_end(namespace)
+                if lease:
+                    self._leases[store] = self._leases.get(store, 0) + 1
+                self._enforce_cap()
+        building.set_result(None)
+        if current:
+            return store
+        store.cleanup()
+        return None
+
+    def _acquire(self, namespace: str, *, lease: bool) -> EmbeddingStore:
+        """Return (and optionally lease) the store, rebuilding it outside the lock.
+
+        Concurrent callers for an evicted namespace wait for a single rebuild.
+        """
+        while True:
+            store, corpus, building, owner = self._claim(namespace, lease=lease)
+            if store is not None:
+                return store
+            assert building is not None
+            if owner:
+                store = self._rebuild(namespace, corpus, building, lease=lease)
+                if store is not None:
+                    return store
+            building.result()  # raises the build error; otherwise look it up again
+
+    async def _aacquire(self, namespace: str) -> EmbeddingStore:
+        """:meth:`_acquire` (leased) without blocking the event loop on a rebuild."""
+        while True:
+            store, corpus, building, owner = self._claim(namespace, lease=True)
+            if store is not None:
+                return store
+            assert building is not None
+            if owner:
+                # Shielded: if this caller is cancelled, the build still
+                # finishes and is published for the next one.
+                await asyncio.shield(
+                    asyncio.to_thread(self._rebuild, namespace, corpus, building)
+                )
+            await asyncio.wrap_future(building)
+
+    def get(self, namespace: str) -> EmbeddingStore:
+        """The store for *namespace*, rebuilding it if it was evicted."""
+        return self._acquire(namespace, lease=False)
+
+    @contextmanager
+    def lease(self, namespace: str) -> Iterator[EmbeddingStore]:
+        """The store for *namespace*, kept alive until the block exits."""
+        store = self._acquire(namespace, lease=True)
+        try:
+            yield store
+        finally:
+            self._release(store)
+
+    @asynccontextmanager
+    async def alease(self, namespace: str) -> AsyncIterator[EmbeddingStore]:
+        """:meth:`lease` for async callers; a rebuild runs on a worker thread."""
+        store = await self._aacquire(namespace)
+        try:
+            yield store
+        finally:
+            self._release(store)
+
+    def _release(self, store: EmbeddingStore) -> None:
+        """End one lease of *store*, releasing it if it was retired meanwhile."""
+        with self._lock:
+            remaining = self._leases.pop(store) - 1
+            if remaining:
+                self._leases[store] = remaining
+            release = not remaining and store in self._retired
+            if release:
+                self._retired.discard(store)
+        if release:
+            store.cleanup()
+
+    def retrieve(self, namespace: str, question: str, **kwargs: Any) -> RetrievalResult:
+        with self.lease(namespace) as store:
+            return store.retrieve(question, **kwargs)
+
+    async def aretrieve(self, namespace: str, question: str, **kwargs: Any) -> RetrievalResult:
+        async with self.alease(namespace) as store:
+            return await store.aretrieve(question, **kwargs)
+
+    def retrieve_many(
+        self, namespace: str, queries: list[str], **kwargs: Any
+    ) -> MultiRetrievalResult:
+        with self.lease(namespace) as store:
+            return store.retrieve_many(queries, **kwargs)
+
+    def _retire(self, store: EmbeddingStore) -> None:
+        """Release *store* now, or when its last lease ends."""
+        if self._leases.get(store):
+            self._retired.add(store)
+        else:
+            store.cleanup()
+
+    def evict(self, namespace: str) -> bool:
+        """Drop the loaded store of *namespace* (kept registered); True if one was loaded."""
+        with self._lock:
+            corpus = self._corpora.get(namespace)
+            if corpus is None or corpus.store is None:
+                return False
+            self._retire(corpus.store)
+            corpus.store = None
+            self.evictions += 1
+            return True
+
+    def remove(self, namespace: str) -> None:
+        """Unregister *namespace* and release its store."""
+        with self._lock:
+            self.evict(namespace)
+            self._corpora.pop(namespace, None)
+
+    def _enforce_cap(self) -> None:
+        if self._max_bytes is None:
+            return
+        loaded = [name for name, corpus in self._corpora.items() if corpus.store is not None]
+        # Least recently used first; never evict the most recent one.
+        for name in loaded[:-1]:
+            if self.nbytes <= self._max_bytes:
+                break
+            self.evict(name)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by all loaded stores."""
+        with self._lock:
+            return sum(
+                corpus.store.nbytes for corpus in self._corpora.values() if corpus.store is not None
+            )
+
+    def namespaces(self) -> list[str]:
+        """Registered namespaces, least recently used first."""
+        with self._lock:
+            return list(self._corpora)
+
+    def loaded(self) -> list[str]:
+        """Namespaces whose store is currently in memory."""
+        with self._lock:
+            return [name for name, corpus in self._corpora.items() if corpus.store is not None]
+
+    def __contains__(self, namespace: object) -> bool:
+        with self._lock:
+            return namespace in self._corpora
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._corpora)
+
+    def close(self) -> None:
+        """Release every store (leased ones when their leases end)."""
+        with self._lock:
+            for corpus in self._corpora.values():
+                if corpus.store is not None:
+                    self._retire(corpus.store)
+            self._corpora.clear()
+
+    async def aclose(self) -> None:
+        """Release every store and close their async HTTP clients.
+
+        Stores still leased are released (synchronously) when their leases end.
+        """
+        with self._lock:
+            stores: list[EmbeddingStore] = []
+            for corpus in self._corpora.values():
+                if corpus.store is None:
+                    continue
+                if self._leases.get(corpus.store):
+                    self._retired.add(corpus.store)
+                else:
+                    stores.append(corpus.store)
+            self._corpora.clear()
+        for store in stores:
+            await store.acleanup()
@@ -0,0 +1,1003 @@
+"""Embedding helpers shared by EmbeddingStore, tool runtimes and framework ingest paths.
+
+Document embeddings are content-addressed: a chunk is identified by the
+embedding model, the requested output dimensions and the sha256 of its text.
+Vectors are persisted in a small SQLite database so identical chunks are only
+ever embedded once — across documents, frameworks, scenarios and runs.
+
+Requests are split into token-budgeted batches and retried with exponential
+backoff; :func:`embed_stream` additionally overlaps a bounded number of
+requests so large corpora can be embedded with bounded memory.
+
+Query embeddings go through :func:`embed_queries`, backed by one
+process-wide :class:`QueryEmbeddingCache` (LRU/TTL in memory, with the
+SQLite cache above as its persistent tier).  Cache misses from concurrent
+callers are coalesced and micro-batched by :class:`EmbeddingBatcher`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, TypeVar
+
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+from shared.retrieval_stats import record_retrieval
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+# Set to a file path to relocate the cache, or to "off" to disable it.
+EMBEDDING_CACHE_ENV = "EMBEDDING_CACHE_PATH"
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parents[3] / ".cache" / "embeddings.sqlite"
+
+_DISABLED_VALUES = {"", "0", "off", "none", "false"}
+
+# Process-wide query-embedding cache: in-memory LRU size and optional TTL.
+QUERY_CACHE_SIZE_ENV = "QUERY_CACHE_SIZE"
+QUERY_CACHE_TTL_ENV = "QUERY_CACHE_TTL_SECONDS"
+DEFAULT_QUERY_CACHE_SIZE = 10_000
+# Independently locked shards of the in-memory tier, so concurrent lookups
+# of different queries rarely wait on each other.
+DEFAULT_QUERY_CACHE_STRIPES = 16
+
+# Micro-batching of concurrent query embeddings: how long the first request
+# of a batch waits for company (only while other requests are in flight),
+# and the largest batch sent in one request.
+QUERY_BATCH_WINDOW_ENV = "QUERY_BATCH_WINDOW_MS"
+QUERY_BATCH_SIZE_ENV = "QUERY_BATCH_MAX_SIZE"
+DEFAULT_QUERY_BATCH_WINDOW_MS = 5.0
+DEFAULT_QUERY_BATCH_SIZE = 256
+
+# Provider limits are 2048 inputs and ~300k tokens per request; stay well below.
+MAX_BATCH_SIZE = 512
+MAX_BATCH_TOKENS = 100_000
+MAX_CONCURRENT_REQUESTS = 4
+MAX_RETRIES = 5
+
+_RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+T = TypeVar("T")
+
+
+def text_digest(text: str) -> str:
+    """Return the content address (sha256 hex digest) of a chunk of text."""
+    return sha256(text.encode("utf-8")).hexdigest()
+
+
+_encoding_lock = threading.Lock()
+_encoding: Any = None
+_encoding_loaded = False
+
+
+def get_token_encoding() -> Any:
+    """Return the ``cl100k_base`` tiktoken encoding, or None when unavailable."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                if tiktoken is not None:
+                    try:
+                        _encoding = tiktoken.get_encoding("cl100k_base")
+                    except Exception:
+                        # BPE files are downloaded on first use; offline we approximate.
+                        _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Count embedding-model tokens (``cl100k_base``); approximate without tiktoken."""
+    encoding = get_token_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def iter_token_batches(
+    items: Iterable[T],
+    tokens_of: Callable[[T], int],
+    *,
+    max_tokens: int = MAX_BATCH_TOKENS,
+    max_items: int = MAX_BATCH_SIZE,
+) -> Iterator[list[T]]:
+    """Group items into batches bounded by total token count and item count.
+
+    An item larger than *max_tokens* on its own is emitted as a single-item batch.
+    """
+    batch: list[T] = []
+    batch_tokens = 0
+    for item in items:
+        tokens = tokens_of(item)
+        if batch and (batch_tokens + tokens > max_tokens or len(batch) >= max_items):
+            yield batch
+            batch = []
+            batch_tokens = 0
+        batch.append(item)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+def create_embeddings(
+    client: OpenAI,
+    request: dict[str, Any],
+    *,
+    max_retries: int = MAX_RETRIES,
+) -> Any:
+    """Call ``embeddings.create`` retrying transient failures with jittered backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            return client.embeddings.create(**request)
+        except _RETRYABLE_ERRORS:
+            if attempt >= max_retries:
+                raise
+            delay = min(30.0, 0.5 * 2**attempt)
+            time.sleep(delay * (0.5 + random.random() / 2))
+    raise AssertionError("unreachable")
+
+
+class EmbeddingCache:
+    """Persistent content-addressed embedding cache backed by SQLite.
+
+    Keys are ``(model, dimensions, sha256(text))``; values are float32 vectors.
+    The database runs in WAL mode so several benchmark processes can share
+    one cache file.  Safe to use from multiple threads.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self._path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, "
+            "dimensions INTEGER NOT NULL, "
+            "digest TEXT NOT NULL, "
+            "vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, dimensions, digest)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def get_many(
+        self, model: str, dimensions: int | None, digests: list[str]
+    ) -> dict[str, list[float]]:
+        """Return cached vectors for the given digests (misses are omitted)."""
+        found: dict[str, list[float]] = {}
+        if not digests:
+            return found
+        dims = dimensions or 0
+        unique = list(dict.fromkeys(digests))
+        # Stay well below SQLite's bound-parameter limit.
+        batch_size = 500
+        with self._lock:
+            for offset in range(0, len(unique), batch_size):
+                batch = unique[offset : offset + batch_size]
+                placeholders = ", ".join("?" for _ in batch)
+                rows = self._conn.execute(
+                    "SELECT digest, vector FROM embeddings "
+                    f"WHERE model = ? AND dimensions = ? AND digest IN ({placeholders})",
+                    [model, dims, *batch],
+                ).fetchall()
+                for digest, blob in rows:
+                    found[digest] = array("f", blob).tolist()
+        return found
+
+    def put_many(
+        self, model: str, dimensions: int | None, vectors: dict[str, list[float]]
+    ) -> None:
+        """Store vectors keyed by text digest."""
+        if not vectors:
+            return
+        dims = dimensions or 0
+        rows = [
+            (model, dims, digest, array("f", vector).tobytes())
+            for digest, vector in vectors.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, dimensions, digest, vector) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache: EmbeddingCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    """Return the process-wide embedding cache, or ``None`` when disabled.
+
+    The location defaults to ``.cache/embeddings.sqlite`` in the repository
+    root and can be overridden (or disabled with ``off``) via the
+    ``EMBEDDING_CACHE_PATH`` environment variable.
+    """
+    global _default_cache
+    configured = os.environ.get(EMBEDDING_CACHE_ENV)
+    if configured is not None and configured.strip().lower() in _DISABLED_VALUES:
+        return None
+    if _default_cache is not None:
+        return _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache(configured or DEFAULT_CACHE_PATH)
+        return _default_cache
+
+
+@dataclass(frozen=True)
+class EmbeddingStats:
+    """Progress and throughput counters for an embedding run."""
+
+    texts: int = 0
+    tokens: int = 0
+    cache_hits: int = 0
+    batches: int = 0
+    requests: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def texts_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.texts / self.elapsed_seconds
+
+    @property
+    def tokens_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.tokens / self.elapsed_seconds
+
+
+def _embed_with_cache(
+    client: OpenAI,
+    model: str,
+    texts: list[str],
+    dimensions: int | None,
+    cache: EmbeddingCache | None,
+    *,
+    max_batch_tokens: int = MAX_BATCH_TOKENS,
+    max_batch_size: int = MAX_BATCH_SIZE,
+) -> tuple[list[list[float]], int, int]:
+    """Embed texts through the cache; returns ``(vectors, cache_hits, requests)``."""
+    digests = [text_digest(text) for text in texts]
+    vectors = cache.get_many(model, dimensions, digests) if cache is not None else {}
+    cache_hits = sum(1 for digest in digests if digest in vectors)
+
+    missing: dict[str, str] = {}
+    for digest, text in zip(digests, texts):
+        if digest not in vectors and digest not in missing:
+            missing[digest] = text
+
+    requests = 0
+    for batch in iter_token_batches(
+        missing.items(),
+        lambda item: count_tokens(item[1]),
+        max_tokens=max_batch_tokens,
+        max_items=max_batch_size,
+    ):
+        request: dict[str, Any] = {"model": model, "input": [text for _, text in batch]}
+        if dimensions is not None:
+            request["dimensions"] = dimensions
+        response = create_embeddings(client, request)
+        requests += 1
+        fresh = {
+            digest: item.embedding
+            for (digest, _), item in zip(batch, response.data)
+        }
+        if cache is not None:
+            cache.put_many(model, dimensions, fresh)
+        vectors.update(fresh)
+
+    return [vectors[digest] for digest in digests], cache_hits, requests
+
+
+def embed_texts(
+    client: OpenAI,
+    model: str,
+    texts: list[str],
+    *,
+    dimensions: int | None = None,
+    cache: EmbeddingCache | None = None,
+) -> list[list[float]]:
+    """Embed texts, consulting the content-addressed cache before calling OpenAI.
+
+    Identical texts are embedded once; only cache misses are sent to
+    ``embeddings.create``, split into token-budgeted requests.  Returns one
+    vector per input text, in order.  When *cache* is omitted the
+    process-wide cache is used.
+    """
+    if not texts:
+        return []
+    if cache is None:
+        cache = get_embedding_cache()
+    vectors, _, _ = _embed_with_cache(client, model, texts, dimensions, cache)
+    return vectors
+
+
+def embed_stream(
+    client: OpenAI,
+    model: str,
+    items: Iterable[tuple[str, T]],
+    on_batch: Callable[[list[T], list[str], list[list[float]]], None],
+    *,
+    dimensions: int | None = None,
+    cache: EmbeddingCache | None = None,
+    max_batch_tokens: int = MAX_BATCH_TOKENS,
+    max_batch_size: int = MAX_BATCH_SIZE,
+    max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+    progress: Callable[[EmbeddingStats], None] | None = None,
+) -> EmbeddingStats:
+    """Embed a stream of ``(text, payload)`` items in bounded-concurrency batches.
+
+    Items are consumed lazily and grouped by token budget.  At most
+    *max_concurrency* batches are in flight at once, which also bounds peak
+    memory.  ``on_batch(payloads, texts, vectors)`` is called from the
+    calling thread in input order as each batch completes; *progress*
+    receives a stats snapshot after every batch.
+    """
+    if cache is None:
+        cache = get_embedding_cache()
+    started = time.perf_counter()
+    stats = EmbeddingStats()
+
+    def embed_batch(texts: list[str]) -> tuple[list[list[float]], int, int]:
+        return _embed_with_cache(
+            client,
+            model,
+            texts,
+            dimensions,
+            cache,
+            max_batch_tokens=max_batch_tokens,
+            max_batch_size=max_batch_size,
+        )
+
+    def finish(
+        batch: list[tuple[str, T, int]],
+        future: Future[tuple[list[list[float]], int, int]],
+    ) -> None:
+        nonlocal stats
+        vectors, cache_hits, requests = future.result()
+        texts = [text for text, _, _ in batch]
+        on_batch([payload for _, payload, _ in batch], texts, vectors)
+        stats = replace(
+            stats,
+            texts=stats.texts + len(batch),
+            tokens=stats.tokens + sum(tokens for _, _, tokens in batch),
+            cache_hits=stats.cache_hits + cache_hits,
+            batches=stats.batches + 1,
+            requests=stats.requests + requests,
+            elapsed_seconds=time.perf_counter() - started,
+        )
+        if progress is not None:
+            progress(stats)
+
+    counted = ((text, payload, count_tokens(text)) for text, payload in items)
+    batches = iter_token_batches(
+        counted,
+        lambda item: item[2],
+        max_tokens=max_batch_tokens,
+        max_items=max_batch_size,
+    )
+    pending: deque[tuple[list[tuple[str, T, int]], Future]] = deque()
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+        for batch in batches:
+            if len(pending) >= max(1, max_concurrency):
+                finish(*pending.popleft())
+            pending.append(
+                (batch, pool.submit(embed_batch, [text for text, _, _ in batch]))
+            )
+        while pending:
+            finish(*pending.popleft())
+
+    return replace(stats, elapsed_seconds=time.perf_counter() - started)
+
+
+@dataclass(frozen=True)
+class QueryCacheStats:
+    """Hit/miss counters of a :class:`QueryEmbeddingCache`."""
+
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / lookups if lookups else 0.0
+
+
+class _CacheStripe:
+    """One independently locked LRU shard of a :class:`QueryEmbeddingCache`."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[tuple[str, int, str], tuple[float, list[float]]] = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def insert(self, key: tuple[str, int, str], vector: list[float], now: float) -> None:
+        """Insert under ``self.lock``."""
+        if self.max_entries == 0:
+            return
+        self.entries[key] = (now, vector)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU cache of query embeddings with optional TTL and disk tier.
+
+    Keys are ``(model, dimensions, query text)``.  Memory misses fall back
+    to *disk* (an :class:`EmbeddingCache`, content-addressed like document
+    chunks) and are promoted on hit.  Safe to use from multiple threads:
+    the memory tier is split into *stripes* shards by key hash, each with
+    its own lock and its own share of *max_entries* (so LRU order is kept
+    per shard), and the disk tier is read outside those locks.  The async
+    :meth:`alookup` and :meth:`astore` touch only the memory tier on the
+    event loop and run disk-tier I/O on a worker thread.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_QUERY_CACHE_SIZE,
+        ttl_seconds: float | None = None,
+        disk: EmbeddingCache | None = None,
+        stripes: int = DEFAULT_QUERY_CACHE_STRIPES,
+    ) -> None:
+        if stripes < 1:
+            raise ValueError(f"stripes must be >= 1, got {stripes}")
+        max_entries = max(0, max_entries)
+        stripes = max(1, min(stripes, max_entries))
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._disk = disk
+        per_stripe = -(-max_entries // stripes)
+        self._stripes = [_CacheStripe(per_stripe) for _ in range(stripes)]
+
+    def _stripe(self, key: tuple[str, int, str]) -> _CacheStripe:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def lookup(
+        self, model: str, dimensions: int | None, queries: list[str]
+    ) -> dict[str, list[float]]:
+        """Return cached vectors for *queries* (misses are omitted)."""
+        now = time.monotonic()
+        found, remaining = self._lookup_memory(model, dimensions, queries, now)
+        if remaining and self._disk is not None:
+            stored = self._read_disk(model, dimensions, remaining)
+            found.update(self._promote(model, dimensions, remaining, stored, now))
+        return found
+
+    async def alookup(
+        self, model: str, dimensions: int | None, queries: list[str]
+    ) -> dict[str, list[float]]:
+        """Async :meth:`lookup`: disk-tier reads run on a worker thread."""
+        now = time.monotonic()
+        found, remaining = self._lookup_memory(model, dimensions, queries, now)
+        if remaining and self._disk is not None:
+            stored = await asyncio.to_thread(self._read_disk, model, dimensions, remaining)
+            found.update(self._promote(model, dimensions, remaining, stored, now))
+        return found
+
+    def _lookup_memory(
+        self, model: str, dimensions: int | None, queries: list[str], now: float
+    ) -> tuple[dict[str, list[float]], list[str]]:
+        """Memory-tier hits, and the queries left for the disk tier."""
+        dims = dimensions or 0
+        found: dict[str, list[float]] = {}
+        remaining: list[str] = []
+        for query in dict.fromkeys(queries):
+            key = (model, dims, query)
+            stripe = self._stripe(key)
+            with stripe.lock:
+                entry = stripe.entries.get(key)
+                if entry is not None and (
+                    self._ttl_seconds is None or now - entry[0] <= self._ttl_seconds
+                ):
+                    stripe.entries.move_to_end(key)
+                    found[query] = entry[1]
+                    stripe.hits += 1
+                    continue
+                if entry is not None:
+                    del stripe.entries[key]
+            if self._disk is None:
+                with stripe.lock:
+                    stripe.misses += 1
+                continue
+            remaining.append(query)
+        return found, remaining
+
+    def _read_disk(
+        self, model: str, dimensions: int | None, queries: list[str]
+    ) -> dict[str, list[float]]:
+        assert self._disk is not None
+        digests = {text_digest(query): query for query in queries}
+        return {
+            digests[digest]: vector
+            for digest, vector in self._disk.get_many(model, dimensions, list(digests)).items()
+        }
+
+    def _promote(
+        self,
+        model: str,
+        dimensions: int | None,
+        queries: list[str],
+        stored: dict[str, list[float]],
+        now: float,
+    ) -> dict[str, list[float]]:
+        """Count disk hits and misses for *queries*; copy the hits to memory."""
+        dims = dimensions or 0
+        found: dict[str, list[float]] = {}
+        for query in queries:
+            key = (model, dims, query)
+            stripe = self._stripe(key)
+            with stripe.lock:
+                vector = stored.get(query)
+                if vector is None:
+                    stripe.misses += 1
+                    continue
+                stripe.insert(key, vector, now)
+                stripe.disk_hits += 1
+            found[query] = vector
+        return found
+
+    def store(
+        self, model: str, dimensions: int | None, vectors: dict[str, list[float]]
+    ) -> None:
+        """Insert freshly embedded queries into both tiers."""
+        if not vectors:
+            return
+        self._store_memory(model, dimensions, vectors)
+        if self._disk is not None:
+            self._write_disk(model, dimensions, vectors)
+
+    async def astore(
+        self, model: str, dimensions: int | None, vectors: dict[str, list[float]]
+    ) -> None:
+        """Async :meth:`store`: the disk-tier write runs on a worker thread."""
+        if not vectors:
+            return
+        self._store_memory(model, dimensions, vectors)
+        if self._disk is not None:
+            await asyncio.to_thread(self._write_disk, model, dimensions, vectors)
+
+    def _store_memory(
+        self, model: str, dimensions: int | None, vectors: dict[str, list[float]]
+    ) -> None:
+        dims = dimensions or 0
+        now = time.monotonic()
+        for query, vector in vectors.items():
+            key = (model, dims, query)
+            stripe = self._stripe(key)
+            with stripe.lock:
+                stripe.insert(key, vector, now)
+
+    def _write_disk(
+        self, model: str, dimensions: int | None, vectors: dict[str, list[float]]
+    ) -> None:
+        assert self._disk is not None
+        self._disk.put_many(model, dimensions, {text_digest(q): v for q, v in vectors.items()})
+
+    def stats(self) -> QueryCacheStats:
+        hits = disk_hits = misses = evictions = size = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                hits += stripe.hits
+                disk_hits += stripe.disk_hits
+                misses += stripe.misses
+                evictions += stripe.evictions
+                size += len(stripe.entries)
+        return QueryCacheStats(
+            hits=hits, disk_hits=disk_hits, misses=misses, evictions=evictions, size=size
+        )
+
+    def clear(self) -> None:
+        """Drop the in-memory tier (the disk tier is left intact)."""
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.entries.clear()
+
+    def __len__(self) -> int:
+        return sum(len(stripe.entries) for stripe in self._stripes)
+
+
+_query_cache: QueryEmbeddingCache | None = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryEmbeddingCache:
+    """Return the process-wide query-embedding cache.
+
+    Sized by ``QUERY_CACHE_SIZE`` (entries) and ``QUERY_CACHE_TTL_SECONDS``;
+    its disk tier is the :func:`get_embedding_cache` database when enabled.
+    """
+    global _query_cache
+    if _query_cache is not None:  # lock-free once created
+        return _query_cache
+    with _query_cache_lock:
+        if _query_cache is None:
+            ttl = os.environ.get(QUERY_CACHE_TTL_ENV)
+            _query_cache = QueryEmbeddingCache(
+                max_entries=int(os.environ.get(QUERY_CACHE_SIZE_ENV, DEFAULT_QUERY_CACHE_SIZE)),
+                ttl_seconds=float(ttl) if ttl else None,
+                disk=get_embedding_cache(),
+            )
+        return _query_cache
+
+
+def _query_request(model: str, queries: list[str], dimensions: int | None) -> dict[str, Any]:
+    request: dict[str, Any] = {"model": model, "input": queries}
+    if dimensions is not None:
+        request["dimensions"] = dimensions
+    return request
+
+
+@dataclass(frozen=True)
+class BatcherStats:
+    """Counters of an :class:`EmbeddingBatcher`."""
+
+    requests: int = 0
+    texts: int = 0
+    coalesced: int = 0
+
+    @property
+    def texts_per_request(self) -> float:
+        return self.texts / self.requests if self.requests else 0.0
+
+
+class _Batch:
+    """Texts collected for one ``embeddings.create`` call, and their futures."""
+
+    def __init__(self, full: threading.Event | asyncio.Event) -> None:
+        self.futures: dict[str, Any] = {}
+        self.full = full
+
+
+class EmbeddingBatcher:
+    """Single-flight coalescing and micro-batching of query embedding requests.
+
+    A text already being embedded is never requested twice: later callers
+    wait on the in-flight result.  Distinct texts arriving within
+    *window_seconds* of the first one share one request of at most
+    *max_batch_size* inputs.  The caller that opens a batch sends it; others
+    just wait.  A caller that finds nothing else in flight sends at once,
+    without waiting out the window.  Works for threads (:meth:`embed`) and asyncio
+    (:meth:`aembed`); batches never mix clients, models, dimensions or event
+    loops.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = DEFAULT_QUERY_BATCH_WINDOW_MS / 1000.0,
+        max_batch_size: int = DEFAULT_QUERY_BATCH_SIZE,
+    ) -> None:
+        self._window_seconds = max(0.0, window_seconds)
+        self._max_batch_size = max(1, max_batch_size)
+        self._lock = threading.Lock()
+        self._inflight: dict[tuple[Any, str], Any] = {}
+        self._open: dict[Any, _Batch] = {}
+        self._tasks: set[asyncio.Future[None]] = set()
+        self._requests = 0
+        self._texts = 0
+        self._coalesced = 0
+
+    def _enqueue(
+        self,
+        group: Any,
+        texts: list[str],
+        new_future: Callable[[], Any],
+        new_event: Callable[[], threading.Event | asyncio.Event],
+    ) -> tuple[dict[str, Any], list[_Batch], float]:
+        """Attach each text to an in-flight future or an open batch.
+
+        Returns the futures per text, the batches this caller must send and
+        how long to hold them open (no wait when nothing else is in flight).
+        """
+        futures: dict[str, Any] = {}
+        led: list[_Batch] = []
+        with self._lock:
+            window = self._window_seconds if self._inflight else 0.0
+            for text in dict.fromkeys(texts):
+                future = self._inflight.get((group, text))
+                if future is not None:
+                    futures[text] = future
+                    self._coalesced += 1
+                    continue
+                batch = self._open.get(group)
+                if batch is None:
+                    batch = _Batch(new_event())
+                    self._open[group] = batch
+                    led.append(batch)
+                future = new_future()
+                batch.futures[text] = future
+                self._inflight[(group, text)] = future
+                futures[text] = future
+                if len(batch.futures) >= self._max_batch_size:
+                    batch.full.set()
+                    del self._open[group]
+        return futures, led, window
+
+    def _close(self, group: Any, batch: _Batch) -> list[str]:
+        with self._lock:
+            if self._open.get(group) is batch:
+                del self._open[group]
+            return list(batch.futures)
+
+    def _finish(self, group: Any, texts: list[str]) -> None:
+        with self._lock:
+            for text in texts:
+                self._inflight.pop((group, text), None)
+
+    def _count(self, texts: list[str]) -> None:
+        with self._lock:
+            self._requests += 1
+            self._texts += len(texts)
+
+    @staticmethod
+    def _resolve(batch: _Batch, vectors: dict[str, list[float]]) -> None:
+        for text, vector in vectors.items():
+            future = batch.futures[text]
+            if not future.done():
+                future.set_result(vector)
+
+    @staticmethod
+    def _reject(batch: _Batch, exc: BaseException) -> None:
+        for future in batch.futures.values():
+            if not future.done():
+                future.set_exception(exc)
+
+    def _abandon(self, group: Any, batch: _Batch) -> None:
+        """Fail *batch* without sending it (its sender was interrupted)."""
+        batch_texts = self._close(group, batch)
+        self._reject(batch, RuntimeError("Embedding batch abandoned: its sender was interrupted"))
+        self._finish(group, batch_texts)
+
+    def _send(
+        self,
+        client: OpenAI,
+        model: str,
+        dimensions: int | None,
+        cache: QueryEmbeddingCache | None,
+        group: Any,
+        batch: _Batch,
+    ) -> None:
+        """Request *batch* and resolve its futures; errors are set on the futures."""
+        batch_texts = self._close(group, batch)
+        try:
+            self._count(batch_texts)
+            response = create_embeddings(client, _query_request(model, batch_texts, dimensions))
+            vectors = {text: item.embedding for text, item in zip(batch_texts, response.data)}
+            if cache is not None:
+                cache.store(model, dimensions, vectors)
+            self._resolve(batch, vectors)
+        except BaseException as exc:
+            self._reject(batch, exc)
+            if not isinstance(exc, Exception):
+                raise
+        finally:
+            self._finish(group, batch_texts)
+
+    async def _asend(
+        self,
+        client: AsyncOpenAI,
+        model: str,
+        dimensions: int | None,
+        cache: QueryEmbeddingCache | None,
+        group: Any,
+        batch: _Batch,
+    ) -> None:
+        """Async :meth:`_send`."""
+        batch_texts = self._close(group, batch)
+        try:
+            self._count(batch_texts)
+            response = await client.embeddings.create(
+                **_query_request(model, batch_texts, dimensions)
+            )
+            vectors = {text: item.embedding for text, item in zip(batch_texts, response.data)}
+            self._resolve(batch, vectors)
+            if cache is not None:
+                await cache.astore(model, dimensions, vectors)
+        except BaseException as exc:
+            self._reject(batch, exc)
+            if not isinstance(exc, Exception):
+                raise
+        finally:
+            self._finish(group, batch_texts)
+
+    def embed(
+        self,
+        client: OpenAI,
+        model: str,
+        texts: list[str],
+        *,
+        dimensions: int | None = None,
+        cache: QueryEmbeddingCache | None = None,
+    ) -> list[list[float]]:
+        """Embed *texts* (blocking), sharing requests with concurrent callers.
+
+        Every batch this caller leads is sent, even after an earlier one
+        failed, since other callers may be waiting on it.
+        """
+        group = (id(client), model, dimensions or 0)
+        futures, led, window = self._enqueue(group, texts, Future, threading.Event)
+        pending = list(led)
+        try:
+            while pending:
+                if window:
+                    pending[0].full.wait(window)
+                self._send(client, model, dimensions, cache, group, pending.pop(0))
+        finally:
+            for batch in pending:
+                self._abandon(group, batch)
+        return [futures[text].result() for text in texts]
+
+    def _spawn(self, coro: Any) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def aembed(
+        self,
+        client: AsyncOpenAI,
+        model: str,
+        texts: list[str],
+        *,
+        dimensions: int | None = None,
+        cache: QueryEmbeddingCache | None = None,
+    ) -> list[list[float]]:
+        """Async :meth:`embed` for coroutines sharing one event loop.
+
+        Batches are sent from their own tasks, and callers wait on shielded
+        futures, so cancelling a caller (e.g. a question timing out) never
+        cancels or strands a request other callers are waiting on.
+        """
+        loop = asyncio.get_running_loop()
+        group = (id(loop), id(client), model, dimensions or 0)
+        futures, led, window = self._enqueue(group, texts, loop.create_future, asyncio.Event)
+        pending = list(led)
+        try:
+            while pending:
+                if window:
+                    try:
+                        await asyncio.wait_for(pending[0].full.wait(), window)
+                    except TimeoutError:
+                        pass
+                self._spawn(self._asend(client, model, dimensions, cache, group, pending.pop(0)))
+        finally:
+            # Cancelled while collecting: send the rest anyway.
+            for batch in pending:
+                self._spawn(self._asend(client, model, dimensions, cache, group, batch))
+        return [await asyncio.shield(futures[text]) for text in texts]
+
+    def stats(self) -> BatcherStats:
+        with self._lock:
+            return BatcherStats(
+                requests=self._requests, texts=self._texts, coalesced=self._coalesced
+            )
+
+
+_batcher: EmbeddingBatcher | None = None
+_batcher_lock = threading.Lock()
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Return the process-wide batcher, configured by ``QUERY_BATCH_WINDOW_MS``
+    and ``QUERY_BATCH_MAX_SIZE``."""
+    global _batcher
+    if _batcher is not None:
+        return _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            window_ms = float(
+                os.environ.get(QUERY_BATCH_WINDOW_ENV, DEFAULT_QUERY_BATCH_WINDOW_MS)
+            )
+            _batcher = EmbeddingBatcher(
+                window_seconds=window_ms / 1000.0,
+                max_batch_size=int(
+                    os.environ.get(QUERY_BATCH_SIZE_ENV, DEFAULT_QUERY_BATCH_SIZE)
+                ),
+            )
+        return _batcher
+
+
+def embed_queries(
+    client: OpenAI,
+    model: str,
+    queries: list[str],
+    *,
+    dimensions: int | None = None,
+    cache: QueryEmbeddingCache | None = None,
+    batcher: EmbeddingBatcher | None = None,
+) -> list[list[float]]:
+    """Embed queries through the query cache; misses go through the batcher."""
+    if not queries:
+        return []
+    if cache is None:
+        cache = get_query_cache()
+    if batcher is None:
+        batcher = get_embedding_batcher()
+    found = cache.lookup(model, dimensions, queries)
+    missing = [query for query in dict.fromkeys(queries) if query not in found]
+    record_retrieval(cache_hits=len(found), cache_misses=len(missing))
+    if missing:
+        vectors = batcher.embed(
+            client, model, missing, dimensions=dimensions, cache=cache
+        )
+        found.update(zip(missing, vectors))
+    return [found[query] for query in queries]
+
+
+async def aembed_queries(
+    client: AsyncOpenAI,
+    model: str,
+    queries: list[str],
+    *,
+    dimensions: int | None = None,
+    cache: QueryEmbeddingCache | None = None,
+    batcher: EmbeddingBatcher | None = None,
+) -> list[list[float]]:
+    """Async :func:`embed_queries` using ``AsyncOpenAI``.
+
+    Only the query cache's memory tier is read on the event loop; its disk
+    tier is read and written on worker threads.
+    """
+    if not queries:
+        return []
+    if cache is None:
+        cache = get_query_cache()
+    if batcher is None:
+        batcher = get_embedding_batcher()
+    found = await cache.alookup(model, dimensions, queries)
+    missing = [query for query in dict.fromkeys(queries) if query not in found]
+    record_retrieval(cache_hits=len(found), cache_misses=len(missing))
+    if missing:
+        vectors = await batcher.aembed(
+            client, model, missing, dimensions=dimensions, cache=cache
+        )
+        found.update(zip(missing, vectors))
+    return [found[query] for query in queries]
@@ -0,0 +1,153 @@
+"""Ingest-time entity index: exact-ID hops without an embedding request.
+
+Scenarios declare ``entity_patterns`` in their ``config``, mapping an
+entity kind to a regular expression::
+
+    entity_patterns:
+      server: 'prod-api-\\d{2}'
+      rack: 'R-\\d{3}'
+      incident: 'INC-\\d{4}-\\d{3}'
+
+:class:`EntityIndex` records which chunks mention each matched entity, so a
+follow-up query on a known ID (``"INC-2024-003 affected server owner"``) is
+answered by a dictionary lookup instead of an embedding request plus a
+vector search.  Entities match case-insensitively and are keyed by their
+lower-cased text.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections.abc import Mapping, Sequence
+
+from shared.lexical_index import _TERM_RE
+from shared.vector_index import SearchHit
+
+
+class EntityIndex:
+    """Entity → mentioning chunks, built from configured regex patterns.
+
+    Searches take no lock: writers (serialised on a lock) replace the
+    per-entity mappings instead of mutating them, so a reader always sees
+    a complete mapping.
+    """
+
+    def __init__(self, patterns: Mapping[str, str]) -> None:
+        if not patterns:
+            raise ValueError("EntityIndex needs at least one entity pattern")
+        self._patterns: dict[str, re.Pattern[str]] = {}
+        for kind, pattern in patterns.items():
+            try:
+                self._patterns[kind] = re.compile(rf"\b(?:{pattern})\b", re.IGNORECASE)
+            except re.error as err:
+                raise ValueError(f"Invalid entity pattern for '{kind}': {err}") from None
+        self._lock = threading.Lock()
+        # entity → {chunk id: mention count}, in ingest order.
+        self._mentions: dict[str, dict[str, int]] = {}
+        # chunk id → (text, source, entities), for chunks with at least one entity.
+        self._chunks: dict[str, tuple[str, str, tuple[str, ...]]] = {}
+
+    @property
+    def kinds(self) -> list[str]:
+        return list(self._patterns)
+
+    def extract(self, text: str) -> dict[str, int]:
+        """Entities mentioned in *text* (lower-cased) with their mention counts."""
+        counts: dict[str, int] = {}
+        for pattern in self._patterns.values():
+            for match in pattern.finditer(text):
+                entity = match.group(0).lower()
+                counts[entity] = counts.get(entity, 0) + 1
+        return counts
+
+    def add(self, ids: Sequence[str], texts: Sequence[str], sources: Sequence[str]) -> None:
+        additions: dict[str, dict[str, int]] = {}
+        chunks: dict[str, tuple[str, str, tuple[str, ...]]] = {}
+        for chunk_id, text, source in zip(ids, texts, sources):
+            counts = self.extract(text)
+            if not counts:
+                continue
+            chunks[chunk_id] = (text, source, tuple(counts))
+            for entity, count in counts.items():
+                additions.setdefault(entity, {})[chunk_id] = count
+        if not chunks:
+            return
+        with self._lock:
+            self._chunks.update(chunks)
+            for entity, mentions in additions.items():
+                self._mentions[entity] = {**self._mentions.get(entity, {}), **mentions}
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            removed: dict[str, set[str]] = {}
+            for chunk_id in ids:
+                chunk = self._chunks.pop(chunk_id, None)
+                if chunk is not None:
+                    for entity in chunk[2]:
+                        removed.setdefault(entity, set()).add(chunk_id)
+            for entity, chunk_ids in removed.items():
+                kept = {
+                    chunk_id: count
+                    for chunk_id, count in self._mentions.get(entity, {}).items()
+                    if chunk_id not in chunk_ids
+                }
+                if kept:
+                    self._mentions[entity] = kept
+                else:
+                    self._mentions.pop(entity, None)
+
+    def entities_of(self, chunk_id: str) -> tuple[str, ...]:
+        """Entities mentioned by chunk *chunk_id* (empty if none or unknown)."""
+        chunk = self._chunks.get(chunk_id)
+        return () if chunk is None else chunk[2]
+
+    def lookup(self, entity: str) -> list[str]:
+        """Ids of the chunks mentioning *entity*, in ingest order."""
+        return list(self._mentions.get(entity.lower(), {}))
+
+    def search(self, query: str, k: int) -> list[SearchHit] | None:
+        """Chunks mentioning the known entities of *query*, or None if it names none.
+
+        Chunks are ranked by how many of the query's entities they mention,
+        then by overlap with the query's other terms, then by mentions.
+        Scores are 1.0: every hit is an exact match.
+        """
+        mentions = {
+            entity: chunks
+            for entity in self.extract(query)
+            if (chunks := self._mentions.get(entity))
+        }
+        if not mentions:
+            return None
+        terms = {term.lower() for term in _TERM_RE.findall(query)} - set(mentions)
+        matched: dict[str, tuple[int, int]] = {}  # chunk id → (entities, mentions)
+        for chunks in mentions.values():
+            for chunk_id, count in chunks.items():
+                entities, total = matched.get(chunk_id, (0, 0))
+                matched[chunk_id] = (entities + 1, total + count)
+
+        ranked: list[tuple[tuple[int, int, int], SearchHit]] = []
+        for chunk_id, (entities, total) in matched.items():
+            chunk = self._chunks.get(chunk_id)
+            if chunk is None:  # deleted since the mapping was read
+                continue
+            text, source, _ = chunk
+            overlap = len(terms & {term.lower() for term in _TERM_RE.findall(text)})
+            hit = SearchHit(id=chunk_id, text=text, source=source, score=1.0)
+            ranked.append(((entities, overlap, total), hit))
+        ranked.sort(key=lambda item: item[0], reverse=True)  # stable: ties keep ingest order
+        return [hit for _, hit in ranked[:k]]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate size of the chunk texts held for entity hits."""
+        return sum(len(text) for text, _, _ in list(self._chunks.values()))
+
+    def __len__(self) -> int:
+        return len(self._mentions)
+
+    def close(self) -> None:
+        with self._lock:
+            self._mentions = {}
+            self._chunks = {}
@@ -14,6 +14,7 @@ from shared.eval.retrieval import retrieval_precision, retrieval_recall
 from shared.eval.code_quality import StaticMetrics, compute_static_metrics
 from shared.eval.code_review import CodeReviewScores, review_code
 from shared.eval.profiles import ProfileContext, ScenarioProfile
+from shared.retrieval_stats import collect_retrieval_stats
 
 
 @dataclass
@@ -291,50 +292,52 @@ async def evaluate_framework(
         # 2. Query
         query_timed_out = False
         query_error: str | None = None
-        try:
-            result: RunResult = await asyncio.wait_for(
-                framework.query(question.text),
-                timeout=query_timeout_seconds,
-            )
-        except TimeoutError:
-            query_timed_out = True
-            result = RunResult(
-                answer=Answer(
-                    question_id=question.id,
-                    text=(
-                        "Query timed out before producing an answer."
+        # Shared-store and tool-runtime retrieval record into this collector.
+        with collect_retrieval_stats() as retrieval_stats:
+            try:
+                result: RunResult = await asyncio.wait_for(
+                    framework.query(question.text),
+                    timeout=query_timeout_seconds,
+                )
+            except TimeoutError:
+                query_timed_out = True
+                result = RunResult(
+                    answer=Answer(
+                        question_id=question.id,
+                        text=(
+                            "Query timed out before producing an answer."
+                        ),
+                        sources_used=[],
+                        metadata={
+                            "error": "timeout",
+                            "query_timeout_seconds": query_timeout_seconds,
+                        },
                     ),
-                    sources_used=[],
-                    metadata={
-                        "error": "timeout",
-                        "query_timeout_seconds": query_timeout_seconds,
-                    },
-                ),
-                usage=UsageStats(
-                    prompt_tokens=0,
-                    completion_tokens=0,
-                    total_tokens=0,
-                    latency_seconds=query_timeout_seconds,
-                    model_name="timeout",
-                ),
-            )
-        except Exception as err:
-            query_error = f"{type(err).__name__}: {err}"
-            result = RunResult(
-                answer=Answer(
-                    question_id=question.id,
-                    text="Framework query failed before producing an answer.",
-                    sources_used=[],
-                    metadata={"error": "exception", "exception": query_error},
-                ),
-                usage=UsageStats(
-                    prompt_tokens=0,
-                    completion_tokens=0,
-                    total_tokens=0,
-                    latency_seconds=0.0,
-                    model_name="error",
-                ),
-            )
+                    usage=UsageStats(
+                        prompt_tokens=0,
+                        completion_tokens=0,
+                        total_tokens=0,
+                        latency_seconds=query_timeout_seconds,
+                        model_name="timeout",
+                    ),
+                )
+            except Exception as err:
+                query_error = f"{type(err).__name__}: {err}"
+                result = RunResult(
+                    answer=Answer(
+                        question_id=question.id,
+                        text="Framework query failed before producing an answer.",
+                        sources_used=[],
+                        metadata={"error": "exception", "exception": query_error},
+                    ),
+                    usage=UsageStats(
+                        prompt_tokens=0,
+                        completion_tokens=0,
+                        total_tokens=0,
+                        latency_seconds=0.0,
+                        model_name="error",
+                    ),
+                )
 
         # 3. Cost
         cost = compute_cost(
@@ -381,6 +384,12 @@ async def evaluate_framework(
             result=result,
             context=profile_context,
         )
+        if retrieval_stats.calls:
+            question_extra.update(retrieval_stats.as_metrics())
+            if result.usage.latency_seconds > 0:
+                question_extra["retrieval_latency_share"] = min(
+                    1.0, retrieval_stats.total_seconds / result.usage.latency_seconds
+                )
 
         evaluation.questions.append(
             QuestionEvaluation(
@@ -0,0 +1,292 @@
+"""Scaling benchmark for vector index backends on synthetic embeddings.
+
+Measures, per backend and corpus size: build time (adds plus any training),
+single-query p50/p99 latency, and recall@k against exact search.  Corpora
+are clustered Gaussian mixtures so approximate indexes see realistic
+structure; queries are perturbed corpus points.  No network is needed.
+
+The search contention benchmark runs query-cache lookup plus index search
+from a thread pool, with and without a global lock around each call, to
+show how index searches scale across threads.  In ``hybrid`` mode each
+call also runs a BM25 search over synthetic chunk texts
+(:class:`~shared.lexical_index.LexicalIndex`) and fuses both rankings, as
+hybrid retrieval does.  It does not go through
+:meth:`EmbeddingStore.retrieve` (no embedding request or post-processing).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from shared.embeddings import QueryEmbeddingCache
+from shared.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from shared.vector_index import NumpyIndex, VectorIndex, create_vector_index
+
+ADD_BATCH_ROWS = 10_000
+# Synthetic chunk texts: words per chunk, drawn from a vocabulary of this size.
+TEXT_WORDS = 24
+TEXT_VOCABULARY = 5_000
+# Words of a chunk's text used as the lexical query.
+QUERY_WORDS = 4
+
+
+@dataclass(frozen=True)
+class IndexBenchmarkResult:
+    """Build, latency and recall figures for one backend at one corpus size."""
+
+    backend: str
+    size: int
+    dim: int
+    k: int
+    build_seconds: float
+    p50_ms: float
+    p99_ms: float
+    recall_at_k: float
+    params: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class SearchContentionResult:
+    """Concurrent search throughput for one backend, retrieval mode, thread count and lock mode."""
+
+    backend: str
+    size: int
+    threads: int
+    global_lock: bool
+    queries_per_second: float
+    p50_ms: float
+    p99_ms: float
+    params: dict[str, Any] = field(default_factory=dict)
+    mode: str = "vector"  # "vector", or "hybrid" (vector + BM25, fused)
+
+
+def synthetic_corpus(
+    size: int, dim: int, clusters: int | None = None, seed: int = 0
+) -> Iterator[np.ndarray]:
+    """Yield L2-normalised float32 vectors in blocks of ``ADD_BATCH_ROWS``."""
+    rng = np.random.default_rng(seed)
+    clusters = clusters or max(1, int(np.sqrt(size)))
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    for start in range(0, size, ADD_BATCH_ROWS):
+        rows = min(ADD_BATCH_ROWS, size - start)
+        block = centers[rng.integers(0, clusters, rows)]
+        block += 0.5 * rng.normal(size=(rows, dim)).astype(np.float32)
+        yield NumpyIndex._normalise(block)
+
+
+def synthetic_texts(size: int, seed: int = 0) -> list[str]:
+    """*size* chunk texts of ``TEXT_WORDS`` words from a ``TEXT_VOCABULARY``-word vocabulary."""
+    rng = np.random.default_rng(seed)
+    words = rng.integers(0, TEXT_VOCABULARY, (size, TEXT_WORDS))
+    return [" ".join(f"w{word}" for word in row) for row in words]
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Ground-truth row indices of the *k* most similar corpus rows per query."""
+    return NumpyIndex._top_k(queries @ corpus.T, min(k, len(corpus)))
+
+
+def build_index(backend: str, corpus: np.ndarray, params: dict[str, Any]) -> tuple[VectorIndex, float]:
+    """Build an index over *corpus* (ids are row numbers); returns it and build seconds."""
+    start = time.perf_counter()
+    index = create_vector_index(backend, **params)
+    for offset in range(0, len(corpus), ADD_BATCH_ROWS):
+        block = corpus[offset : offset + ADD_BATCH_ROWS]
+        ids = [str(row) for row in range(offset, offset + len(block))]
+        index.add(ids, ids, block, ids)
+    train = getattr(index, "train", None)
+    if callable(train):
+        train()
+    return index, time.perf_counter() - start
+
+
+def benchmark_index(
+    backend: str,
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    k: int,
+    params: dict[str, Any] | None = None,
+) -> IndexBenchmarkResult:
+    """Build *backend* over *corpus* and time single-query searches."""
+    params = dict(params or {})
+    index, build_seconds = build_index(backend, corpus, params)
+    try:
+        index.search(queries[0], k)  # warm-up (lazy training, caches)
+        latencies: list[float] = []
+        found = 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            hits = index.search(query, k)
+            latencies.append(time.perf_counter() - start)
+            expected_ids = {str(row) for row in expected}
+            found += sum(1 for hit in hits if hit.id in expected_ids)
+    finally:
+        index.close()
+
+    latencies_ms = np.asarray(latencies) * 1000.0
+    return IndexBenchmarkResult(
+        backend=backend,
+        size=len(corpus),
+        dim=corpus.shape[1],
+        k=k,
+        build_seconds=build_seconds,
+        p50_ms=float(np.percentile(latencies_ms, 50)),
+        p99_ms=float(np.percentile(latencies_ms, 99)),
+        recall_at_k=found / (len(queries) * truth.shape[1]),
+        params=params,
+    )
+
+
+def run_scaling_benchmark(
+    backends: dict[str, dict[str, Any]],
+    sizes: list[int],
+    dim: int = 256,
+    num_queries: int = 200,
+    k: int = 10,
+    seed: int = 0,
+) -> list[IndexBenchmarkResult]:
+    """Benchmark every backend (key → constructor params) at every corpus size."""
+    results: list[IndexBenchmarkResult] = []
+    rng = np.random.default_rng(seed + 1)
+    for size in sizes:
+        corpus = np.concatenate(list(synthetic_corpus(size, dim, seed=seed)))
+        picks = rng.choice(size, min(num_queries, size), replace=False)
+        queries = NumpyIndex._normalise(
+            corpus[picks] + 0.1 * rng.normal(size=(len(picks), dim)).astype(np.float32)
+        )
+        truth = exact_top_k(corpus, queries, k)
+        for backend, params in backends.items():
+            results.append(benchmark_index(backend, corpus, queries, truth, k, params))
+    return results
+
+
+def benchmark_search_contention(
+    index: VectorIndex,
+    backend: str,
+    queries: np.ndarray,
+    k: int,
+    threads: int,
+    global_lock: bool = False,
+    params: dict[str, Any] | None = None,
+    lexical: LexicalIndex | None = None,
+    lexical_queries: Sequence[str] | None = None,
+) -> SearchContentionResult:
+    """Run every query through cache lookup + search on *threads* workers.
+
+    With *global_lock*, each call holds one shared lock, as a retrieval
+    path serialised on a single mutex would.  With *lexical* (and one
+    *lexical_queries* entry per query), each call also searches it and
+    fuses the two rankings (``hybrid`` mode).
+    """
+    # Headroom: LRU capacity is split across the cache's stripes.
+    cache = QueryEmbeddingCache(max_entries=2 * len(queries))
+    texts = [f"query {row}" for row in range(len(queries))]
+    cache.store("benchmark", None, dict(zip(texts, queries.tolist())))
+    lock = threading.Lock() if global_lock else None
+
+    def search(row: int) -> None:
+        text = texts[row]
+        hits = index.search(cache.lookup("benchmark", None, [text])[text], k)
+        if lexical is not None and lexical_queries is not None:
+            reciprocal_rank_fusion([hits, lexical.search(lexical_queries[row], k)], k)
+
+    def retrieve(row: int) -> float:
+        start = time.perf_counter()
+        if lock is not None:
+            with lock:
+                search(row)
+        else:
+            search(row)
+        return time.perf_counter() - start
+
+    retrieve(0)  # warm-up (lazy training, caches)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(retrieve, range(len(texts))))
+        elapsed = time.perf_counter() - start
+
+    latencies_ms = np.asarray(latencies) * 1000.0
+    return SearchContentionResult(
+        backend=backend,
+        size=len(index),
+        threads=threads,
+        global_lock=global_lock,
+        queries_per_second=len(texts) / elapsed,
+        p50_ms=float(np.percentile(latencies_ms, 50)),
+        p99_ms=float(np.percentile(latencies_ms, 99)),
+        params=dict(params or {}),
+        mode="vector" if lexical is None else "hybrid",
+    )
+
+
+def run_search_contention_benchmark(
+    backends: dict[str, dict[str, Any]],
+    size: int,
+    thread_counts: list[int],
+    dim: int = 256,
+    num_queries: int = 1000,
+    k: int = 10,
+    seed: int = 0,
+    modes: Sequence[str] = ("vector", "hybrid"),
+) -> list[SearchContentionResult]:
+    """Search throughput of every backend and mode at each thread count, lock-free and globally locked.
+
+    *modes* are ``"vector"`` (index search only) and ``"hybrid"`` (index
+    plus BM25 search, fused).
+    """
+    unknown = set(modes) - {"vector", "hybrid"}
+    if unknown:
+        raise ValueError(f"Unknown contention benchmark modes: {sorted(unknown)}")
+    corpus = np.concatenate(list(synthetic_corpus(size, dim, seed=seed)))
+    rng = np.random.default_rng(seed + 1)
+    picks = rng.integers(0, size, num_queries)
+    queries = NumpyIndex._normalise(
+        corpus[picks] + 0.1 * rng.normal(size=(num_queries, dim)).astype(np.float32)
+    )
+    lexical: LexicalIndex | None = None
+    lexical_queries: list[str] = []
+    if "hybrid" in modes:
+        chunk_texts = synthetic_texts(size, seed=seed)
+        lexical = LexicalIndex()
+        for offset in range(0, size, ADD_BATCH_ROWS):
+            block = chunk_texts[offset : offset + ADD_BATCH_ROWS]
+            ids = [str(row) for row in range(offset, offset + len(block))]
+            lexical.add(ids, block, ids)
+        lexical_queries = [
+            " ".join(chunk_texts[row].split()[:QUERY_WORDS]) for row in picks
+        ]
+    results: list[SearchContentionResult] = []
+    try:
+        for backend, params in backends.items():
+            index, _ = build_index(backend, corpus, dict(params))
+            try:
+                for mode in modes:
+                    for global_lock in (True, False):
+                        for threads in thread_counts:
+                            results.append(
+                                benchmark_search_contention(
+                                    index,
+                                    backend,
+                                    queries,
+                                    k,
+                                    threads,
+                                    global_lock,
+                                    params,
+                                    lexical=lexical if mode == "hybrid" else None,
+                                    lexical_queries=lexical_queries,
+                                )
+                            )
+            finally:
+                index.close()
+    finally:
+        if lexical is not None:
+            lexical.close()
+    return results
@@ -0,0 +1,187 @@
+"""Lexical (BM25) chunk retrieval on SQLite FTS5, plus reciprocal-rank fusion.
+
+The lexical index needs no embeddings, so it answers queries without any
+network round-trip.  It is particularly strong on identifier-heavy queries
+(``prod-api-07``, ``INC-2024-003``, ``R-101``) where exact token overlap
+matters more than semantic similarity.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+
+from shared.vector_index import SearchHit
+
+# Identifiers such as ``prod-api-07`` are kept whole and matched as phrases
+# (the FTS tokenizer splits them on ``-`` into adjacent tokens).
+_TERM_RE = re.compile(r"\w+(?:[-_.]\w+)*")
+
+# Standard RRF damping constant (Cormack et al., 2009).
+RRF_K = 60
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 ``OR`` query of quoted terms."""
+    terms = dict.fromkeys(term.lower() for term in _TERM_RE.findall(text))
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class LexicalIndex:
+    """BM25-ranked chunk search over an in-memory SQLite FTS5 table.
+
+    Safe to share across threads.  Writes go to one connection under a
+    lock; searches run on a per-thread, read-only copy of the database
+    (deserialized from the writer's current state and refreshed after each
+    write), so concurrent searches never wait for each other.  Each thread
+    that searches holds one copy, freed when the thread or the index goes
+    away; :attr:`nbytes` counts only the writer's.
+    """
+
+    def __init__(self, snapshot: bytes | None = None) -> None:
+        self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        # Bumped by every write; readers whose copy is older refresh it.
+        self._version = 0
+        self._image: bytes | None = None  # serialized writer state at _version
+        self._closed = False
+        self._readers = threading.local()
+        if snapshot is not None:
+            self._conn.deserialize(snapshot)
+            self._image = snapshot
+            return
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE chunks USING fts5("
+            "chunk_id UNINDEXED, source UNINDEXED, text, tokenize='unicode61')"
+        )
+
+    def _reader(self) -> sqlite3.Connection:
+        """This thread's read-only copy of the database, refreshed if stale."""
+        local = self._readers
+        conn = getattr(local, "conn", None)
+        if conn is not None and local.version == self._version and not self._closed:
+            return conn
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+            if self._image is None:
+                self._image = self._conn.serialize()
+            image, version = self._image, self._version
+        if conn is not None:
+            conn.close()
+        conn = sqlite3.connect(":memory:")
+        conn.deserialize(image)
+        conn.execute("PRAGMA query_only = ON")
+        local.conn, local.version = conn, version
+        return conn
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        """Write the database (FTS index included) to a SQLite file."""
+        with self._lock:
+            Path(path).write_bytes(self._conn.serialize())
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> LexicalIndex:
+        """Open a file written by :meth:`save`; the index is not rebuilt."""
+        return cls(snapshot=Path(path).read_bytes())
+
+    def add(self, ids: Sequence[str], texts: Sequence[str], sources: Sequence[str]) -> None:
+        if not ids:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO chunks (chunk_id, source, text) VALUES (?, ?, ?)",
+                zip(ids, sources, texts),
+            )
+            self._changed()
+
+    def delete(self, ids: Sequence[str]) -> None:
+        if not ids:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM chunks WHERE chunk_id = ?", ((chunk_id,) for chunk_id in ids)
+            )
+            self._changed()
+
+    def _changed(self) -> None:
+        self._version += 1
+        self._image = None
+
+    def chunk_table(self) -> tuple[list[str], list[str], list[str]]:
+        """Ids, texts and sources of the indexed chunks, in insertion order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id, text, source FROM chunks ORDER BY rowid"
+            ).fetchall()
+        return [row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows]
+
+    def search(self, query: str, k: int) -> list[SearchHit]:
+        """Top-*k* chunks by BM25; ``score`` is the negated BM25 rank (higher is better)."""
+        match = fts_query(query)
+        if not match or k <= 0:
+            return []
+        rows = self._reader().execute(
+            "SELECT chunk_id, text, source, bm25(chunks) AS rank FROM chunks "
+            "WHERE chunks MATCH ? ORDER BY rank LIMIT ?",
+            (match, k),
+        ).fetchall()
+        return [
+            SearchHit(id=chunk_id, text=text, source=source, score=-float(rank))
+            for chunk_id, text, source, rank in rows
+        ]
+
+    def search_many(self, queries: Sequence[str], k: int) -> list[list[SearchHit]]:
+        return [self.search(query, k) for query in queries]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM chunks").fetchone()[0]
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the in-memory database, FTS index included."""
+        with self._lock:
+            pages = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        return pages * page_size
+
+    def close(self) -> None:
+        """Close the writer; per-thread copies are dropped on their next use."""
+        with self._lock:
+            self._closed = True
+            self._image = None
+            self._conn.close()
+        conn = getattr(self._readers, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._readers.conn = None
+
+
+def reciprocal_rank_fusion(
+    hit_lists: Sequence[Sequence[SearchHit]], k: int, rrf_k: int = RRF_K
+) -> list[SearchHit]:
+    """Fuse ranked hit lists: each hit scores ``sum(1 / (rrf_k + rank))``.
+
+    Returns the top-*k* distinct chunks with ``score`` set to the fused score.
+    """
+    fused: dict[str, float] = {}
+    first_seen: dict[str, SearchHit] = {}
+    for hits in hit_lists:
+        for rank, hit in enumerate(hits, start=1):
+            fused[hit.id] = fused.get(hit.id, 0.0) + 1.0 / (rrf_k + rank)
+            first_seen.setdefault(hit.id, hit)
+    ranked = sorted(fused, key=lambda chunk_id: fused[chunk_id], reverse=True)[:k]
+    return [
+        SearchHit(
+            id=chunk_id,
+            text=first_seen[chunk_id].text,
+            source=first_seen[chunk_id].source,
+            score=fused[chunk_id],
+        )
+        for chunk_id in ranked
+    ]
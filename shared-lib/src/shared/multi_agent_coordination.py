@@ -11,9 +11,7 @@ Three specialist domains with distinct tools:
 
 from __future__ import annotations
 
-import json
-import re
-import sqlite3
+import asyncio
 import threading
 import uuid
 from dataclasses import dataclass
@@ -23,8 +21,20 @@ from pathlib import Path
 import chromadb
 from openai import OpenAI
 
+from shared.embeddings import embed_queries, embed_texts
 from shared.interface import Document
-from shared.retrieval import EmbeddingStore, RetrievalResult, chunk_text
+from shared.retrieval import ContextPacker, EmbeddingStore, RetrievalResult, chunk_text
+from shared.retrieval_stats import (
+    RetrievalStats,
+    current_retrieval_stats,
+    record_retrieval,
+    timed,
+    use_retrieval_stats,
+)
+from shared.sql_limits import SQLQueryLimits
+from shared.sql_pool import DEFAULT_POOL_SIZE, ReadOnlyConnectionPool
+from shared.sql_seed import compile_seed
+from shared.sql_tool import SQLToolResult, execute_tool_sql
 
 EMBEDDING_MODEL = "text-embedding-3-small"
 CHUNK_SIZE = 500
@@ -133,6 +143,10 @@ class ToolTraceEntry:
     domain: str
     input: str
     sources: list[str]
+    # SQL calls: columns read, as "table.column" (see shared.sql_guard).
+    columns: tuple[str, ...] = ()
+    # Served from the SQL result cache without touching SQLite.
+    cache_hit: bool = False
 
 
 def get_coordinator_prompt() -> str:
@@ -178,6 +192,9 @@ class MultiAgentRuntime:
         chunk_overlap: int = CHUNK_OVERLAP,
         top_k: int = TOP_K,
         max_context_chunks: int = TOP_K,
+        context_packer: ContextPacker | None = None,
+        sql_pool_size: int = DEFAULT_POOL_SIZE,
+        sql_limits: SQLQueryLimits | None = None,
     ) -> None:
         self._scenario_name = scenario_name
         self._database_seed_file = database_seed_file
@@ -187,8 +204,15 @@ class MultiAgentRuntime:
         self._chunk_overlap = chunk_overlap
         self._top_k = top_k
         self._max_context_chunks = max_context_chunks
-
-        self._conn: sqlite3.Connection | None = None
+        self._context_packer = context_packer
+
+        # Both domain SQL tools share one pool of read-only connections onto
+        # the seed image.  Queries run outside ``_lock``, which only guards
+        # the budget, the trace and client creation.
+        self._sql_pool_size = sql_pool_size
+        # Row, size, time and VM-step bounds per query (see shared.sql_limits).
+        self._sql_limits = sql_limits or SQLQueryLimits()
+        self._pool: ReadOnlyConnectionPool | None = None
         self._lock = threading.RLock()
 
         if embedding_store is None:
@@ -206,31 +230,58 @@ class MultiAgentRuntime:
         self._tool_calls = 0
         self._tool_trace: list[ToolTraceEntry] = []
         self._sources_used: list[str] = []
+        # Collector of the current question, for tools run on worker threads.
+        self._run_stats: RetrievalStats | None = None
 
     # -- Lifecycle ---------------------------------------------------------
 
-    def set_limits(self, *, top_k: int, max_context_chunks: int) -> None:
+    def set_limits(
+        self,
+        *,
+        top_k: int,
+        max_context_chunks: int,
+        context_packer: ContextPacker | None = None,
+        sql_limits: SQLQueryLimits | None = None,
+    ) -> None:
         self._top_k = top_k
         self._max_context_chunks = max_context_chunks
+        self._context_packer = context_packer
+        self._sql_limits = sql_limits or SQLQueryLimits()
+
+    def _retrieval_depth(self) -> int:
+        """Chunks to retrieve: the packer's candidate pool, or ``top_k``."""
+        if self._context_packer is not None:
+            return self._context_packer.max_candidates
+        return self._top_k
+
+    def _select_chunks(self, retrieval: RetrievalResult) -> tuple[list[str], list[str]]:
+        """Chunks and sources to show: token-budget packed, or the first ``max_context_chunks``."""
+        if self._context_packer is not None:
+            packed = self._context_packer.pack(retrieval)
+            return packed.chunks, packed.sources
+        return retrieval.chunks[: self._max_context_chunks], list(retrieval.sources)
 
     def start_run(self, *, max_tool_calls: int) -> None:
         self._max_tool_calls = max(1, max_tool_calls)
         self._tool_calls = 0
         self._tool_trace = []
         self._sources_used = []
+        self._run_stats = current_retrieval_stats()
 
     # -- Observation -------------------------------------------------------
 
     def tool_calls(self) -> int:
         return self._tool_calls
 
-    def tool_trace(self) -> list[dict[str, str | list[str]]]:
+    def tool_trace(self) -> list[dict[str, str | list[str] | bool]]:
         return [
             {
                 "tool": e.tool,
                 "domain": e.domain,
                 "input": e.input,
                 "sources": list(e.sources),
+                "columns": list(e.columns),
+                "cache_hit": e.cache_hit,
             }
             for e in self._tool_trace
         ]
@@ -255,21 +306,18 @@ class MultiAgentRuntime:
         return repo_root / "scenarios" / self._scenario_name / self._database_seed_file
 
     def _ensure_openai(self) -> OpenAI:
-        if self._openai_client is None:
-            self._openai_client = OpenAI()
-        return self._openai_client
+        with self._lock:
+            if self._openai_client is None:
+                self._openai_client = OpenAI()
+            return self._openai_client
 
     def _init_db(self) -> None:
-        seed_path = self._resolve_seed_sql_path()
-        if not seed_path.exists():
-            raise FileNotFoundError(f"SQLite seed file not found: {seed_path}")
+        """Open a connection pool onto the compiled seed image (see :mod:`shared.sql_seed`)."""
+        image = compile_seed(self._resolve_seed_sql_path())
         with self._lock:
-            if self._conn is not None:
-                self._conn.close()
-            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
-            self._conn.row_factory = sqlite3.Row
-            self._conn.executescript(seed_path.read_text())
-            self._conn.commit()
+            if self._pool is not None:
+                self._pool.close()
+            self._pool = ReadOnlyConnectionPool(image, self._sql_pool_size)
 
     @staticmethod
     def _merge_unique(existing: list[str], incoming: list[str]) -> list[str]:
@@ -285,10 +333,24 @@ class MultiAgentRuntime:
         self._sources_used = self._merge_unique(self._sources_used, sources)
 
     def _record_call(
-        self, *, tool: str, domain: str, tool_input: str, sources: list[str]
+        self,
+        *,
+        tool: str,
+        domain: str,
+        tool_input: str,
+        sources: list[str],
+        columns: list[str] = (),
+        cache_hit: bool = False,
     ) -> None:
         self._tool_trace.append(
-            ToolTraceEntry(tool=tool, domain=domain, input=tool_input, sources=sources)
+            ToolTraceEntry(
+                tool=tool,
+                domain=domain,
+                input=tool_input,
+                sources=sources,
+                columns=tuple(columns),
+                cache_hit=cache_hit,
+            )
         )
         self._add_sources(sources)
 
@@ -302,162 +364,70 @@ class MultiAgentRuntime:
         self._tool_calls += 1
         return None
 
-    def _known_tables(self) -> set[str]:
-        with self._lock:
-            if self._conn is None:
-                return set()
-            return {
-                str(row["name"]).lower()
-                for row in self._conn.execute(
-                    "SELECT name FROM sqlite_master WHERE type = 'table'"
-                ).fetchall()
-            }
-
-    def _schema_brief(self, allowed_tables: set[str] | None = None) -> str:
-        with self._lock:
-            if self._conn is None:
-                return "Schema unavailable."
-            tables = [
-                str(row["name"])
-                for row in self._conn.execute(
-                    "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"
-                ).fetchall()
-            ]
-            if allowed_tables is not None:
-                tables = [t for t in tables if t.lower() in allowed_tables]
-            if not tables:
-                return "No accessible tables."
-            lines: list[str] = []
-            for table in tables:
-                cols = self._conn.execute(f"PRAGMA table_info({table})").fetchall()
-                col_names = [str(row["name"]) for row in cols]
-                lines.append(f"{table}: {', '.join(col_names)}")
-            return "\n".join(lines)
-
-    @staticmethod
-    def _extract_sql_sources(query: str) -> list[str]:
-        tables = re.findall(
-            r"\b(?:from|join)\s+([a-zA-Z_][a-zA-Z0-9_]*)",
-            query,
-            flags=re.IGNORECASE,
-        )
-        deduped: list[str] = []
-        seen: set[str] = set()
-        for table in tables:
-            lowered = table.lower()
-            if lowered not in seen:
-                seen.add(lowered)
-                deduped.append(lowered)
-        return deduped
-
-    @staticmethod
-    def _is_safe_sql(query: str) -> bool:
-        lowered = query.lower()
-        if ";" in query:
-            return False
-        destructive = re.search(
-            r"\b(insert|update|delete|drop|alter|create|replace|truncate|"
-            r"attach|detach|vacuum|reindex)\b",
-            lowered,
-        )
-        if destructive:
-            return False
-        return (
-            lowered.startswith("select")
-            or lowered.startswith("with")
-            or lowered.startswith("pragma")
-        )
-
     def _run_scoped_sql(
         self, query: str, domain: str, allowed_tables: set[str]
     ) -> str:
-        """Execute SQL scoped to a set of allowed tables for a domain."""
+        """Execute SQL scoped to a set of allowed tables for a domain.
+
+        Reading a table outside *allowed_tables* is refused with an access
+        denied observation listing the domain's tables, so each specialist
+        only sees its own slice of the database.
+        """
         tool_name = f"query_{domain}"
         with self._lock:
             budget_error = self._consume_tool_call(tool_name, domain, query)
             if budget_error:
                 return budget_error
+            pool = self._pool
 
-            if self._conn is None:
-                self._record_call(
-                    tool=tool_name, domain=domain, tool_input=query, sources=[]
-                )
-                return "Database not initialized."
-
-            cleaned = query.strip().rstrip(";")
-            if not cleaned:
-                self._record_call(
-                    tool=tool_name, domain=domain, tool_input=query, sources=[]
-                )
-                return "Empty SQL query."
-
-            if not self._is_safe_sql(cleaned):
-                hint = self._schema_brief(allowed_tables)
-                self._record_call(
-                    tool=tool_name, domain=domain, tool_input=query, sources=[]
-                )
-                return (
-                    "Unsafe or unsupported SQL. Only SELECT/WITH/PRAGMA read-only "
-                    f"queries are allowed.\nAccessible tables:\n{hint}"
-                )
-
-            try:
-                cursor = self._conn.execute(cleaned)
-                rows = [dict(row) for row in cursor.fetchall()]
-                row_count = len(rows)
-                payload = json.dumps(rows[:20], indent=2, default=str)
-
-                sources = self._extract_sql_sources(cleaned)
-                known = self._known_tables()
-                sources = [s for s in sources if s in known]
-
-                lowered = cleaned.lower()
-                if lowered.startswith("pragma table_info("):
-                    match = re.search(
-                        r"pragma\s+table_info\(([^)]+)\)", lowered
-                    )
-                    if match:
-                        table = match.group(1).strip().strip("'\"").lower()
-                        if table in known:
-                            sources = self._merge_unique(sources, [table])
-
-                self._record_call(
-                    tool=tool_name, domain=domain, tool_input=query, sources=sources
-                )
-                return f"Row count: {row_count}\nRows (max 20):\n{payload}"
-            except Exception as err:
-                hint = self._schema_brief(allowed_tables)
-                self._record_call(
-                    tool=tool_name, domain=domain, tool_input=query, sources=[]
-                )
-                return f"SQL error: {err}\nAccessible tables:\n{hint}"
+        if pool is None:
+            result = SQLToolResult("Database not initialized.", [], [])
+        else:
+            result = execute_tool_sql(pool, query, self._sql_limits, allowed_tables)
+        with self._lock:
+            self._record_call(
+                tool=tool_name,
+                domain=domain,
+                tool_input=query,
+                sources=result.sources,
+                columns=result.columns,
+                cache_hit=result.cache_hit,
+            )
+        return result.observation
 
     def _retrieve_docs(self, query: str) -> RetrievalResult:
         if self._embedding_store is not None:
-            return self._embedding_store.retrieve(query, top_k=self._top_k)
+            return self._embedding_store.retrieve(query, top_k=self._retrieval_depth())
 
         openai_client = self._ensure_openai()
-        response = openai_client.embeddings.create(
-            model=self._embedding_model,
-            input=query,
-        )
-        query_embedding = response.data[0].embedding
+        with timed("embed_seconds"):
+            query_embedding = embed_queries(openai_client, self._embedding_model, [query])[0]
 
-        results = self._collection.query(
-            query_embeddings=[query_embedding],
-            n_results=self._top_k,
-        )
+        with timed("search_seconds"):
+            results = self._collection.query(
+                query_embeddings=[query_embedding],
+                n_results=self._retrieval_depth(),
+            )
 
         chunks: list[str] = []
         sources: list[str] = []
-        if results["documents"] and results["documents"][0]:
-            for doc, meta in zip(results["documents"][0], results["metadatas"][0]):
-                source = meta.get("source", "unknown")
-                chunks.append(f"[Source: {source}]\n{doc}")
-                if source not in sources:
-                    sources.append(source)
+        with timed("format_seconds"):
+            if results["documents"] and results["documents"][0]:
+                for doc, meta in zip(results["documents"][0], results["metadatas"][0]):
+                    source = meta.get("source", "unknown")
+                    chunks.append(f"[Source: {source}]\n{doc}")
+                    if source not in sources:
+                        sources.append(source)
+        record_retrieval(
+            calls=1, queries=1, chunks=len(chunks), chars=sum(len(c) for c in chunks)
+        )
         return RetrievalResult(chunks=chunks, sources=sources)
 
+    async def _aretrieve_docs(self, query: str) -> RetrievalResult:
+        if self._embedding_store is not None:
+            return await self._embedding_store.aretrieve(query, top_k=self._retrieval_depth())
+        return await asyncio.to_thread(self._retrieve_docs, query)
+
     # -- Public lifecycle --------------------------------------------------
 
     def prepare(self, documents: list[Document]) -> None:
@@ -481,11 +451,7 @@ class MultiAgentRuntime:
                 all_ids.append(f"{doc.source}_{i}")
                 all_metadatas.append({"source": doc.source})
 
-        response = openai_client.embeddings.create(
-            model=self._embedding_model,
-            input=all_chunks,
-        )
-        embeddings = [item.embedding for item in response.data]
+        embeddings = embed_texts(openai_client, self._embedding_model, all_chunks)
         self._collection.add(
             ids=all_ids,
             documents=all_chunks,
@@ -499,9 +465,9 @@ class MultiAgentRuntime:
             if self._embedding_store is None and self._collection is not None:
                 self._chroma_client.delete_collection(self._collection_name)
                 self._collection = None
-            if self._conn is not None:
-                self._conn.close()
-                self._conn = None
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
 
     # -- Tools exposed to frameworks ---------------------------------------
 
@@ -513,28 +479,48 @@ class MultiAgentRuntime:
         """Execute read-only SQL scoped to security tables."""
         return self._run_scoped_sql(query, "security", SECURITY_TABLES)
 
+    def _render_runbook(self, query: str, retrieval: RetrievalResult) -> str:
+        chunks, sources = self._select_chunks(retrieval)
+        if not chunks:
+            self._record_call(
+                tool="lookup_runbook",
+                domain="runbook",
+                tool_input=query,
+                sources=[],
+            )
+            return "No policy/document context found."
+
+        self._record_call(
+            tool="lookup_runbook",
+            domain="runbook",
+            tool_input=query,
+            sources=sources,
+        )
+        return "\n\n---\n\n".join(chunks)
+
     def lookup_runbook(self, query: str) -> str:
-        """Semantic search over operational runbooks and policy documents."""
+        """Semantic search over operational runbooks and policy documents.
+
+        Retrieval runs outside the lock, which only guards the budget and
+        the trace.
+        """
         with self._lock:
             budget_error = self._consume_tool_call("lookup_runbook", "runbook", query)
             if budget_error:
                 return budget_error
 
+        with use_retrieval_stats(self._run_stats):
             retrieval = self._retrieve_docs(query)
-            chunks = retrieval.chunks[: self._max_context_chunks]
-            if not chunks:
-                self._record_call(
-                    tool="lookup_runbook",
-                    domain="runbook",
-                    tool_input=query,
-                    sources=[],
-                )
-                return "No policy/document context found."
+        with self._lock:
+            return self._render_runbook(query, retrieval)
 
-            self._record_call(
-                tool="lookup_runbook",
-                domain="runbook",
-                tool_input=query,
-                sources=list(retrieval.sources),
-            )
-            return "\n\n---\n\n".join(chunks)
+    async def alookup_runbook(self, query: str) -> str:
+        """Async :meth:`lookup_runbook` that keeps the event loop free during embedding I/O."""
+        with self._lock:
+            budget_error = self._consume_tool_call("lookup_runbook", "runbook", query)
+            if budget_error:
+                return budget_error
+
+        retrieval = await self._aretrieve_docs(query)
+        with self._lock:
+            return self._render_runbook(query, retrieval)
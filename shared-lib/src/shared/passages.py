@@ -0,0 +1,164 @@
+"""Retrieval post-processing: merge overlapping chunks and suppress near-duplicates.
+
+With ``chunk_overlap > 0`` neighbouring chunks of one document share text,
+and a query that lands near a chunk boundary retrieves both.  Sending both
+repeats the overlap in the prompt.  Near-identical passages in different
+documents (boilerplate, copied paragraphs) repeat even more.
+
+- :func:`merge_adjacent_hits` joins hits of the same source whose
+  ``[start, end)`` spans overlap or touch into one contiguous passage.
+- :func:`drop_near_duplicates` and :func:`mmr_select` remove hits whose
+  word-shingle Jaccard similarity to a hit already kept reaches a threshold.
+  :func:`mmr_select` additionally re-ranks by Maximal Marginal Relevance
+  (Carbonell & Goldstein, 1998).
+
+Both work on text and spans alone, so they apply to every backend,
+including the lexical one, which has no vectors.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Mapping, Sequence
+
+from shared.embeddings import count_tokens
+from shared.vector_index import SearchHit
+
+# Word n-gram length for near-duplicate detection.
+SHINGLE_SIZE = 3
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> frozenset[tuple[str, ...]]:
+    """Lower-cased word *size*-grams of *text*; the whole text if it is shorter."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return frozenset([tuple(words)]) if words else frozenset()
+    return frozenset(tuple(words[i : i + size]) for i in range(len(words) - size + 1))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def drop_near_duplicates(
+    hits: Sequence[SearchHit], threshold: float
+) -> tuple[list[SearchHit], list[SearchHit]]:
+    """Keep hits in order, dropping any whose similarity to a kept hit is ``>= threshold``.
+
+    Returns ``(kept, dropped)``.
+    """
+    kept: list[SearchHit] = []
+    kept_shingles: list[frozenset] = []
+    dropped: list[SearchHit] = []
+    for hit in hits:
+        hit_shingles = shingles(hit.text)
+        if any(jaccard(hit_shingles, other) >= threshold for other in kept_shingles):
+            dropped.append(hit)
+        else:
+            kept.append(hit)
+            kept_shingles.append(hit_shingles)
+    return kept, dropped
+
+
+def mmr_select(
+    hits: Sequence[SearchHit],
+    k: int,
+    lambda_: float = 0.7,
+    duplicate_threshold: float | None = None,
+) -> tuple[list[SearchHit], list[SearchHit]]:
+    """Greedily pick *k* hits maximising ``λ·relevance − (1−λ)·redundancy``.
+
+    Relevance is the hit score min-max normalised over *hits* (scores are
+    comparable only within one ranked list); redundancy is the highest
+    Jaccard similarity to an already selected hit.  Candidates at or above
+    *duplicate_threshold* are dropped outright.  Returns
+    ``(selected, dropped)``.
+    """
+    if not hits or k <= 0:
+        return [], []
+    scores = [hit.score for hit in hits]
+    low, span = min(scores), (max(scores) - min(scores)) or 1.0
+    relevance = [(score - low) / span for score in scores]
+    candidate_shingles = [shingles(hit.text) for hit in hits]
+    redundancy = [0.0] * len(hits)
+
+    remaining = list(range(len(hits)))
+    selected: list[int] = []
+    dropped: list[int] = []
+    while remaining and len(selected) < k:
+        if duplicate_threshold is not None:
+            dropped.extend(i for i in remaining if redundancy[i] >= duplicate_threshold)
+            remaining = [i for i in remaining if redundancy[i] < duplicate_threshold]
+            if not remaining:
+                break
+        best = max(
+            remaining, key=lambda i: lambda_ * relevance[i] - (1.0 - lambda_) * redundancy[i]
+        )
+        remaining.remove(best)
+        selected.append(best)
+        for i in remaining:
+            similarity = jaccard(candidate_shingles[i], candidate_shingles[best])
+            redundancy[i] = max(redundancy[i], similarity)
+    return [hits[i] for i in selected], [hits[i] for i in dropped]
+
+
+def merge_adjacent_hits(
+    hits: Sequence[SearchHit], spans: Mapping[str, tuple[int, int]]
+) -> tuple[list[SearchHit], int]:
+    """Join same-source hits whose character spans overlap or touch.
+
+    *spans* maps chunk id → ``(start, end)`` offsets in its document.  Each
+    merged passage takes the position of its best-ranked member, the ids of
+    its members joined with ``+`` and their highest score.  Hits without a
+    known span pass through unchanged.  Returns the hits and the number of
+    tokens removed (the overlap that would otherwise have been repeated).
+    """
+    by_source: dict[str, list[tuple[int, int, int]]] = {}
+    for rank, hit in enumerate(hits):
+        span = spans.get(hit.id)
+        if span is not None:
+            by_source.setdefault(hit.source, []).append((span[0], span[1], rank))
+
+    # rank of each run's best member → merged hit; ranks of absorbed members
+    replacements: dict[int, SearchHit] = {}
+    absorbed: set[int] = set()
+    tokens_saved = 0
+    for members in by_source.values():
+        members.sort()
+        run = [members[0]]
+        for member in members[1:] + [None]:
+            if member is not None and member[0] <= max(end for _, end, _ in run):
+                run.append(member)
+                continue
+            if len(run) > 1:
+                merged = _merge_run([hits[rank] for *_, rank in run], run)
+                lead = min(rank for *_, rank in run)
+                replacements[lead] = merged
+                absorbed.update(rank for *_, rank in run if rank != lead)
+                tokens_saved += sum(count_tokens(hits[rank].text) for *_, rank in run)
+                tokens_saved -= count_tokens(merged.text)
+            run = [member] if member is not None else []
+
+    merged_hits = [
+        replacements.get(rank, hit) for rank, hit in enumerate(hits) if rank not in absorbed
+    ]
+    return merged_hits, max(tokens_saved, 0)
+
+
+def _merge_run(hits: list[SearchHit], run: list[tuple[int, int, int]]) -> SearchHit:
+    """One passage from hits sorted by start offset; trims the shared prefix of each."""
+    text, end = hits[0].text, run[0][1]
+    for hit, (start, hit_end, _) in zip(hits[1:], run[1:]):
+        if hit_end > end:
+            text += hit.text[end - start :]
+            end = hit_end
+    return SearchHit(
+        id="+".join(hit.id for hit in hits),
+        text=text,
+        source=hits[0].source,
+        score=max(hit.score for hit in hits),
+    )
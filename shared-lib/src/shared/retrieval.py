@@ -2,12 +2,61 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from dataclasses import dataclass, field
+from itertools import batched
+from pathlib import Path
+from typing import Any
 
-import chromadb
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
+from shared.chunk_graph import ChunkGraph
+from shared.chunking import CharacterChunker, create_chunker
+from shared.embeddings import (
+    MAX_BATCH_SIZE,
+    MAX_BATCH_TOKENS,
+    MAX_CONCURRENT_REQUESTS,
+    EmbeddingStats,
+    aembed_queries,
+    count_tokens,
+    embed_queries,
+    embed_stream,
+    text_digest,
+)
+from shared.entity_index import EntityIndex
 from shared.interface import Document
+from shared.lexical_index import RRF_K, LexicalIndex, reciprocal_rank_fusion
+from shared.passages import drop_near_duplicates, merge_adjacent_hits, mmr_select
+from shared.retrieval_stats import record_retrieval, timed
+from shared.vector_index import (
+    NumpyIndex,
+    SearchHit,
+    VectorIndex,
+    create_vector_index,
+    vector_index_class,
+)
+
+# ``vector``: embedding search; ``lexical``: SQLite FTS5/BM25 (no network);
+# ``hybrid``: both, fused with reciprocal-rank fusion.
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+
+# In hybrid mode each retriever contributes this many times top_k candidates.
+HYBRID_DEPTH_FACTOR = 3
+
+# With MMR diversification each query ranks this many times top_k candidates.
+MMR_DEPTH_FACTOR = 2
+
+# With ``expand_hops``, graph expansion adds at most this many neighbour
+# chunks per selected chunk and hop.
+GRAPH_EXPANSION_FACTOR = 1
+
+# Bumped whenever the on-disk layout written by EmbeddingStore.save changes.
+SNAPSHOT_FORMAT = 1
 
 
 @dataclass(frozen=True)
@@ -16,39 +65,247 @@ class RetrievalResult:
 
     chunks: list[str]  # formatted as "[Source: file.md]\nchunk text..."
     sources: list[str]  # unique source file names
+    # Tokens not sent because overlapping chunks were merged or
+    # near-duplicates dropped (0 unless the store enables either).
+    tokens_saved: int = 0
+    # Retrieval score of each chunk, aligned with ``chunks`` (higher is
+    # better; the scale depends on the retrieval mode).  Empty when the
+    # retriever reports no scores.
+    scores: list[float] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class MultiRetrievalResult:
+    """Per-query results of a batched retrieval plus a merged view.
+
+    ``merged`` keeps query order then rank order and contains each chunk
+    once, even when several queries retrieved it.
+    """
+
+    results: list[RetrievalResult]
+    merged: RetrievalResult
+
+
+@dataclass(frozen=True)
+class PackedContext:
+    """Chunks selected by a :class:`ContextPacker` and the tokens they use."""
+
+    chunks: list[str]
+    sources: list[str]
+    tokens_used: int
+    candidates: int  # chunks offered to the packer
+    stop_reason: str  # "exhausted", "budget", "score_floor" or "score_cliff"
+
+    def as_metadata(self) -> dict[str, Any]:
+        """Flat fields for ``Answer.metadata``."""
+        return {
+            "context_tokens": self.tokens_used,
+            "context_candidates": self.candidates,
+            "context_stop_reason": self.stop_reason,
+        }
+
+
+@dataclass(frozen=True)
+class ContextPacker:
+    """Fill a prompt token budget from ranked chunks instead of a fixed top-k.
+
+    Chunks are taken in rank order while they fit in *token_budget* (a chunk
+    that does not fit is skipped, and smaller ones further down may still
+    fit).  Packing stops early when a score falls below *score_floor*, or
+    drops from the previous chunk's score by more than *score_cliff* times
+    the top score, since candidates beyond a sharp fall-off are rarely
+    relevant.  The first *min_chunks* chunks that fit ignore both score
+    checks.  Without scores (e.g. standalone chroma retrieval) only the
+    budget applies.
+
+    Frameworks opt in through ``mode_config``, see :meth:`from_config`.
+    """
+
+    token_budget: int
+    score_floor: float | None = None
+    score_cliff: float | None = None
+    min_chunks: int = 1
+    max_candidates: int = 10
+
+    def __post_init__(self) -> None:
+        if self.token_budget <= 0:
+            raise ValueError(f"token_budget must be positive, got {self.token_budget}")
+        if self.score_cliff is not None and self.score_cliff <= 0:
+            raise ValueError(f"score_cliff must be positive, got {self.score_cliff}")
+        if self.max_candidates <= 0:
+            raise ValueError(f"max_candidates must be positive, got {self.max_candidates}")
+
+    @classmethod
+    def from_config(cls, mode_config: dict[str, Any], top_k: int) -> ContextPacker | None:
+        """Build a packer from ``context_*`` keys, or None without ``context_token_budget``.
+
+        ``context_max_candidates`` defaults to twice *top_k*.
+        """
+        budget = mode_config.get("context_token_budget")
+        if budget is None:
+            return None
+        return cls(
+            token_budget=int(budget),
+            score_floor=mode_config.get("context_score_floor"),
+            score_cliff=mode_config.get("context_score_cliff"),
+            min_chunks=int(mode_config.get("context_min_chunks", 1)),
+            max_candidates=int(mode_config.get("context_max_candidates", 2 * top_k)),
+        )
+
+    def pack(self, result: RetrievalResult) -> PackedContext:
+        """Greedily pack *result*'s ranked chunks into the token budget."""
+        chunks: list[str] = []
+        sources: list[str] = []
+        tokens_used = 0
+        stop_reason = "exhausted"
+        scores = result.scores if len(result.scores) == len(result.chunks) else []
+        top_score = scores[0] if scores else 0.0
+        for rank, chunk in enumerate(result.chunks):
+            if scores and len(chunks) >= self.min_chunks:
+                score = scores[rank]
+                if self.score_floor is not None and score < self.score_floor:
+                    stop_reason = "score_floor"
+                    break
+                if (
+                    self.score_cliff is not None
+                    and rank > 0
+                    and scores[rank - 1] - score > self.score_cliff * abs(top_score)
+                ):
+                    stop_reason = "score_cliff"
+                    break
+            tokens = count_tokens(chunk)
+            if tokens_used + tokens > self.token_budget:
+                stop_reason = "budget"
+                continue
+            chunks.append(chunk)
+            tokens_used += tokens
+            source = chunk_source(chunk)
+            if source is not None and source not in sources:
+                sources.append(source)
+        return PackedContext(
+            chunks=chunks,
+            sources=sources,
+            tokens_used=tokens_used,
+            candidates=len(result.chunks),
+            stop_reason=stop_reason,
+        )
+
+
+@dataclass(frozen=True)
+class IngestStats:
+    """What an :meth:`EmbeddingStore.ingest` call changed, per document."""
+
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    embedding: EmbeddingStats = EmbeddingStats()
+
+
+def chunk_source(chunk: str) -> str | None:
+    """The source name in a chunk formatted as ``"[Source: name]\\ntext"``."""
+    header, _, _ = chunk.partition("\n")
+    if header.startswith("[Source: ") and header.endswith("]"):
+        return header[len("[Source: ") : -1]
+    return None
 
 
 def chunk_text(text: str, chunk_size: int, overlap: int) -> list[str]:
     """Split text into overlapping character-based chunks.
 
     This is the canonical chunking function.  Frameworks should import
-    this instead of defining their own ``_chunk_text()``.
+    this instead of defining their own ``_chunk_text()``.  See
+    :mod:`shared.chunking` for span-based and token/markdown strategies.
     """
-    chunks: list[str] = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunks.append(text[start:end])
-        start = end - overlap
-    return chunks
+    return CharacterChunker(chunk_size, overlap).chunk(text)
+
+
+def _corpus_config(
+    embedding_model: str,
+    dimensions: int | None,
+    chunk_strategy: str,
+    chunk_size: int,
+    chunk_overlap: int,
+) -> dict[str, Any]:
+    return {
+        "embedding_model": embedding_model,
+        "dimensions": dimensions,
+        "chunk_strategy": chunk_strategy,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+    }
+
+
+def _snapshot_key(config: dict[str, Any], digests: Iterable[tuple[str, str]]) -> str:
+    payload = {"config": config, "documents": sorted(digests)}
+    return text_digest(json.dumps(payload, sort_keys=True))
 
 
 class EmbeddingStore:
-    """Embeds documents once, caches query embeddings, and serves retrieval.
+    """Embeds documents once and serves retrieval (query embeddings are cached process-wide).
 
     Designed to be instantiated once in the eval harness and shared across
     all framework evaluations for a given scenario run.
 
+    Retrieval is safe to call from any number of threads at once and takes
+    no store-wide lock: the ``numpy``, ``ivf_flat`` and ``quantized``
+    indexes search immutable published views (see
+    :mod:`shared.vector_index`), lexical search runs on a per-thread copy
+    of the BM25 index (see :class:`~shared.lexical_index.LexicalIndex`) and
+    the query cache is lock-striped.  ``chroma`` searches are only as
+    concurrent as chromadb's own locking allows.  :meth:`ingest` may run
+    concurrently with retrieval, but not with another :meth:`ingest`.
+
     Parameters
     ----------
     embedding_model:
         OpenAI embedding model name (e.g. ``"text-embedding-3-small"``).
     chunk_size:
-        Character count per chunk.
+        Chunk length, in the units of *chunk_strategy* (characters or tokens).
     chunk_overlap:
         Overlap between consecutive chunks.
     top_k:
         Number of chunks to retrieve per query.
+    dimensions:
+        Optional output dimensionality requested from the embedding model.
+    backend:
+        Vector index backend key (``"chroma"`` or ``"numpy"``), see
+        :mod:`shared.vector_index`.
+    index_params:
+        Extra keyword arguments forwarded to the backend constructor.
+    max_batch_tokens:
+        Token budget per ingest embedding request.
+    max_concurrent_requests:
+        Maximum number of ingest embedding requests in flight.
+    chunk_strategy:
+        Chunking strategy key (``"character"``, ``"token"`` or
+        ``"markdown"``), see :mod:`shared.chunking`.
+    retrieval_mode:
+        Default retrieval mode, one of :data:`RETRIEVAL_MODES`.  ``lexical``
+        builds no vector index, so neither ingest nor retrieval calls the
+        embedding API.
+    rrf_k:
+        Reciprocal-rank fusion constant used in ``hybrid`` mode.
+    merge_adjacent:
+        Join retrieved chunks of the same document whose spans overlap or
+        touch into one passage, so the chunk overlap is sent once.
+    mmr_lambda:
+        If set, rank ``MMR_DEPTH_FACTOR * top_k`` candidates and pick
+        ``top_k`` by Maximal Marginal Relevance with this relevance weight
+        (1.0 is plain relevance order).
+    duplicate_threshold:
+        If set, drop chunks whose word-shingle Jaccard similarity to a chunk
+        already returned is at least this value.  See :mod:`shared.passages`.
+    entity_patterns:
+        Entity kind → regex (scenario ``entity_patterns``).  Ingest then
+        also builds an :class:`~shared.entity_index.EntityIndex`, and
+        retrieval calls with ``entity_hops=True`` answer queries that name
+        a known entity from it, with no embedding request or vector search.
+    chunk_graph:
+        Also build a :class:`~shared.chunk_graph.ChunkGraph` (previous/next
+        chunk of a document, plus shared entities when ``entity_patterns``
+        is set), so retrieval calls with ``expand_hops > 0`` return the
+        neighbourhood of the selected chunks in the same call.
     """
 
     def __init__(
@@ -57,99 +314,721 @@ class EmbeddingStore:
         chunk_size: int = 500,
         chunk_overlap: int = 50,
         top_k: int = 3,
+        dimensions: int | None = None,
+        backend: str = "chroma",
+        index_params: dict[str, Any] | None = None,
+        max_batch_tokens: int = MAX_BATCH_TOKENS,
+        max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS,
+        chunk_strategy: str = "character",
+        retrieval_mode: str = "vector",
+        rrf_k: int = RRF_K,
+        merge_adjacent: bool = False,
+        mmr_lambda: float | None = None,
+        duplicate_threshold: float | None = None,
+        entity_patterns: Mapping[str, str] | None = None,
+        chunk_graph: bool = False,
     ) -> None:
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(
+                f"Unknown retrieval mode '{retrieval_mode}'. "
+                f"Available: {', '.join(RETRIEVAL_MODES)}"
+            )
+        if mmr_lambda is not None and not 0.0 <= mmr_lambda <= 1.0:
+            raise ValueError(f"mmr_lambda must be in [0, 1], got {mmr_lambda}")
+        if duplicate_threshold is not None and not 0.0 < duplicate_threshold <= 1.0:
+            raise ValueError(
+                f"duplicate_threshold must be in (0, 1], got {duplicate_threshold}"
+            )
         self._embedding_model = embedding_model
+        self._dimensions = dimensions
         self._chunk_size = chunk_size
         self._chunk_overlap = chunk_overlap
+        self._chunker = create_chunker(chunk_strategy, chunk_size, chunk_overlap)
         self._top_k = top_k
+        self._backend = backend
+        self._index_params = dict(index_params or {})
+        self._max_batch_tokens = max_batch_tokens
+        self._max_concurrent_requests = max_concurrent_requests
+        self._retrieval_mode = retrieval_mode
+        self._rrf_k = rrf_k
+        self._merge_adjacent = merge_adjacent
+        self._mmr_lambda = mmr_lambda
+        self._duplicate_threshold = duplicate_threshold
+        self._entity_patterns = dict(entity_patterns or {})
 
         self._openai_client: OpenAI | None = None
-        self._chroma_client = chromadb.Client()
-        self._collection: chromadb.Collection | None = None
-        self._collection_name = "shared_embedding_store"
+        # One async client (and therefore one HTTP connection pool) shared by
+        # every async caller of this store.
+        self._async_openai_client: AsyncOpenAI | None = None
+        # Guards only the lazy creation of the clients above.
+        self._client_lock = threading.Lock()
+        self._index: VectorIndex | None = None
+        self._lexical: LexicalIndex | None = None
+        self._entities = EntityIndex(self._entity_patterns) if self._entity_patterns else None
+        self._graph = ChunkGraph(self._entities) if chunk_graph else None
         self._ingested = False
 
-        # Cache: question text → embedding vector
-        self._query_cache: dict[str, list[float]] = {}
+        # Per-document bookkeeping for incremental re-ingest:
+        # source → content digest, and source → number of chunks indexed
+        # (chunk ids are ``{source}_{i}`` for ``i < count``).
+        self._doc_digests: dict[str, str] = {}
+        self._doc_chunk_counts: dict[str, int] = {}
+        # chunk id → (start, end) character offsets, for merging adjacent hits.
+        self._spans: dict[str, tuple[int, int]] = {}
+
+    @property
+    def backend(self) -> str:
+        return self._backend
+
+    @property
+    def retrieval_mode(self) -> str:
+        return self._retrieval_mode
+
+    @property
+    def index(self) -> VectorIndex | None:
+        """The populated vector index, or None before :meth:`ingest`."""
+        return self._index
+
+    @property
+    def entities(self) -> EntityIndex | None:
+        """The entity index, or None without ``entity_patterns``."""
+        return self._entities
+
+    @property
+    def graph(self) -> ChunkGraph | None:
+        """The chunk graph, or None unless built with ``chunk_graph=True``."""
+        return self._graph
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the vector, lexical and entity indexes and the chunk graph."""
+        total = 0 if self._index is None else self._index.nbytes
+        if self._lexical is not None:
+            total += self._lexical.nbytes
+        if self._entities is not None:
+            total += self._entities.nbytes
+        if self._graph is not None:
+            total += self._graph.nbytes
+        return total
 
     def _ensure_openai(self) -> OpenAI:
-        if self._openai_client is None:
-            self._openai_client = OpenAI()
-        return self._openai_client
-
-    def ingest(self, documents: list[Document]) -> None:
-        """Chunk and embed all documents.  Idempotent — only embeds once."""
-        if self._ingested:
-            return
-
-        openai_client = self._ensure_openai()
-        self._collection = self._chroma_client.create_collection(
-            name=self._collection_name,
+        with self._client_lock:
+            if self._openai_client is None:
+                self._openai_client = OpenAI()
+            return self._openai_client
+
+    def _ensure_async_openai(self) -> AsyncOpenAI:
+        with self._client_lock:
+            if self._async_openai_client is None:
+                self._async_openai_client = AsyncOpenAI()
+            return self._async_openai_client
+
+    def _delete_document(self, source: str) -> None:
+        count = self._doc_chunk_counts.pop(source, 0)
+        self._doc_digests.pop(source, None)
+        ids = [f"{source}_{i}" for i in range(count)]
+        for chunk_id in ids:
+            self._spans.pop(chunk_id, None)
+        if self._index is not None:
+            self._index.delete(ids)
+        if self._lexical is not None:
+            self._lexical.delete(ids)
+        if self._entities is not None:
+            self._entities.delete(ids)
+        if self._graph is not None:
+            self._graph.delete(ids)
+
+    def ingest(
+        self,
+        documents: Iterable[Document],
+        progress: Callable[[EmbeddingStats], None] | None = None,
+        prune: bool = True,
+    ) -> IngestStats:
+        """Bring the indexes in line with *documents*, embedding only what changed.
+
+        Each document is identified by its ``source`` and tracked by a digest
+        of its content.  Unchanged documents are skipped, modified ones have
+        their old chunks replaced and new ones are added.  With *prune*, the
+        chunks of documents absent from *documents* are deleted.
+
+        Changed documents are streamed: chunks are embedded in token-budgeted
+        batches with a bounded number of concurrent requests and added to the
+        indexes as each batch completes.
+        """
+        uses_vectors = self._retrieval_mode != "lexical"
+        if uses_vectors and self._index is None:
+            self._index = create_vector_index(self._backend, **self._index_params)
+        if self._retrieval_mode != "vector" and self._lexical is None:
+            self._lexical = LexicalIndex()
+        index, lexical = self._index, self._lexical
+
+        seen: set[str] = set()
+        touched: list[str] = []
+        counts = {"added": 0, "updated": 0, "unchanged": 0}
+
+        def changed_chunks() -> Iterator[tuple[str, tuple[str, str]]]:
+            for doc in documents:
+                seen.add(doc.source)
+                digest = text_digest(doc.content)
+                previous = self._doc_digests.get(doc.source)
+                if previous == digest:
+                    counts["unchanged"] += 1
+                    continue
+                if previous is None:
+                    counts["added"] += 1
+                else:
+                    counts["updated"] += 1
+                    self._delete_document(doc.source)
+
+                touched.append(doc.source)
+                self._doc_digests[doc.source] = digest
+                self._doc_chunk_counts[doc.source] = 0
+                for i, span in enumerate(self._chunker.iter_spans(doc.source, doc.content)):
+                    self._doc_chunk_counts[doc.source] = i + 1
+                    self._spans[f"{doc.source}_{i}"] = (span.start, span.end)
+                    yield span.text(doc.content), (f"{doc.source}_{i}", doc.source)
+
+        def add_batch(
+            payloads: list[tuple[str, str]], texts: list[str], vectors: list[list[float]]
+        ) -> None:
+            ids = [chunk_id for chunk_id, _ in payloads]
+            sources = [source for _, source in payloads]
+            if index is not None:
+                index.add(ids, texts, vectors, sources)
+            if lexical is not None:
+                lexical.add(ids, texts, sources)
+            if self._entities is not None:
+                self._entities.add(ids, texts, sources)
+            if self._graph is not None:
+                self._graph.add(ids, texts, sources)
+
+        try:
+            if uses_vectors:
+                embedding_stats = embed_stream(
+                    self._ensure_openai(),
+                    self._embedding_model,
+                    changed_chunks(),
+                    add_batch,
+                    dimensions=self._dimensions,
+                    max_batch_tokens=self._max_batch_tokens,
+                    max_concurrency=self._max_concurrent_requests,
+                    progress=progress,
+                )
+            else:
+                embedding_stats = EmbeddingStats()
+                for batch in batched(changed_chunks(), MAX_BATCH_SIZE):
+                    add_batch([payload for _, payload in batch], [t for t, _ in batch], [])
+        except BaseException:
+            # Forget partially indexed documents so the next ingest redoes them.
+            for source in touched:
+                self._delete_document(source)
+            raise
+
+        removed = 0
+        if prune:
+            for source in [s for s in self._doc_digests if s not in seen]:
+                self._delete_document(source)
+                removed += 1
+
+        self._ingested = True
+        return IngestStats(removed=removed, embedding=embedding_stats, **counts)
+
+    def _corpus_config(self) -> dict[str, Any]:
+        """Constructor arguments that determine chunk boundaries and vectors."""
+        return _corpus_config(
+            self._embedding_model,
+            self._dimensions,
+            self._chunker.key,
+            self._chunk_size,
+            self._chunk_overlap,
         )
 
-        all_chunks: list[str] = []
-        all_ids: list[str] = []
-        all_metadatas: list[dict] = []
+    def _retrieval_config(self) -> dict[str, Any]:
+        """Constructor arguments a snapshot restores by default (see :meth:`load`)."""
+        return {
+            "backend": self._backend,
+            "index_params": self._index_params,
+            "retrieval_mode": self._retrieval_mode,
+            "top_k": self._top_k,
+            "rrf_k": self._rrf_k,
+            "merge_adjacent": self._merge_adjacent,
+            "mmr_lambda": self._mmr_lambda,
+            "duplicate_threshold": self._duplicate_threshold,
+            "entity_patterns": self._entity_patterns,
+            "chunk_graph": self._graph is not None,
+        }
+
+    def _key_for(self, digests: Iterable[tuple[str, str]]) -> str:
+        return _snapshot_key(self._corpus_config(), digests)
+
+    def corpus_key(self, documents: Iterable[Document]) -> str:
+        """Snapshot key of *documents* under this store's chunking and embedding config."""
+        return self._key_for((doc.source, text_digest(doc.content)) for doc in documents)
+
+    @staticmethod
+    def options_key(documents: Iterable[Document], **store_options: Any) -> str:
+        """:meth:`corpus_key` of a store built with *store_options*, without building it.
+
+        Options that do not affect chunks or vectors are ignored, so the
+        full keyword arguments of the store can be passed.
+        """
+        config = _corpus_config(
+            store_options.get("embedding_model", "text-embedding-3-small"),
+            store_options.get("dimensions"),
+            store_options.get("chunk_strategy", "character"),
+            store_options.get("chunk_size", 500),
+            store_options.get("chunk_overlap", 50),
+        )
+        return _snapshot_key(config, ((doc.source, text_digest(doc.content)) for doc in documents))
+
+    def save(self, path: str | os.PathLike[str]) -> str:
+        """Persist the ingested indexes to directory *path*; returns the corpus key.
+
+        Layout: ``manifest.json`` (config, key, per-document digests and chunk
+        spans), ``vectors/`` (see :meth:`NumpyIndex.save`) and
+        ``lexical.sqlite``.  The directory is written under a temporary name
+        and renamed into place, so readers never see a partial snapshot.
+        Only the ``numpy`` and ``ivf_flat`` vector backends can be saved.
+        """
+        if not self._ingested:
+            raise RuntimeError("Must call ingest() before save()")
+        if self._index is not None and not isinstance(self._index, NumpyIndex):
+            raise ValueError(
+                f"Vector backend '{self._backend}' does not support snapshots "
+                "(use 'numpy' or 'ivf_flat')"
+            )
+        path = Path(path)
+        key = self._key_for(self._doc_digests.items())
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "key": key,
+            "config": self._corpus_config(),
+            "defaults": self._retrieval_config(),
+            "documents": {
+                source: [digest, self._doc_chunk_counts.get(source, 0)]
+                for source, digest in self._doc_digests.items()
+            },
+            "spans": self._spans,
+        }
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.tmp-{uuid.uuid4().hex[:8]}")
+        tmp.mkdir()
+        try:
+            if self._index is not None:
+                self._index.save(tmp / "vectors")
+            if self._lexical is not None:
+                self._lexical.save(tmp / "lexical.sqlite")
+            (tmp / "manifest.json").write_text(json.dumps(manifest))
+            if path.exists():
+                shutil.rmtree(path)
+            try:
+                os.replace(tmp, path)
+            except OSError:
+                if not (path / "manifest.json").exists():
+                    raise
+                shutil.rmtree(tmp)  # another process saved the same snapshot first
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return key
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str], **options: Any) -> EmbeddingStore:
+        """Open a snapshot written by :meth:`save`, ready for retrieval.
 
-        for doc in documents:
-            chunks = chunk_text(doc.content, self._chunk_size, self._chunk_overlap)
-            for i, text in enumerate(chunks):
-                all_chunks.append(text)
-                all_ids.append(f"{doc.source}_{i}")
-                all_metadatas.append({"source": doc.source})
+        Vectors and chunk texts are memory-mapped, so loading does no
+        embedding and no copying; processes that load the same snapshot
+        share its pages.  *options* are constructor arguments (``top_k``,
+        ``backend``, ``retrieval_mode``, …); the retrieval settings (backend,
+        index params, mode, ``top_k``, passage post-processing,
+        ``entity_patterns`` and ``chunk_graph``) default to the saved ones,
+        and the chunking and embedding config must match the snapshot.  A later :meth:`ingest`
+        updates the loaded store incrementally.
+        """
+        path = Path(path)
+        manifest = json.loads((path / "manifest.json").read_text())
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(
+                f"Unsupported snapshot format {manifest.get('format')!r} in {path} "
+                f"(expected {SNAPSHOT_FORMAT})"
+            )
+        config = manifest["config"]
+        for name, value in config.items():
+            if name in options and options[name] != value:
+                raise ValueError(
+                    f"Snapshot {path} was built with {name}={value!r}, got {options[name]!r}"
+                )
+        store = cls(**{**manifest["defaults"], **options, **config})
+
+        vectors_dir = path / "vectors"
+        if store._retrieval_mode != "lexical":
+            if not vectors_dir.exists():
+                raise ValueError(f"Snapshot {path} has no vector index")
+            index_cls = vector_index_class(store._backend)
+            if not issubclass(index_cls, NumpyIndex):
+                raise ValueError(
+                    f"Vector backend '{store._backend}' cannot load snapshots "
+                    "(use 'numpy' or 'ivf_flat')"
+                )
+            store._index = index_cls.load(vectors_dir, **store._index_params)
+        if store._retrieval_mode != "vector":
+            if (path / "lexical.sqlite").exists():
+                store._lexical = LexicalIndex.load(path / "lexical.sqlite")
+            elif vectors_dir.exists():
+                store._lexical = LexicalIndex()
+                store._lexical.add(*NumpyIndex.load(vectors_dir).chunk_table())
+            else:
+                raise ValueError(f"Snapshot {path} has no lexical index or chunk table")
+        if store._entities is not None or store._graph is not None:
+            if isinstance(store._index, NumpyIndex):
+                chunks = store._index.chunk_table()
+            else:
+                assert store._lexical is not None
+                chunks = store._lexical.chunk_table()
+            if store._entities is not None:
+                store._entities.add(*chunks)
+            if store._graph is not None:
+                store._graph.add(*chunks)
 
-        response = openai_client.embeddings.create(
-            model=self._embedding_model,
-            input=all_chunks,
+        for source, (digest, count) in manifest["documents"].items():
+            store._doc_digests[source] = digest
+            store._doc_chunk_counts[source] = count
+        store._spans = {chunk_id: tuple(span) for chunk_id, span in manifest["spans"].items()}
+        store._ingested = True
+        return store
+
+    def _embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """Return query embeddings via the process-wide query cache (one request for misses)."""
+        return embed_queries(
+            self._ensure_openai(), self._embedding_model, queries, dimensions=self._dimensions
         )
-        embeddings = [item.embedding for item in response.data]
 
-        self._collection.add(
-            ids=all_ids,
-            documents=all_chunks,
-            embeddings=embeddings,
-            metadatas=all_metadatas,
+    async def _aembed_queries(self, queries: list[str]) -> list[list[float]]:
+        """Async counterpart of :meth:`_embed_queries` using ``AsyncOpenAI``."""
+        return await aembed_queries(
+            self._ensure_async_openai(),
+            self._embedding_model,
+            queries,
+            dimensions=self._dimensions,
         )
-        self._ingested = True
 
-    def retrieve(self, question: str, top_k: int | None = None) -> RetrievalResult:
-        """Embed the question (with caching) and return top-k matching chunks."""
-        if not self._ingested or self._collection is None:
-            raise RuntimeError("Must call ingest() before retrieve()")
+    def _resolve_mode(self, method: str, mode: str | None) -> str:
+        if not self._ingested:
+            raise RuntimeError(f"Must call ingest() before {method}()")
+        mode = mode or self._retrieval_mode
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(
+                f"Unknown retrieval mode '{mode}'. Available: {', '.join(RETRIEVAL_MODES)}"
+            )
+        if (mode != "lexical" and self._index is None) or (
+            mode != "vector" and self._lexical is None
+        ):
+            raise ValueError(
+                f"Retrieval mode '{mode}' is unavailable for a store built in "
+                f"'{self._retrieval_mode}' mode"
+            )
+        return mode
+
+    def _search(
+        self,
+        queries: list[str],
+        embeddings: list[list[float]],
+        k: int,
+        mode: str,
+    ) -> list[list[SearchHit]]:
+        """One hit list per query from the vector index, the lexical index, or both."""
+        if mode == "vector":
+            assert self._index is not None
+            return self._index.search_many(embeddings, k)
+        assert self._lexical is not None
+        if mode == "lexical":
+            return self._lexical.search_many(queries, k)
+
+        assert self._index is not None
+        depth = k * HYBRID_DEPTH_FACTOR
+        vector_hits = self._index.search_many(embeddings, depth)
+        lexical_hits = self._lexical.search_many(queries, depth)
+        return [
+            reciprocal_rank_fusion([vector, lexical], k, self._rrf_k)
+            for vector, lexical in zip(vector_hits, lexical_hits)
+        ]
+
+    def _search_depth(self, k: int) -> int:
+        return k * MMR_DEPTH_FACTOR if self._mmr_lambda is not None else k
+
+    def _select(self, hits: list[SearchHit], k: int) -> tuple[list[SearchHit], int]:
+        """Diversify a ranked candidate list down to *k* hits.
+
+        Returns the hits and the tokens of near-duplicates dropped from the
+        plain top-*k*.
+        """
+        if self._mmr_lambda is not None:
+            selected, dropped = mmr_select(
+                hits, k, self._mmr_lambda, self._duplicate_threshold
+            )
+        elif self._duplicate_threshold is not None:
+            selected, dropped = drop_near_duplicates(hits[:k], self._duplicate_threshold)
+        else:
+            return hits[:k], 0
+        top_ids = {hit.id for hit in hits[:k]}
+        return selected, sum(count_tokens(hit.text) for hit in dropped if hit.id in top_ids)
+
+    def _assemble(self, hits: list[SearchHit], tokens_saved: int = 0) -> RetrievalResult:
+        """Format hits, merging adjacent chunks first when enabled."""
+        if self._merge_adjacent:
+            hits, merged_saved = merge_adjacent_hits(hits, self._spans)
+            tokens_saved += merged_saved
+        return self._format_hits(hits, tokens_saved)
+
+    def _check_expand(self, expand_hops: int) -> None:
+        if expand_hops < 0:
+            raise ValueError(f"expand_hops must be >= 0, got {expand_hops}")
+        if expand_hops and self._graph is None:
+            raise ValueError("expand_hops needs a store built with chunk_graph=True")
 
+    def _expand(self, hits: list[SearchHit], expand_hops: int) -> list[SearchHit]:
+        """*hits* followed by their chunk-graph neighbourhood, if *expand_hops*."""
+        if not expand_hops or self._graph is None or not hits:
+            return hits
+        expanded = self._graph.expand(hits, expand_hops, len(hits) * GRAPH_EXPANSION_FACTOR)
+        if expanded:
+            record_retrieval(expanded_chunks=len(expanded))
+        return hits + expanded
+
+    def _finish(self, hits: list[SearchHit], k: int, expand_hops: int = 0) -> RetrievalResult:
+        with timed("format_seconds"):
+            selected, tokens_saved = self._select(hits, k)
+            result = self._assemble(self._expand(selected, expand_hops), tokens_saved)
+        record_retrieval(
+            calls=1,
+            queries=1,
+            chunks=len(result.chunks),
+            chars=sum(len(chunk) for chunk in result.chunks),
+        )
+        return result
+
+    def _finish_many(
+        self,
+        queries: list[str],
+        hit_lists: list[list[SearchHit]],
+        k: int,
+        expand_hops: int = 0,
+    ) -> MultiRetrievalResult:
+        with timed("format_seconds"):
+            result = self._merge_hit_lists(hit_lists, k, expand_hops)
+        record_retrieval(
+            calls=1,
+            queries=len(queries),
+            chunks=len(result.merged.chunks),
+            chars=sum(len(chunk) for chunk in result.merged.chunks),
+        )
+        return result
+
+    def _entity_hits(
+        self, queries: list[str], k: int, entity_hops: bool
+    ) -> dict[int, list[SearchHit]]:
+        """Hits for the queries the entity index can answer, by query position."""
+        if not entity_hops or self._entities is None:
+            return {}
+        with timed("search_seconds"):
+            resolved = {
+                position: hits
+                for position, query in enumerate(queries)
+                if (hits := self._entities.search(query, k)) is not None
+            }
+        if resolved:
+            record_retrieval(entity_hops=len(resolved))
+        return resolved
+
+    @staticmethod
+    def _combine(
+        queries: list[str], resolved: dict[int, list[SearchHit]], searched: list[list[SearchHit]]
+    ) -> list[list[SearchHit]]:
+        """Interleave entity-index hits and searched hits back into query order."""
+        remaining = iter(searched)
+        return [
+            resolved[position] if position in resolved else next(remaining)
+            for position in range(len(queries))
+        ]
+
+    def retrieve(
+        self,
+        question: str,
+        top_k: int | None = None,
+        mode: str | None = None,
+        entity_hops: bool = False,
+        expand_hops: int = 0,
+    ) -> RetrievalResult:
+        """Return the top-k chunks for a question.
+
+        *mode* overrides the store's retrieval mode for this call.  Vector and
+        hybrid modes embed the question (with caching) first.  With
+        *entity_hops*, a question naming a known entity is answered from the
+        entity index instead (see :mod:`shared.entity_index`).  With
+        *expand_hops* > 0, the selected chunks are followed by chunks up to
+        that many edges away in the chunk graph (see :mod:`shared.chunk_graph`).
+        Timings and counts go to the active :mod:`shared.retrieval_stats`
+        collector.
+        """
+        mode = self._resolve_mode("retrieve", mode)
+        self._check_expand(expand_hops)
         k = top_k if top_k is not None else self._top_k
+        depth = self._search_depth(k)
+        resolved = self._entity_hits([question], depth, entity_hops)
+        if resolved:
+            return self._finish(resolved[0], k, expand_hops)
 
         # Cache the question embedding — reused across frameworks
-        if question not in self._query_cache:
-            openai_client = self._ensure_openai()
-            response = openai_client.embeddings.create(
-                model=self._embedding_model,
-                input=question,
-            )
-            self._query_cache[question] = response.data[0].embedding
+        with timed("embed_seconds"):
+            embeddings = self._embed_queries([question]) if mode != "lexical" else []
+        with timed("search_seconds"):
+            hits = self._search([question], embeddings, depth, mode)[0]
+        return self._finish(hits, k, expand_hops)
+
+    async def aretrieve(
+        self,
+        question: str,
+        top_k: int | None = None,
+        mode: str | None = None,
+        entity_hops: bool = False,
+        expand_hops: int = 0,
+    ) -> RetrievalResult:
+        """Async :meth:`retrieve`: the embedding round-trip does not block the event loop."""
+        mode = self._resolve_mode("aretrieve", mode)
+        self._check_expand(expand_hops)
+        k = top_k if top_k is not None else self._top_k
+        depth = self._search_depth(k)
+        resolved = self._entity_hits([question], depth, entity_hops)
+        if resolved:
+            return self._finish(resolved[0], k, expand_hops)
+
+        with timed("embed_seconds"):
+            embeddings = await self._aembed_queries([question]) if mode != "lexical" else []
+        with timed("search_seconds"):
+            hits = self._search([question], embeddings, depth, mode)[0]
+        return self._finish(hits, k, expand_hops)
 
-        results = self._collection.query(
-            query_embeddings=[self._query_cache[question]],
-            n_results=k,
+    def retrieve_many(
+        self,
+        queries: list[str],
+        top_k: int | None = None,
+        mode: str | None = None,
+        entity_hops: bool = False,
+        expand_hops: int = 0,
+    ) -> MultiRetrievalResult:
+        """Retrieve for several queries with one embedding call and one batched search.
+
+        With *entity_hops*, queries naming a known entity skip both.  With
+        *expand_hops*, each query's chunks are expanded as in :meth:`retrieve`
+        before merging.
+        """
+        mode = self._resolve_mode("retrieve_many", mode)
+        self._check_expand(expand_hops)
+        if not queries:
+            return self._merge_hit_lists([], 0)
+
+        k = top_k if top_k is not None else self._top_k
+        depth = self._search_depth(k)
+        resolved = self._entity_hits(queries, depth, entity_hops)
+        pending = [query for position, query in enumerate(queries) if position not in resolved]
+        searched: list[list[SearchHit]] = []
+        if pending:
+            with timed("embed_seconds"):
+                embeddings = self._embed_queries(pending) if mode != "lexical" else []
+            with timed("search_seconds"):
+                searched = self._search(pending, embeddings, depth, mode)
+        return self._finish_many(
+            queries, self._combine(queries, resolved, searched), k, expand_hops
         )
 
+    async def aretrieve_many(
+        self,
+        queries: list[str],
+        top_k: int | None = None,
+        mode: str | None = None,
+        entity_hops: bool = False,
+        expand_hops: int = 0,
+    ) -> MultiRetrievalResult:
+        """Async :meth:`retrieve_many`."""
+        mode = self._resolve_mode("aretrieve_many", mode)
+        self._check_expand(expand_hops)
+        if not queries:
+            return self._merge_hit_lists([], 0)
+
+        k = top_k if top_k is not None else self._top_k
+        depth = self._search_depth(k)
+        resolved = self._entity_hits(queries, depth, entity_hops)
+        pending = [query for position, query in enumerate(queries) if position not in resolved]
+        searched: list[list[SearchHit]] = []
+        if pending:
+            with timed("embed_seconds"):
+                embeddings = await self._aembed_queries(pending) if mode != "lexical" else []
+            with timed("search_seconds"):
+                searched = self._search(pending, embeddings, depth, mode)
+        return self._finish_many(
+            queries, self._combine(queries, resolved, searched), k, expand_hops
+        )
+
+    def _merge_hit_lists(
+        self, hit_lists: list[list[SearchHit]], k: int, expand_hops: int = 0
+    ) -> MultiRetrievalResult:
+        selections = [
+            (self._expand(hits, expand_hops), saved)
+            for hits, saved in (self._select(hits, k) for hits in hit_lists)
+        ]
+        merged_hits: list[SearchHit] = []
+        seen_ids: set[str] = set()
+        for hits, _ in selections:
+            for hit in hits:
+                if hit.id not in seen_ids:
+                    seen_ids.add(hit.id)
+                    merged_hits.append(hit)
+
+        merged_saved = 0
+        if self._duplicate_threshold is not None:
+            merged_hits, dropped = drop_near_duplicates(merged_hits, self._duplicate_threshold)
+            merged_saved = sum(count_tokens(hit.text) for hit in dropped)
+        return MultiRetrievalResult(
+            results=[self._assemble(hits, saved) for hits, saved in selections],
+            merged=self._assemble(merged_hits, merged_saved),
+        )
+
+    @staticmethod
+    def _format_hits(hits: list[SearchHit], tokens_saved: int = 0) -> RetrievalResult:
         chunks: list[str] = []
         sources: list[str] = []
-        if results["documents"] and results["documents"][0]:
-            for doc_text, meta in zip(
-                results["documents"][0], results["metadatas"][0]
-            ):
-                source = meta.get("source", "unknown")
-                chunks.append(f"[Source: {source}]\n{doc_text}")
-                if source not in sources:
-                    sources.append(source)
-
-        return RetrievalResult(chunks=chunks, sources=sources)
+        for hit in hits:
+            chunks.append(f"[Source: {hit.source}]\n{hit.text}")
+            if hit.source not in sources:
+                sources.append(hit.source)
+        return RetrievalResult(
+            chunks=chunks,
+            sources=sources,
+            tokens_saved=tokens_saved,
+            scores=[hit.score for hit in hits],
+        )
 
     def cleanup(self) -> None:
-        """Release chromadb resources."""
-        if self._collection is not None:
-            self._chroma_client.delete_collection(self._collection_name)
-            self._collection = None
+        """Release vector and lexical index resources."""
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        if self._lexical is not None:
+            self._lexical.close()
+            self._lexical = None
+        if self._entities is not None:
+            self._entities.close()
+        if self._graph is not None:
+            self._graph.close()
         self._ingested = False
-        self._query_cache.clear()
+        self._doc_digests.clear()
+        self._doc_chunk_counts.clear()
+        self._spans.clear()
+
+    async def acleanup(self) -> None:
+        """Release vector index resources and close the async HTTP connection pool."""
+        if self._async_openai_client is not None:
+            await self._async_openai_client.close()
+            self._async_openai_client = None
+        self.cleanup()
@@ -0,0 +1,131 @@
+"""Per-question retrieval instrumentation: where retrieval time goes.
+
+The harness opens a collector around each ``framework.query()`` call with
+:func:`collect_retrieval_stats`; the shared store, the tool runtimes and
+:func:`shared.embeddings.embed_queries` add to it with
+:func:`record_retrieval`.  The collector lives in a context variable, so
+it follows the query into asyncio tasks and ``asyncio.to_thread`` workers
+without any framework passing it around, and concurrent questions never
+mix.  Outside a collector, recording is a no-op.
+
+Threads started by a plain ``ThreadPoolExecutor`` (crewai runs tools in
+such workers) do not inherit context variables.  The tool runtimes
+therefore capture the collector in ``start_run`` with
+:func:`current_retrieval_stats` and re-activate it around their tools
+with :func:`use_retrieval_stats`.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, fields
+
+# Prefix of the keys added to ``QuestionEvaluation.extra_metrics``.
+METRIC_PREFIX = "retrieval_"
+
+
+@dataclass
+class RetrievalStats:
+    """Retrieval work done while answering one question.
+
+    Timings are wall-clock seconds summed over calls: embedding the query
+    (cache lookup plus any HTTP request), searching the indexes, and
+    post-processing/formatting the hits into chunks.  ``entity_hops``
+    counts queries answered from the entity index without embedding;
+    ``expanded_chunks`` counts chunks added by chunk-graph expansion.
+    """
+
+    calls: int = 0
+    queries: int = 0
+    embed_seconds: float = 0.0
+    search_seconds: float = 0.0
+    format_seconds: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    entity_hops: int = 0
+    expanded_chunks: int = 0
+    chunks: int = 0
+    chars: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, **counts: float) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    @property
+    def total_seconds(self) -> float:
+        return self.embed_seconds + self.search_seconds + self.format_seconds
+
+    @property
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+    def as_metrics(self) -> dict[str, float | int]:
+        """Flat, prefixed metrics for ``QuestionEvaluation.extra_metrics``."""
+        metrics: dict[str, float | int] = {
+            f"{METRIC_PREFIX}{f.name}": getattr(self, f.name)
+            for f in fields(self)
+            if not f.name.startswith("_")
+        }
+        metrics[f"{METRIC_PREFIX}seconds"] = self.total_seconds
+        metrics[f"{METRIC_PREFIX}cache_hit_rate"] = self.cache_hit_rate
+        return metrics
+
+
+_current: ContextVar[RetrievalStats | None] = ContextVar("retrieval_stats", default=None)
+
+
+@contextmanager
+def collect_retrieval_stats() -> Iterator[RetrievalStats]:
+    """Collect the retrieval work done inside the ``with`` block."""
+    stats = RetrievalStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def current_retrieval_stats() -> RetrievalStats | None:
+    """The active collector, if any."""
+    return _current.get()
+
+
+@contextmanager
+def use_retrieval_stats(stats: RetrievalStats | None) -> Iterator[None]:
+    """Record into *stats* inside the block when no collector is active.
+
+    For code running on a thread that did not inherit the collector's
+    context; an active collector is left in place.
+    """
+    if stats is None or _current.get() is not None:
+        yield
+        return
+    token = _current.set(stats)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def record_retrieval(**counts: float) -> None:
+    """Add *counts* (field name → increment) to the active collector, if any."""
+    stats = _current.get()
+    if stats is not None:
+        stats.add(**counts)
+
+
+@contextmanager
+def timed(field_name: str) -> Iterator[None]:
+    """Add the wall-clock time of the ``with`` block to *field_name*."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_retrieval(**{field_name: time.perf_counter() - start})
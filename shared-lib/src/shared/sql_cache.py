@@ -0,0 +1,135 @@
+"""Process-wide cache of rendered SQL tool results.
+
+Scenario databases are read-only within a process, and every framework ×
+run × repeat asks them largely the same questions (the same ``SELECT``s,
+the same ``PRAGMA table_info(...)`` introspection).  :class:`SQLResultCache`
+keeps the rendered observation of successful, deterministic queries (with
+the tables and columns they read), keyed by the seed snapshot they ran
+against (:attr:`shared.sql_seed.SeedImage.digest`), the tool's table scope
+and the normalised query text (see :func:`normalize_sql`).
+
+The size (entries) comes from ``SQL_RESULT_CACHE_SIZE``; ``0`` disables it.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+
+SQL_RESULT_CACHE_SIZE_ENV = "SQL_RESULT_CACHE_SIZE"
+DEFAULT_SQL_RESULT_CACHE_SIZE = 4096
+
+# Keywords upper-cased by normalize_sql.  Only keywords: identifier and
+# function-name case is kept, since it shows up in result column names.
+_KEYWORDS = frozenset(
+    """
+    all and as asc between by case cast collate cross desc distinct else end
+    escape except exists from full glob group having in inner intersect is
+    join left like limit match natural not null offset on or order outer
+    pragma recursive regexp right select then union using values when where
+    with
+    """.split()
+)
+
+# String literals and quoted identifiers (kept verbatim), words, and
+# whitespace or comments (both collapse to one space).
+_TOKEN_RE = re.compile(
+    r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\]|(\w+)|(\s+|--[^\n]*|/\*.*?(?:\*/|$))|.""",
+    re.DOTALL,
+)
+
+
+def normalize_sql(query: str) -> str:
+    """Canonical text of *query* for cache keys.
+
+    Collapses whitespace runs and comments outside quotes to one space,
+    upper-cases keywords and drops trailing semicolons.  Queries that
+    differ only in keyword case share an entry, so an unaliased expression
+    column (``x IS NULL``) is labelled as spelled by the first of them.
+    """
+    parts: list[str] = []
+    for match in _TOKEN_RE.finditer(query.strip().rstrip(";").strip()):
+        word, space = match.group(1), match.group(2)
+        if space is not None:
+            if parts and parts[-1] != " ":
+                parts.append(" ")
+        elif word is not None and word.lower() in _KEYWORDS:
+            parts.append(word.upper())
+        else:
+            parts.append(match.group(0))
+    return "".join(parts).strip()
+
+
+class SQLResultCache:
+    """Thread-safe LRU of (snapshot, scope, normalised SQL) → (observation, sources, columns)."""
+
+    def __init__(self, max_entries: int = DEFAULT_SQL_RESULT_CACHE_SIZE) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[
+            tuple[str, Hashable, str], tuple[str, tuple[str, ...], tuple[str, ...]]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(snapshot: str, scope: Hashable, query: str) -> tuple[str, Hashable, str]:
+        return snapshot, scope, normalize_sql(query)
+
+    def get(
+        self, key: tuple[str, Hashable, str]
+    ) -> tuple[str, list[str], list[str]] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            observation, sources, columns = entry
+            return observation, list(sources), list(columns)
+
+    def put(
+        self,
+        key: tuple[str, Hashable, str],
+        observation: str,
+        sources: list[str],
+        columns: list[str] = (),
+    ) -> None:
+        if self._max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (observation, tuple(sources), tuple(columns))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_default_cache: SQLResultCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_sql_result_cache() -> SQLResultCache | None:
+    """Return the process-wide SQL result cache, or ``None`` when disabled."""
+    global _default_cache
+    if _default_cache is not None:
+        return _default_cache
+    size = int(os.environ.get(SQL_RESULT_CACHE_SIZE_ENV, DEFAULT_SQL_RESULT_CACHE_SIZE))
+    if size <= 0:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SQLResultCache(size)
+        return _default_cache
@@ -0,0 +1,149 @@
+"""Authorizer-based guard for agent-generated SQL.
+
+:class:`ReadGuard` is installed as the connection's SQLite authorizer
+(``sqlite3.Connection.set_authorizer``) while a tool call's statement is
+prepared and run.  SQLite consults it for every table, column, function
+and pragma the statement touches, before executing anything, so the guard
+
+- allows only reads: any write, schema change, ``ATTACH`` or transaction
+  is denied, as are pragmas other than the schema-introspection ones;
+- enforces a table scope: reads of tables outside ``allowed_tables`` are
+  denied (the multi-agent runtime scopes each specialist domain this way);
+- records exactly which tables and columns the statement reads, which
+  become the tool call's sources;
+- notes calls to non-deterministic functions, whose results must not be
+  cached.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Collection, Iterator
+from contextlib import contextmanager
+
+# Pragmas that only describe the schema; the table they name is a source.
+TABLE_PRAGMAS = frozenset({"table_info", "table_xinfo", "index_list", "foreign_key_list"})
+# Argument-less pragmas that list the schema.  Like reads of sqlite_master,
+# they expose table names but no rows, so scoped tools may use them too.
+LISTING_PRAGMAS = frozenset({"table_list"})
+
+# Functions whose result can change between runs of the same statement.  The
+# date/time functions only do so for 'now' (or no argument), but the
+# authorizer does not see arguments, so all of them count.
+NONDETERMINISTIC_FUNCTIONS = frozenset(
+    {
+        "random", "randomblob", "changes", "total_changes", "last_insert_rowid",
+        "current_date", "current_time", "current_timestamp",
+        "date", "time", "datetime", "julianday", "unixepoch", "strftime", "timediff",
+    }
+)
+
+_ALLOWED_ACTIONS = frozenset(
+    {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+)
+
+_ACTION_NAMES = {
+    getattr(sqlite3, name): name.removeprefix("SQLITE_").replace("_", " ").lower()
+    for name in (
+        "SQLITE_INSERT", "SQLITE_UPDATE", "SQLITE_DELETE",
+        "SQLITE_CREATE_TABLE", "SQLITE_CREATE_INDEX", "SQLITE_CREATE_VIEW",
+        "SQLITE_CREATE_TRIGGER", "SQLITE_CREATE_TEMP_TABLE", "SQLITE_CREATE_TEMP_VIEW",
+        "SQLITE_CREATE_TEMP_INDEX", "SQLITE_CREATE_TEMP_TRIGGER", "SQLITE_CREATE_VTABLE",
+        "SQLITE_DROP_TABLE", "SQLITE_DROP_INDEX", "SQLITE_DROP_VIEW", "SQLITE_DROP_TRIGGER",
+        "SQLITE_DROP_TEMP_TABLE", "SQLITE_DROP_TEMP_VIEW", "SQLITE_DROP_TEMP_INDEX",
+        "SQLITE_DROP_TEMP_TRIGGER", "SQLITE_DROP_VTABLE", "SQLITE_ALTER_TABLE",
+        "SQLITE_ATTACH", "SQLITE_DETACH", "SQLITE_TRANSACTION", "SQLITE_SAVEPOINT",
+        "SQLITE_ANALYZE", "SQLITE_REINDEX",
+    )
+    if hasattr(sqlite3, name)
+}
+
+
+class ReadGuard:
+    """SQLite authorizer for one read-only statement.
+
+    Parameters
+    ----------
+    tables:
+        Lower-cased names of the database's tables (reads of anything else,
+        e.g. ``sqlite_master`` or a CTE, are allowed but not recorded).
+    allowed_tables:
+        If set, the only tables the statement may read.
+    """
+
+    def __init__(
+        self, tables: Collection[str], allowed_tables: Collection[str] | None = None
+    ) -> None:
+        self._tables = tables
+        self._allowed = allowed_tables
+        # table → columns read, both in first-read order ("" for none, e.g. COUNT(*)).
+        self._reads: dict[str, dict[str, None]] = {}
+        self.denial: str | None = None
+        self.out_of_scope = False
+        # False once the statement calls a non-deterministic function.
+        self.deterministic = True
+
+    @property
+    def sources(self) -> list[str]:
+        """Tables the statement read."""
+        return list(self._reads)
+
+    @property
+    def columns(self) -> list[str]:
+        """Columns the statement read, as ``table.column``."""
+        return [
+            f"{table}.{column}"
+            for table, columns in self._reads.items()
+            for column in columns
+            if column
+        ]
+
+    def _deny(self, reason: str, out_of_scope: bool = False) -> int:
+        if self.denial is None:
+            self.denial = reason
+            self.out_of_scope = out_of_scope
+        return sqlite3.SQLITE_DENY
+
+    def _read(self, table: str, column: str) -> int:
+        if table not in self._tables:
+            return sqlite3.SQLITE_OK
+        if self._allowed is not None and table not in self._allowed:
+            return self._deny(f"table '{table}' is not accessible from this tool", True)
+        self._reads.setdefault(table, {})[column] = None
+        return sqlite3.SQLITE_OK
+
+    def __call__(
+        self,
+        action: int,
+        arg1: str | None,
+        arg2: str | None,
+        db_name: str | None,
+        source: str | None,
+    ) -> int:
+        if action == sqlite3.SQLITE_FUNCTION and (arg2 or "").lower() in NONDETERMINISTIC_FUNCTIONS:
+            self.deterministic = False
+        if action in _ALLOWED_ACTIONS:
+            return sqlite3.SQLITE_OK
+        if action == sqlite3.SQLITE_READ:
+            return self._read((arg1 or "").lower(), (arg2 or "").lower())
+        if action == sqlite3.SQLITE_PRAGMA:
+            pragma = (arg1 or "").lower()
+            if pragma in TABLE_PRAGMAS and arg2:
+                return self._read(arg2.lower(), "")
+            if pragma in LISTING_PRAGMAS and not arg2:
+                return sqlite3.SQLITE_OK
+            return self._deny(f"PRAGMA {pragma} is not a read-only schema pragma")
+        return self._deny(f"{_ACTION_NAMES.get(action, 'this statement')} is not read-only")
+
+    @contextmanager
+    def installed(self, conn: sqlite3.Connection) -> Iterator[ReadGuard]:
+        """Authorize statements on *conn* with this guard inside the block.
+
+        Installing an authorizer expires the connection's prepared
+        statements, so a cached statement is re-authorized, not reused.
+        """
+        conn.set_authorizer(self)
+        try:
+            yield self
+        finally:
+            conn.set_authorizer(None)
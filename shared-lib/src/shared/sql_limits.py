@@ -0,0 +1,199 @@
+"""Bounded execution of agent-generated SQL for the tool runtimes.
+
+:func:`run_bounded` streams a query's rows with ``fetchmany`` and keeps at
+most :attr:`SQLQueryLimits.max_rows` of them (and at most
+``max_result_bytes`` of their JSON), so ``SELECT * FROM access_logs`` on a
+large table never materialises the table.  One extra ``fetchone`` tells
+whether rows were left out; only with ``count_rows`` set does SQLite count
+them, with ``SELECT count(*) FROM (<query>)`` (a second execution of the
+query, so it is opt-in).
+
+A progress handler aborts the statement once it exceeds the wall-clock
+limit or the VM-instruction budget, so a runaway cross join cannot hang a
+tool call.  SQLite's own working memory is bounded per connection by
+:func:`configure_connection` (page-cache size, temp b-trees on disk).
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any
+
+# VM instructions between progress-handler calls.
+PROGRESS_INTERVAL = 1_000
+# Rows pulled from SQLite per fetchmany call.
+FETCH_BATCH_ROWS = 64
+# Page cache per connection, in KiB (SQLite's default is 2 MiB).
+DEFAULT_CACHE_KIB = 8 * 1024
+
+
+@dataclass(frozen=True)
+class SQLQueryLimits:
+    """Per-query bounds for SQL tool calls."""
+
+    max_rows: int = 20
+    max_result_bytes: int = 64 * 1024
+    time_limit_seconds: float | None = 5.0
+    max_vm_steps: int | None = 200_000_000
+    count_rows: bool = False
+
+    def __post_init__(self) -> None:
+        if self.max_rows < 0:
+            raise ValueError(f"max_rows must be >= 0, got {self.max_rows}")
+        if self.time_limit_seconds is not None and self.time_limit_seconds <= 0:
+            raise ValueError(f"time_limit_seconds must be > 0, got {self.time_limit_seconds}")
+
+    @classmethod
+    def from_config(cls, mode_config: dict[str, Any]) -> SQLQueryLimits:
+        """Build limits from ``sql_*`` mode keys, defaulting the rest.
+
+        ``sql_count_rows: true`` reports the exact row count of truncated
+        results, at the cost of running the query a second time.
+        """
+        defaults = cls()
+        return cls(
+            max_rows=int(mode_config.get("sql_max_rows", defaults.max_rows)),
+            max_result_bytes=int(
+                mode_config.get("sql_max_result_bytes", defaults.max_result_bytes)
+            ),
+            time_limit_seconds=mode_config.get(
+                "sql_time_limit_seconds", defaults.time_limit_seconds
+            ),
+            max_vm_steps=mode_config.get("sql_max_vm_steps", defaults.max_vm_steps),
+            count_rows=bool(mode_config.get("sql_count_rows", defaults.count_rows)),
+        )
+
+
+@dataclass(frozen=True)
+class BoundedResult:
+    """Rows kept for display and what is known about the rest."""
+
+    rows: list[dict[str, Any]]
+    row_count: int  # rows seen (kept or counted)
+    complete: bool  # every row was seen, so row_count is exact
+    truncated: bool  # rows were dropped to stay within max_result_bytes
+    stopped: str | None = None  # limit that stopped counting: "time" or "steps"
+
+    @property
+    def cacheable(self) -> bool:
+        """Whether the result does not depend on how fast this run was."""
+        return self.stopped is None
+
+
+class QueryLimitExceeded(Exception):
+    """The query hit its time or step limit before producing its display rows."""
+
+    def __init__(self, limit: str, limits: SQLQueryLimits) -> None:
+        self.limit = limit
+        if limit == "time":
+            detail = f"ran longer than {limits.time_limit_seconds:g}s"
+        else:
+            detail = f"exceeded {limits.max_vm_steps:,} VM steps"
+        super().__init__(
+            f"Query stopped: it {detail}. Add filters, a LIMIT, or avoid cross joins."
+        )
+
+
+def configure_connection(conn: sqlite3.Connection, cache_kib: int = DEFAULT_CACHE_KIB) -> None:
+    """Cap the page cache of *conn* and send sorts and temp tables to disk."""
+    conn.execute(f"PRAGMA cache_size = -{int(cache_kib)}")
+    conn.execute("PRAGMA temp_store = FILE")
+
+
+def run_bounded(conn: sqlite3.Connection, query: str, limits: SQLQueryLimits) -> BoundedResult:
+    """Run *query* on *conn* within *limits*.
+
+    Raises :class:`QueryLimitExceeded` if a limit stops the query before its
+    display rows are fetched, and ``sqlite3.Error`` for SQL errors.
+    """
+    deadline = (
+        time.monotonic() + limits.time_limit_seconds
+        if limits.time_limit_seconds is not None
+        else None
+    )
+    max_calls = (
+        limits.max_vm_steps // PROGRESS_INTERVAL if limits.max_vm_steps is not None else None
+    )
+    calls = 0
+    stopped: str | None = None
+
+    def progress() -> int:
+        nonlocal calls, stopped
+        calls += 1
+        if deadline is not None and time.monotonic() > deadline:
+            stopped = "time"
+        elif max_calls is not None and calls > max_calls:
+            stopped = "steps"
+        return 1 if stopped else 0
+
+    rows: list[dict[str, Any]] = []
+    size = 0
+    seen = 0
+    truncated = False
+    conn.set_progress_handler(progress, PROGRESS_INTERVAL)
+    try:
+        try:
+            cursor = conn.execute(query)
+            while len(rows) < limits.max_rows and not truncated:
+                batch = cursor.fetchmany(min(FETCH_BATCH_ROWS, limits.max_rows - len(rows)))
+                if not batch:
+                    return BoundedResult(rows, seen, complete=True, truncated=False)
+                seen += len(batch)
+                for row in batch:
+                    record = dict(row)
+                    size += len(json.dumps(record, default=str))
+                    if size > limits.max_result_bytes:
+                        truncated = True
+                        break
+                    rows.append(record)
+        except sqlite3.OperationalError:
+            if stopped is not None:
+                raise QueryLimitExceeded(stopped, limits) from None
+            raise
+
+        try:
+            if not truncated:
+                if cursor.fetchone() is None:
+                    return BoundedResult(rows, seen, complete=True, truncated=False)
+                seen += 1
+            if not limits.count_rows:
+                return BoundedResult(rows, seen, complete=False, truncated=truncated)
+            try:
+                # The newline keeps a trailing "--" comment from eating the ")".
+                total = conn.execute(f"SELECT count(*) FROM (\n{query}\n)").fetchone()[0]
+            except sqlite3.OperationalError:
+                if stopped is not None:
+                    raise
+                # Not wrappable as a subquery (e.g. PRAGMA): count the rest here.
+                total = seen
+                while batch := cursor.fetchmany(FETCH_BATCH_ROWS):
+                    total += len(batch)
+        except sqlite3.OperationalError:
+            if stopped is None:
+                raise
+            return BoundedResult(rows, seen, complete=False, truncated=truncated, stopped=stopped)
+        return BoundedResult(rows, total, complete=True, truncated=truncated)
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+def render_result(result: BoundedResult, limits: SQLQueryLimits) -> str:
+    """Tool observation for *result*: row count header plus the kept rows as JSON."""
+    if result.complete:
+        count = str(result.row_count)
+    elif result.stopped is not None:
+        count = f"at least {result.row_count} (counting stopped at the {result.stopped} limit)"
+    else:
+        count = f"at least {result.row_count} (not counted)"
+    lines = [f"Row count: {count}"]
+    if result.truncated:
+        lines.append(
+            f"Result truncated: showing {len(result.rows)} row(s) to stay under "
+            f"{limits.max_result_bytes:,} bytes; select fewer columns."
+        )
+    lines.append(f"Rows (max {limits.max_rows}):")
+    lines.append(json.dumps(result.rows, indent=2, default=str))
+    return "\n".join(lines)
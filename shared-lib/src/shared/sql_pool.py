@@ -0,0 +1,116 @@
+"""Pool of read-only SQLite connections onto a compiled seed image.
+
+The scenario databases are never written once seeded, so the SQL tools of
+the runtimes read them through several connections opened with
+``mode=ro&immutable=1`` (see :meth:`shared.sql_seed.SeedImage.connect`)
+instead of one connection behind a lock.  SQLite releases the GIL while
+it steps a statement, so concurrent tool calls — parallel calls from one
+LLM turn, or several questions at once — run their queries side by side.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from shared.sql_limits import DEFAULT_CACHE_KIB, configure_connection
+from shared.sql_seed import SeedImage
+
+DEFAULT_POOL_SIZE = 4
+
+
+class ReadOnlyConnectionPool:
+    """Up to *size* read-only connections onto *image*, opened on demand.
+
+    :meth:`connection` checks a connection out for the duration of a
+    ``with`` block; when all *size* are in use, callers wait for one to be
+    returned.  Connections are only ever used by one thread at a time.
+    Each caps its page cache at *cache_kib* (see
+    :func:`shared.sql_limits.configure_connection`).
+    """
+
+    def __init__(
+        self,
+        image: SeedImage,
+        size: int = DEFAULT_POOL_SIZE,
+        cache_kib: int = DEFAULT_CACHE_KIB,
+    ) -> None:
+        if size < 1:
+            raise ValueError(f"Pool size must be at least 1, got {size}")
+        self._image = image
+        self._size = size
+        self._cache_kib = cache_kib
+        self._tables: frozenset[str] | None = None
+        self._idle: list[sqlite3.Connection] = []
+        self._opened = 0
+        self._closed = False
+        self._available = threading.Condition()
+
+    @property
+    def image(self) -> SeedImage:
+        return self._image
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def tables(self) -> frozenset[str]:
+        """Lower-cased names of the image's tables, read once (images never change)."""
+        if self._tables is None:
+            with self.connection() as conn:
+                self._tables = frozenset(
+                    str(row["name"]).lower()
+                    for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+                )
+        return self._tables
+
+    def _acquire(self) -> sqlite3.Connection:
+        with self._available:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._opened < self._size:
+                    self._opened += 1
+                    break
+                self._available.wait()
+        try:
+            conn = self._image.connect()
+            configure_connection(conn, self._cache_kib)
+            return conn
+        except BaseException:
+            with self._available:
+                self._opened -= 1
+                self._available.notify()
+            raise
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        with self._available:
+            if not self._closed:
+                self._idle.append(conn)
+                self._available.notify()
+                return
+            self._opened -= 1
+        conn.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def close(self) -> None:
+        """Close idle connections; checked-out ones are closed when returned."""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._opened -= len(idle)
+            self._available.notify_all()
+        for conn in idle:
+            conn.close()
@@ -0,0 +1,128 @@
+"""Compiled SQLite images of scenario seed files, shared by the tool runtimes.
+
+Running ``seed.sql`` through ``executescript`` re-parses and re-executes
+every statement, once per runtime (framework × run × repeat).  Instead, a
+seed file is compiled once into a SQLite database file keyed by the sha256
+of its contents.  Runtimes read the image through read-only connections
+(see :mod:`shared.sql_pool`), so their start cost does not depend on the
+seed size.
+
+Images live in ``.cache/sql_seeds/`` at the repository root; override the
+directory (or disable persistence with ``off``) via ``SQL_SEED_CACHE_DIR``.
+When disabled, images are compiled into a per-process temporary directory,
+so each seed is still executed only once per process.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import uuid
+from dataclasses import dataclass
+from hashlib import sha256
+from pathlib import Path
+
+# Set to a directory to relocate compiled seed images, or to "off" to keep
+# them for the lifetime of the process only.
+SQL_SEED_CACHE_ENV = "SQL_SEED_CACHE_DIR"
+DEFAULT_SEED_CACHE_DIR = Path(__file__).resolve().parents[3] / ".cache" / "sql_seeds"
+
+_DISABLED_VALUES = {"", "0", "off", "none", "false"}
+
+
+@dataclass(frozen=True)
+class SeedImage:
+    """A seed file compiled into a SQLite database file."""
+
+    path: Path
+    digest: str  # sha256 of the seed file contents
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a read-only connection onto the image (usable from any thread).
+
+        ``immutable=1`` lets SQLite skip file locking: images are never
+        modified in place (a recompiled seed gets a new file).
+        """
+        conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro&immutable=1", uri=True, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+_images: dict[str, SeedImage] = {}
+_images_lock = threading.Lock()
+_process_dir: Path | None = None
+
+
+def seed_digest(seed_path: str | os.PathLike[str]) -> str:
+    """Return the sha256 hex digest of a seed file's contents."""
+    return sha256(Path(seed_path).read_bytes()).hexdigest()
+
+
+def _cache_dir() -> Path:
+    global _process_dir
+    configured = os.environ.get(SQL_SEED_CACHE_ENV)
+    if configured is None:
+        return DEFAULT_SEED_CACHE_DIR
+    if configured.strip().lower() not in _DISABLED_VALUES:
+        return Path(configured)
+    if _process_dir is None:
+        _process_dir = Path(tempfile.mkdtemp(prefix="sql-seeds-"))
+    return _process_dir
+
+
+def _compile(seed_path: Path, target: Path) -> None:
+    """Execute *seed_path* into a fresh database file and move it to *target*."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f"{target.name}.tmp-{uuid.uuid4().hex[:8]}")
+    try:
+        conn = sqlite3.connect(tmp)
+        try:
+            # Nothing to recover on failure: a partial image is discarded.
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.executescript(seed_path.read_text())
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp, target)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def compile_seed(seed_path: str | os.PathLike[str]) -> SeedImage:
+    """Return the compiled image of *seed_path*, compiling it on first use.
+
+    Images are keyed by content, so an edited seed file gets a new image
+    and processes compiling the same seed concurrently produce the same
+    file (the last rename wins).
+    """
+    seed_path = Path(seed_path)
+    if not seed_path.exists():
+        raise FileNotFoundError(f"SQLite seed file not found: {seed_path}")
+    digest = seed_digest(seed_path)
+    with _images_lock:
+        image = _images.get(digest)
+        if image is not None and image.path.exists():
+            return image
+        target = _cache_dir() / f"{digest}.sqlite"
+        if not target.exists():
+            _compile(seed_path, target)
+        image = SeedImage(path=target, digest=digest)
+        _images[digest] = image
+        return image
+
+
+def clear_seed_cache() -> None:
+    """Forget compiled images; removes the per-process directory if one was used."""
+    global _process_dir
+    with _images_lock:
+        _images.clear()
+        if _process_dir is not None:
+            shutil.rmtree(_process_dir, ignore_errors=True)
+            _process_dir = None
@@ -0,0 +1,111 @@
+"""SQL tool-call execution shared by the scenario runtimes.
+
+:func:`execute_tool_sql` is the body of every SQL tool (``run_sql`` in
+agentic_sql_qa, the domain tools in multi_agent_coordination): it answers
+from the result cache (:mod:`shared.sql_cache`) when it can, otherwise runs
+the statement on a pooled read-only connection (:mod:`shared.sql_pool`)
+under a :class:`~shared.sql_guard.ReadGuard` and within the runtime's
+:class:`~shared.sql_limits.SQLQueryLimits`, and renders the observation
+the LLM sees.  The runtimes only add the tool budget and the trace.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Collection
+from dataclasses import dataclass
+
+from shared.sql_cache import get_sql_result_cache
+from shared.sql_guard import ReadGuard
+from shared.sql_limits import QueryLimitExceeded, SQLQueryLimits, render_result, run_bounded
+from shared.sql_pool import ReadOnlyConnectionPool
+
+
+@dataclass(frozen=True)
+class SQLToolResult:
+    """Observation of one SQL tool call and what it read."""
+
+    observation: str
+    sources: list[str]  # tables read
+    columns: list[str]  # columns read, as "table.column"
+    cache_hit: bool = False
+
+
+def schema_brief(
+    pool: ReadOnlyConnectionPool, allowed_tables: Collection[str] | None = None
+) -> str:
+    """One ``table: col, col`` line per table (only *allowed_tables* if given)."""
+    with pool.connection() as conn:
+        tables = [
+            str(row["name"])
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"
+            ).fetchall()
+        ]
+        if allowed_tables is not None:
+            tables = [t for t in tables if t.lower() in allowed_tables]
+        if not tables:
+            return "No tables found." if allowed_tables is None else "No accessible tables."
+        lines: list[str] = []
+        for table in tables:
+            cols = conn.execute(f"PRAGMA table_info({table})").fetchall()
+            col_names = [str(row["name"]) for row in cols]
+            lines.append(f"{table}: {', '.join(col_names)}")
+        return "\n".join(lines)
+
+
+def _failure(
+    message: str, pool: ReadOnlyConnectionPool, allowed_tables: Collection[str] | None
+) -> SQLToolResult:
+    if allowed_tables is None:
+        hint = f"Schema hint:\n{schema_brief(pool)}"
+    else:
+        hint = f"Accessible tables:\n{schema_brief(pool, allowed_tables)}"
+    return SQLToolResult(f"{message}\n{hint}", [], [])
+
+
+def execute_tool_sql(
+    pool: ReadOnlyConnectionPool,
+    query: str,
+    limits: SQLQueryLimits,
+    allowed_tables: Collection[str] | None = None,
+) -> SQLToolResult:
+    """Run *query* for a SQL tool, reading only *allowed_tables* if given.
+
+    Errors (denied statements, SQL errors, exceeded limits) are returned as
+    observations, with a schema hint where it helps the model retry.
+    Results are cached per seed snapshot, table scope and limits, unless
+    the statement calls a non-deterministic function (``random()``,
+    ``date('now')``, ...).
+    """
+    cleaned = query.strip().rstrip(";")
+    if not cleaned:
+        return SQLToolResult("Empty SQL query.", [], [])
+
+    cache = get_sql_result_cache()
+    scope = (frozenset(allowed_tables) if allowed_tables is not None else None, limits)
+    key = cache.key(pool.image.digest, scope, cleaned) if cache is not None else None
+    if cache is not None and (cached := cache.get(key)) is not None:
+        return SQLToolResult(*cached, cache_hit=True)
+
+    guard = ReadGuard(pool.tables, allowed_tables)
+    try:
+        with pool.connection() as conn, guard.installed(conn):
+            result = run_bounded(conn, cleaned, limits)
+    except QueryLimitExceeded as err:
+        return SQLToolResult(str(err), [], [])
+    except Exception as err:
+        if guard.out_of_scope:
+            return _failure(f"Access denied: {guard.denial}.", pool, allowed_tables)
+        if guard.denial is not None:
+            return _failure(
+                f"Unsafe or unsupported SQL ({guard.denial}). "
+                "Only SELECT/WITH/PRAGMA read-only queries are allowed.",
+                pool,
+                allowed_tables,
+            )
+        return _failure(f"SQL error: {err}", pool, allowed_tables)
+
+    observation = render_result(result, limits)
+    if cache is not None and result.cacheable and guard.deterministic:
+        cache.put(key, observation, guard.sources, guard.columns)
+    return SQLToolResult(observation, guard.sources, guard.columns)
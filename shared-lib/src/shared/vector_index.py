@@ -0,0 +1,1025 @@
+"""Pluggable vector index backends used by :class:`shared.retrieval.EmbeddingStore`.
+
+Backends are selected by key (``vector_backend`` in the scenario ``config``):
+
+- ``chroma`` — chromadb in-memory collection (HNSW, tunable via ``hnsw``).
+- ``numpy`` — exact search over one contiguous L2-normalised float32 matrix.
+- ``ivf_flat`` — inverted-file index: spherical k-means partitions, only
+  the ``nprobe`` closest partitions are scanned (approximate).
+- ``quantized`` — float16 / int8 / binary codes in memory, with the top
+  candidates rescored exactly against full-precision vectors kept on disk.
+
+All backends return :class:`SearchHit` objects whose ``score`` is cosine
+similarity, so callers can compare scores across backends.
+
+Searches of the ``numpy``, ``ivf_flat`` and ``quantized`` backends are
+lock-free and safe from any number of threads: every mutation (add,
+delete, training) happens under a per-index writer lock and ends by
+publishing a new immutable view of the rows, which readers pick up with a
+single attribute read.  Rows are never overwritten in place while a
+view may still reference them — appends write past the published size and
+deletes compact into a fresh matrix.  ``chroma`` leaves concurrency to
+chromadb and its own locking around the HNSW index.
+
+``numpy`` and ``ivf_flat`` can be saved to a directory of ``.npy`` files
+and loaded memory-mapped (:meth:`NumpyIndex.save`, :meth:`NumpyIndex.load`):
+loading is zero-copy, and processes that load the same snapshot share its
+pages through the OS page cache.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    """One chunk returned by a vector index search."""
+
+    id: str
+    text: str
+    source: str
+    score: float
+
+
+class MappedStrings(Sequence[str]):
+    """Read-only strings decoded on access from a memory-mapped UTF-8 blob.
+
+    Stored as two ``.npy`` files: ``{name}.npy`` (uint8 bytes of all strings
+    concatenated) and ``{name}_offsets.npy`` (int64 start offsets plus the
+    total length).
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray) -> None:
+        self._data = data
+        self._offsets = offsets
+
+    @staticmethod
+    def save(directory: Path, name: str, strings: Iterable[str]) -> None:
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(chunk) for chunk in encoded], out=offsets[1:])
+        np.save(directory / f"{name}.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+        np.save(directory / f"{name}_offsets.npy", offsets)
+
+    @classmethod
+    def load(cls, directory: Path, name: str) -> MappedStrings:
+        return cls(
+            np.load(directory / f"{name}.npy", mmap_mode="r"),
+            np.load(directory / f"{name}_offsets.npy", mmap_mode="r"),
+        )
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self._data[start:end].tobytes().decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes + self._offsets.nbytes
+
+
+class VectorIndex(ABC):
+    """Extension point for vector search backends."""
+
+    key: str = ""
+
+    @abstractmethod
+    def add(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        sources: Sequence[str],
+    ) -> None:
+        """Append chunks and their embeddings to the index."""
+
+    @abstractmethod
+    def delete(self, ids: Sequence[str]) -> None:
+        """Remove chunks by id; unknown ids are ignored."""
+
+    @abstractmethod
+    def search(self, embedding: Sequence[float], k: int) -> list[SearchHit]:
+        """Return the top-*k* chunks for a query embedding, best first."""
+
+    def search_many(
+        self, embeddings: Sequence[Sequence[float]], k: int
+    ) -> list[list[SearchHit]]:
+        """Search several query embeddings at once (one hit list per query)."""
+        return [self.search(embedding, k) for embedding in embeddings]
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of indexed chunks."""
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the index (0 when unknown)."""
+        return 0
+
+    def close(self) -> None:
+        """Release backend resources."""
+
+
+class ChromaIndex(VectorIndex):
+    """chromadb-backed index (approximate HNSW search, L2 space)."""
+
+    key = "chroma"
+
+    def __init__(
+        self, collection_name: str | None = None, hnsw: dict[str, Any] | None = None
+    ) -> None:
+        """*hnsw* sets chroma's HNSW parameters, e.g. ``{"M": 32, "search_ef": 64}``."""
+        import chromadb
+
+        self._client = chromadb.Client()
+        self._collection_name = collection_name or f"shared_embedding_store_{uuid.uuid4().hex[:8]}"
+        metadata = {f"hnsw:{name}": value for name, value in (hnsw or {}).items()}
+        self._collection = self._client.create_collection(
+            name=self._collection_name, metadata=metadata or None
+        )
+        self._dim = 0
+
+    def add(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        sources: Sequence[str],
+    ) -> None:
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        self._dim = vectors.shape[1]
+        step = self._client.get_max_batch_size()
+        for start in range(0, len(ids), step):
+            end = start + step
+            self._collection.add(
+                ids=list(ids[start:end]),
+                documents=list(texts[start:end]),
+                embeddings=vectors[start:end],
+                metadatas=[{"source": source} for source in sources[start:end]],
+            )
+
+    def delete(self, ids: Sequence[str]) -> None:
+        if not ids:
+            return
+        self._collection.delete(ids=list(ids))
+
+    def search(self, embedding: Sequence[float], k: int) -> list[SearchHit]:
+        return self.search_many([embedding], k)[0]
+
+    def search_many(
+        self, embeddings: Sequence[Sequence[float]], k: int
+    ) -> list[list[SearchHit]]:
+        if len(embeddings) == 0:
+            return []
+        count = len(self)
+        if k <= 0 or count == 0:
+            return [[] for _ in embeddings]
+        results = self._collection.query(
+            query_embeddings=np.asarray(embeddings, dtype=np.float32),
+            n_results=min(k, count),
+        )
+        all_hits: list[list[SearchHit]] = []
+        for row in range(len(embeddings)):
+            hits: list[SearchHit] = []
+            for chunk_id, doc_text, meta, distance in zip(
+                results["ids"][row],
+                results["documents"][row],
+                results["metadatas"][row],
+                results["distances"][row],
+            ):
+                # Squared L2 between unit vectors: d = 2 - 2 * cos.
+                hits.append(
+                    SearchHit(
+                        id=chunk_id,
+                        text=doc_text,
+                        source=meta.get("source", "unknown"),
+                        score=1.0 - float(distance) / 2.0,
+                    )
+                )
+            all_hits.append(hits)
+        return all_hits
+
+    def __len__(self) -> int:
+        return self._collection.count()
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated from the float32 vectors alone (HNSW graph and documents excluded)."""
+        return len(self) * self._dim * 4
+
+    def close(self) -> None:
+        self._client.delete_collection(self._collection_name)
+
+
+@dataclass(frozen=True)
+class _Rows:
+    """The populated rows of an index as published after one mutation.
+
+    *matrix* is a read-only ``(size, dim)`` view.  The id, text and source
+    sequences may be extended by later appends, but their first ``size``
+    items never change.
+    """
+
+    matrix: np.ndarray
+    ids: Sequence[str]
+    texts: Sequence[str]
+    sources: Sequence[str]
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def hit(self, position: int, score: float) -> SearchHit:
+        return SearchHit(
+            id=self.ids[position],
+            text=self.texts[position],
+            source=self.sources[position],
+            score=score,
+        )
+
+
+_NO_ROWS = _Rows(np.empty((0, 0), dtype=np.float32), (), (), ())
+
+
+class NumpyIndex(VectorIndex):
+    """Exact cosine search: one matrix-vector product plus ``argpartition``.
+
+    Embeddings are L2-normalised and kept in a single contiguous float32
+    matrix that grows geometrically, so appends are amortised O(1).  A
+    loaded index searches the memory-mapped snapshot in place and copies it
+    only on the first add or delete.
+    """
+
+    key = "numpy"
+
+    def __init__(self, initial_capacity: int = 1024) -> None:
+        self._capacity = max(1, initial_capacity)
+        self._matrix: np.ndarray | None = None
+        self._size = 0
+        self._ids: list[str] = []
+        self._texts: Sequence[str] = []
+        self._sources: list[str] = []
+        self._positions: dict[str, int] = {}
+        # Serialises writers; readers only load ``_rows``.
+        self._write_lock = threading.RLock()
+        self._rows = _NO_ROWS
+
+    def _publish(self) -> None:
+        """Make the current rows visible to searches (call under the writer lock)."""
+        if self._matrix is None or self._size == 0:
+            self._rows = _NO_ROWS
+            return
+        view = self._matrix[: self._size]
+        view.flags.writeable = False
+        self._rows = _Rows(view, self._ids, self._texts, self._sources)
+
+    def save(self, directory: str | os.PathLike[str]) -> None:
+        """Write the index as ``.npy`` files (plus ``chunks.json``) into *directory*."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._write_lock:
+            np.save(directory / "vectors.npy", np.ascontiguousarray(self.matrix))
+            MappedStrings.save(directory, "texts", self._texts)
+            (directory / "chunks.json").write_text(
+                json.dumps({"ids": self._ids, "sources": self._sources})
+            )
+
+    @classmethod
+    def load(cls, directory: str | os.PathLike[str], **params: Any) -> NumpyIndex:
+        """Open an index written by :meth:`save`, memory-mapping vectors and texts."""
+        directory = Path(directory)
+        index = cls(**params)
+        index._restore(directory)
+        return index
+
+    def _restore(self, directory: Path) -> None:
+        chunks = json.loads((directory / "chunks.json").read_text())
+        matrix = np.load(directory / "vectors.npy", mmap_mode="r")
+        self._matrix = matrix if len(matrix) else None
+        self._size = len(matrix)
+        self._ids = chunks["ids"]
+        self._sources = chunks["sources"]
+        self._texts = MappedStrings.load(directory, "texts")
+        self._positions = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._publish()
+
+    @property
+    def nbytes(self) -> int:
+        """Allocated matrix plus chunk texts (memory-mapped snapshots included)."""
+        matrix = 0 if self._matrix is None else self._matrix.nbytes
+        if isinstance(self._texts, MappedStrings):
+            return matrix + self._texts.nbytes
+        return matrix + sum(len(text) for text in self._texts)
+
+    def chunk_table(self) -> tuple[list[str], Sequence[str], list[str]]:
+        """Ids, texts and sources of the indexed chunks, in row order."""
+        return self._ids, self._texts, self._sources
+
+    def _make_writable(self) -> None:
+        """Copy a memory-mapped snapshot into private memory before mutating it."""
+        if self._matrix is not None and not self._matrix.flags.writeable:
+            self._matrix = np.array(self._matrix)
+        if not isinstance(self._texts, list):
+            self._texts = list(self._texts)
+
+    @staticmethod
+    def _normalise(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _reserve(self, extra: int, dim: int) -> None:
+        self._make_writable()
+        if self._matrix is None:
+            capacity = max(self._capacity, extra)
+            self._matrix = np.empty((capacity, dim), dtype=np.float32)
+            return
+        if self._matrix.shape[1] != dim:
+            raise ValueError(
+                f"Embedding dimension mismatch: index has {self._matrix.shape[1]}, got {dim}"
+            )
+        needed = self._size + extra
+        if needed <= self._matrix.shape[0]:
+            return
+        capacity = self._matrix.shape[0]
+        while capacity < needed:
+            capacity *= 2
+        grown = np.empty((capacity, dim), dtype=np.float32)
+        grown[: self._size] = self._matrix[: self._size]
+        self._matrix = grown
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Read-only view of the populated rows of the embedding matrix."""
+        return self._rows.matrix
+
+    def add(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        sources: Sequence[str],
+    ) -> None:
+        if not ids:
+            return
+        vectors = self._normalise(np.asarray(embeddings, dtype=np.float32))
+        with self._write_lock:
+            self._reserve(len(ids), vectors.shape[1])
+            assert self._matrix is not None
+            self._matrix[self._size : self._size + len(ids)] = vectors
+            for offset, chunk_id in enumerate(ids):
+                self._positions[chunk_id] = self._size + offset
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._sources.extend(sources)
+            self._size += len(ids)
+            self._publish()
+
+    def delete(self, ids: Sequence[str]) -> None:
+        """Remove rows and compact into a fresh matrix (one O(n) pass per call)."""
+        with self._write_lock:
+            rows = [self._positions[i] for i in ids if i in self._positions]
+            if not rows or self._matrix is None:
+                return
+            keep = np.ones(self._size, dtype=bool)
+            keep[rows] = False
+            self._compact(np.flatnonzero(keep))
+            self._publish()
+
+    def _compact(self, kept: np.ndarray) -> None:
+        """Keep only rows *kept* (ascending positions), preserving their order.
+
+        Writes into a new matrix: published views keep the old one intact.
+        """
+        assert self._matrix is not None
+        compacted = np.empty(self._matrix.shape, dtype=np.float32)
+        compacted[: len(kept)] = self._matrix[kept]
+        self._matrix = compacted
+        self._size = len(kept)
+        self._ids = [self._ids[i] for i in kept]
+        self._texts = [self._texts[i] for i in kept]
+        self._sources = [self._sources[i] for i in kept]
+        self._positions = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Row-wise indices of the *k* highest scores, best first."""
+        if k < scores.shape[-1]:
+            candidates = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+        else:
+            candidates = np.broadcast_to(np.arange(scores.shape[-1]), scores.shape)
+        order = np.argsort(
+            -np.take_along_axis(scores, candidates, axis=-1), axis=-1, kind="stable"
+        )
+        return np.take_along_axis(candidates, order, axis=-1)
+
+    def search(self, embedding: Sequence[float], k: int) -> list[SearchHit]:
+        return self.search_many([embedding], k)[0]
+
+    def search_many(
+        self, embeddings: Sequence[Sequence[float]], k: int
+    ) -> list[list[SearchHit]]:
+        if len(embeddings) == 0:
+            return []
+        rows = self._rows
+        if k <= 0 or len(rows) == 0:
+            return [[] for _ in embeddings]
+        queries = self._normalise(np.asarray(embeddings, dtype=np.float32))
+        scores = queries @ rows.matrix.T
+        top = self._top_k(scores, k)
+        return [
+            [rows.hit(i, float(scores[query, i])) for i in top[query]]
+            for query in range(len(embeddings))
+        ]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def close(self) -> None:
+        with self._write_lock:
+            self._matrix = None
+            self._size = 0
+            self._ids = []
+            self._texts = []
+            self._sources = []
+            self._positions = {}
+            self._rows = _NO_ROWS
+
+
+@dataclass(frozen=True)
+class _Partitions:
+    """IVF search state (centroids and inverted lists) for one :class:`_Rows` view."""
+
+    rows: _Rows
+    centroids: np.ndarray
+    # Row positions sorted by cluster, plus the offset of each cluster.
+    order: np.ndarray
+    offsets: np.ndarray
+
+
+class IVFFlatIndex(NumpyIndex):
+    """Inverted-file index over uncompressed vectors (IVF-Flat).
+
+    Vectors are partitioned into ``nlist`` clusters by spherical k-means; a
+    query scores the centroids, then scans only the rows of the ``nprobe``
+    best clusters.  ``nprobe / nlist`` trades recall for latency.
+
+    Training is lazy: it happens on the first search (and again when the
+    index has grown ``retrain_growth`` times since the last training).  Rows
+    added to a trained index are assigned to their nearest centroid.  Below
+    ``exact_below`` rows the index simply searches exhaustively.  Training
+    and list rebuilds take the writer lock, so the first search after a
+    mutation may wait; later searches read the published partitions.
+    """
+
+    key = "ivf_flat"
+
+    def __init__(
+        self,
+        nlist: int | None = None,
+        nprobe: int = 8,
+        kmeans_iterations: int = 10,
+        train_sample: int = 100_000,
+        retrain_growth: float = 4.0,
+        exact_below: int = 1000,
+        seed: int = 0,
+        initial_capacity: int = 1024,
+    ) -> None:
+        super().__init__(initial_capacity=initial_capacity)
+        self._nlist = nlist
+        self._nprobe = max(1, nprobe)
+        self._kmeans_iterations = kmeans_iterations
+        self._train_sample = train_sample
+        self._retrain_growth = retrain_growth
+        self._exact_below = exact_below
+        self._rng = np.random.default_rng(seed)
+        self._centroids: np.ndarray | None = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._trained_size = 0
+        self._partitions: _Partitions | None = None
+
+    @property
+    def nlist(self) -> int:
+        return 0 if self._centroids is None else len(self._centroids)
+
+    @staticmethod
+    def _nearest(
+        vectors: np.ndarray, centroids: np.ndarray, block_rows: int = 16384
+    ) -> np.ndarray:
+        """Index of the most similar centroid per row, in blocks to bound memory."""
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), block_rows):
+            block = vectors[start : start + block_rows]
+            assignments[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return assignments
+
+    def train(self) -> None:
+        """(Re)build centroids by spherical k-means and reassign every row."""
+        with self._write_lock:
+            self._train()
+
+    def _train(self) -> None:
+        vectors = self._matrix[: self._size] if self._matrix is not None else None
+        if vectors is None or self._size == 0:
+            return
+        nlist = self._nlist or int(4 * np.sqrt(self._size))
+        nlist = max(1, min(nlist, self._size))
+        if self._size > self._train_sample:
+            sample = vectors[self._rng.choice(self._size, self._train_sample, replace=False)]
+        else:
+            sample = vectors
+        centroids = sample[self._rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self._kmeans_iterations):
+            labels = self._nearest(sample, centroids)
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=nlist)
+            empty = counts == 0
+            sums = np.zeros_like(centroids)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums[~empty] = np.add.reduceat(sample[order], starts[~empty], axis=0)
+            # Re-seed empty clusters from random sample rows.
+            sums[empty] = sample[self._rng.choice(len(sample), int(empty.sum()))]
+            centroids = self._normalise(sums)
+        self._centroids = centroids.astype(np.float32)
+        self._assignments = self._nearest(vectors, self._centroids)
+        self._trained_size = self._size
+        self._partitions = None
+
+    def add(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        sources: Sequence[str],
+    ) -> None:
+        with self._write_lock:
+            start = self._size
+            super().add(ids, texts, embeddings, sources)
+            if self._centroids is not None and self._matrix is not None and self._size > start:
+                self._assignments = np.concatenate(
+                    [
+                        self._assignments,
+                        self._nearest(self._matrix[start : self._size], self._centroids),
+                    ]
+                )
+
+    def save(self, directory: str | os.PathLike[str]) -> None:
+        """As :meth:`NumpyIndex.save`, plus the trained centroids and assignments."""
+        with self._write_lock:
+            super().save(directory)
+            if self._centroids is not None:
+                np.save(Path(directory) / "ivf_centroids.npy", self._centroids)
+                np.save(Path(directory) / "ivf_assignments.npy", self._assignments)
+
+    def _restore(self, directory: Path) -> None:
+        super()._restore(directory)
+        if (directory / "ivf_centroids.npy").exists():
+            self._centroids = np.load(directory / "ivf_centroids.npy")
+            self._assignments = np.load(directory / "ivf_assignments.npy")
+            self._trained_size = self._size
+
+    @property
+    def nbytes(self) -> int:
+        extra = self._assignments.nbytes
+        if self._centroids is not None:
+            extra += self._centroids.nbytes
+        return super().nbytes + extra
+
+    def _compact(self, kept: np.ndarray) -> None:
+        super()._compact(kept)
+        if self._centroids is not None:
+            self._assignments = self._assignments[kept]
+
+    def _current_partitions(self) -> _Partitions:
+        """Partitions matching the published rows, (re)training or rebuilding if stale."""
+        partitions = self._partitions
+        if partitions is not None and partitions.rows is self._rows:
+            return partitions
+        with self._write_lock:
+            partitions = self._partitions
+            if partitions is not None and partitions.rows is self._rows:
+                return partitions
+            if self._centroids is None or self._size > self._trained_size * self._retrain_growth:
+                self._train()
+            assert self._centroids is not None
+            counts = np.bincount(self._assignments, minlength=self.nlist)
+            partitions = _Partitions(
+                rows=self._rows,
+                centroids=self._centroids,
+                order=np.argsort(self._assignments, kind="stable"),
+                offsets=np.concatenate([[0], np.cumsum(counts)]),
+            )
+            self._partitions = partitions
+            return partitions
+
+    def search_many(
+        self, embeddings: Sequence[Sequence[float]], k: int
+    ) -> list[list[SearchHit]]:
+        if len(self._rows) < self._exact_below:
+            return super().search_many(embeddings, k)
+        if len(embeddings) == 0:
+            return []
+        if k <= 0 or len(self._rows) == 0:
+            return [[] for _ in embeddings]
+        partitions = self._current_partitions()
+        rows, order, offsets = partitions.rows, partitions.order, partitions.offsets
+
+        queries = self._normalise(np.asarray(embeddings, dtype=np.float32))
+        nprobe = min(self._nprobe, len(partitions.centroids))
+        probes = self._top_k(queries @ partitions.centroids.T, nprobe)
+
+        all_hits: list[list[SearchHit]] = []
+        for query, clusters in zip(queries, probes):
+            members = np.concatenate([order[offsets[c] : offsets[c + 1]] for c in clusters])
+            if len(members) < k:
+                members = np.arange(len(rows))
+            scores = rows.matrix[members] @ query
+            top = self._top_k(scores[None, :], min(k, len(members)))[0]
+            all_hits.append([rows.hit(members[i], float(scores[i])) for i in top])
+        return all_hits
+
+    def close(self) -> None:
+        with self._write_lock:
+            super().close()
+            self._centroids = None
+            self._assignments = np.empty(0, dtype=np.int32)
+            self._trained_size = 0
+            self._partitions = None
+
+
+# Rows scanned per block in the quantised first pass; bounds the float32
+# temporaries created when widening codes for the dot product.
+_SCAN_BLOCK_ROWS = 1024
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:  # numpy < 2.0
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        as_bytes = words.view(np.uint8).reshape(*words.shape, 8)
+        return _POPCOUNT_TABLE[as_bytes].sum(axis=-1, dtype=np.uint8)
+
+
+@dataclass(frozen=True)
+class _Codes:
+    """The populated rows of a :class:`QuantizedIndex`, published like :class:`_Rows`."""
+
+    codes: np.ndarray
+    scales: np.ndarray | None  # int8 only
+    file_rows: np.ndarray  # position → row in the vectors file
+    ids: Sequence[str]
+    texts: Sequence[str]
+    sources: Sequence[str]
+    vectors_rows: int  # rows flushed to the vectors file
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+
+class QuantizedIndex(VectorIndex):
+    """Two-stage search over quantised codes with exact rescoring.
+
+    Codes live in memory: ``float16`` (2x smaller than float32), per-vector
+    scaled ``int8`` (4x) or sign ``binary`` (32x, Hamming distance).  The
+    first pass selects ``k * rescore_factor`` candidates from the codes; those
+    are then rescored against the full-precision vectors, which are appended
+    to a float32 file and read back through a memory map.  Returned scores
+    are exact cosine similarities.
+    """
+
+    key = "quantized"
+    dtypes = ("float16", "int8", "binary")
+    # Coarser codes need a deeper candidate pool to keep recall.
+    default_rescore_factors = {"float16": 2, "int8": 4, "binary": 10}
+
+    def __init__(
+        self,
+        dtype: str = "int8",
+        rescore_factor: int | None = None,
+        vectors_path: str | None = None,
+        initial_capacity: int = 1024,
+    ) -> None:
+        if dtype not in self.dtypes:
+            raise ValueError(
+                f"Unknown quantisation dtype '{dtype}'. Available: {', '.join(self.dtypes)}"
+            )
+        if rescore_factor is None:
+            rescore_factor = self.default_rescore_factors[dtype]
+        if rescore_factor < 1:
+            raise ValueError(f"rescore_factor must be >= 1, got {rescore_factor}")
+        self._dtype = dtype
+        self._rescore_factor = rescore_factor
+        self._capacity = max(1, initial_capacity)
+        self._dim = 0
+        self._size = 0
+        self._codes: np.ndarray | None = None
+        self._scales: np.ndarray | None = None  # int8 only
+        self._rows: np.ndarray | None = None  # position → row in the vectors file
+        self._ids: list[str] = []
+        self._texts: list[str] = []
+        self._sources: list[str] = []
+        self._positions: dict[str, int] = {}
+
+        if vectors_path is None:
+            fd, vectors_path = tempfile.mkstemp(prefix="vectors-", suffix=".f32")
+            os.close(fd)
+            self._owns_vectors_file = True
+        else:
+            self._owns_vectors_file = False
+        self._vectors_path = vectors_path
+        self._vectors_file = open(vectors_path, "wb")
+        self._vectors_rows = 0
+        self._vectors_map: np.ndarray | None = None
+        self._write_lock = threading.Lock()
+        self._view: _Codes | None = None
+
+    def _publish(self) -> None:
+        """Make the current codes visible to searches (call under the writer lock)."""
+        if self._codes is None or self._rows is None or self._size == 0:
+            self._view = None
+            return
+        self._view = _Codes(
+            codes=self._codes[: self._size],
+            scales=None if self._scales is None else self._scales[: self._size],
+            file_rows=self._rows[: self._size],
+            ids=self._ids,
+            texts=self._texts,
+            sources=self._sources,
+            vectors_rows=self._vectors_rows,
+        )
+
+    @property
+    def dtype(self) -> str:
+        return self._dtype
+
+    @property
+    def nbytes(self) -> int:
+        """In-memory size of the quantised codes (excluding the on-disk vectors)."""
+        if self._codes is None:
+            return 0
+        used = self._codes[: self._size].nbytes
+        if self._scales is not None:
+            used += self._scales[: self._size].nbytes
+        return used
+
+    def _encode(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+        if self._dtype == "float16":
+            return vectors.astype(np.float16), None
+        if self._dtype == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+            return codes, scales.astype(np.float32)
+        return self._pack_signs(vectors), None
+
+    @staticmethod
+    def _pack_signs(vectors: np.ndarray) -> np.ndarray:
+        """Sign bits packed into uint64 words (zero-padded to a whole word)."""
+        bits = np.packbits(vectors > 0, axis=1)
+        padding = -bits.shape[1] % 8
+        if padding:
+            bits = np.pad(bits, ((0, 0), (0, padding)))
+        return np.ascontiguousarray(bits).view(np.uint64)
+
+    def _reserve(self, extra: int, codes: np.ndarray) -> None:
+        needed = self._size + extra
+        if self._codes is not None and needed <= self._codes.shape[0]:
+            return
+        capacity = self._capacity if self._codes is None else self._codes.shape[0]
+        while capacity < needed:
+            capacity *= 2
+        grown = np.empty((capacity, codes.shape[1]), dtype=codes.dtype)
+        grown_rows = np.empty(capacity, dtype=np.int64)
+        # Per-row dequantisation scales exist only for int8 codes.
+        grown_scales = np.empty(capacity, dtype=np.float32) if self._dtype == "int8" else None
+        if self._codes is not None:
+            assert self._rows is not None
+            grown[: self._size] = self._codes[: self._size]
+            grown_rows[: self._size] = self._rows[: self._size]
+            if grown_scales is not None and self._scales is not None:
+                grown_scales[: self._size] = self._scales[: self._size]
+        self._codes = grown
+        self._rows = grown_rows
+        self._scales = grown_scales
+
+    def add(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        sources: Sequence[str],
+    ) -> None:
+        if not ids:
+            return
+        vectors = NumpyIndex._normalise(np.asarray(embeddings, dtype=np.float32))
+        if self._dim == 0:
+            self._dim = vectors.shape[1]
+        elif vectors.shape[1] != self._dim:
+            raise ValueError(
+                f"Embedding dimension mismatch: index has {self._dim}, got {vectors.shape[1]}"
+            )
+
+        codes, scales = self._encode(vectors)
+        with self._write_lock:
+            self._reserve(len(ids), codes)
+            assert self._codes is not None and self._rows is not None
+            end = self._size + len(ids)
+            self._codes[self._size : end] = codes
+            if scales is not None and self._scales is not None:
+                self._scales[self._size : end] = scales
+            self._rows[self._size : end] = np.arange(
+                self._vectors_rows, self._vectors_rows + len(ids)
+            )
+
+            self._vectors_file.write(np.ascontiguousarray(vectors).tobytes())
+            self._vectors_file.flush()
+            self._vectors_rows += len(ids)
+
+            for offset, chunk_id in enumerate(ids):
+                self._positions[chunk_id] = self._size + offset
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._sources.extend(sources)
+            self._size = end
+            self._publish()
+
+    def delete(self, ids: Sequence[str]) -> None:
+        """Drop rows from the codes; their full-precision rows stay on disk unused."""
+        with self._write_lock:
+            rows = [self._positions[i] for i in ids if i in self._positions]
+            if not rows or self._codes is None or self._rows is None:
+                return
+            keep = np.ones(self._size, dtype=bool)
+            keep[rows] = False
+            kept = np.flatnonzero(keep)
+            # Fresh arrays (same capacity), so published views keep their rows intact.
+            self._codes = self._compacted(self._codes, kept)
+            self._rows = self._compacted(self._rows, kept)
+            if self._scales is not None:
+                self._scales = self._compacted(self._scales, kept)
+            self._size = len(kept)
+            self._ids = [self._ids[i] for i in kept]
+            self._texts = [self._texts[i] for i in kept]
+            self._sources = [self._sources[i] for i in kept]
+            self._positions = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+            self._publish()
+
+    @staticmethod
+    def _compacted(array: np.ndarray, kept: np.ndarray) -> np.ndarray:
+        compacted = np.empty_like(array)
+        compacted[: len(kept)] = array[kept]
+        return compacted
+
+    def _full_vectors(self, rows: int) -> np.ndarray:
+        """Memory map over (at least) the first *rows* rows of the vectors file."""
+        vectors = self._vectors_map
+        if vectors is None or len(vectors) < rows:
+            vectors = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dim)
+            )
+            self._vectors_map = vectors
+        return vectors
+
+    def _approximate_scores(self, view: _Codes, queries: np.ndarray) -> np.ndarray:
+        """First-pass similarity of each query to every code (higher is better)."""
+        size = len(view)
+        scores = np.empty((len(queries), size), dtype=np.float32)
+        if self._dtype == "binary":
+            query_bits = self._pack_signs(queries)[:, None, :]
+            for start in range(0, size, _SCAN_BLOCK_ROWS):
+                block = view.codes[start : start + _SCAN_BLOCK_ROWS]
+                distance = _popcount(query_bits ^ block[None, :, :]).sum(axis=2, dtype=np.int32)
+                scores[:, start : start + len(block)] = -distance
+            return scores
+        for start in range(0, size, _SCAN_BLOCK_ROWS):
+            block = view.codes[start : start + _SCAN_BLOCK_ROWS].astype(np.float32)
+            block_scores = queries @ block.T
+            if view.scales is not None:
+                block_scores *= view.scales[start : start + len(block)]
+            scores[:, start : start + len(block)] = block_scores
+        return scores
+
+    def search(self, embedding: Sequence[float], k: int) -> list[SearchHit]:
+        return self.search_many([embedding], k)[0]
+
+    def search_many(
+        self, embeddings: Sequence[Sequence[float]], k: int
+    ) -> list[list[SearchHit]]:
+        if len(embeddings) == 0:
+            return []
+        view = self._view
+        if k <= 0 or view is None:
+            return [[] for _ in embeddings]
+        queries = NumpyIndex._normalise(np.asarray(embeddings, dtype=np.float32))
+        size = len(view)
+        k = min(k, size)
+        candidates = NumpyIndex._top_k(
+            self._approximate_scores(view, queries), min(size, k * self._rescore_factor)
+        )
+
+        full = self._full_vectors(view.vectors_rows)
+        all_hits: list[list[SearchHit]] = []
+        for query, positions in zip(queries, candidates):
+            exact = full[view.file_rows[positions]] @ query
+            order = np.argsort(-exact, kind="stable")[:k]
+            all_hits.append(
+                [
+                    SearchHit(
+                        id=view.ids[positions[i]],
+                        text=view.texts[positions[i]],
+                        source=view.sources[positions[i]],
+                        score=float(exact[i]),
+                    )
+                    for i in order
+                ]
+            )
+        return all_hits
+
+    def recall_check(self, k: int = 10, sample: int = 100, seed: int = 0) -> float:
+        """Mean recall@k of this index against exact search over the stored vectors.
+
+        Queries are a random sample of the indexed vectors themselves.
+        """
+        view = self._view
+        if view is None:
+            return 1.0
+        full = self._full_vectors(view.vectors_rows)
+        live = np.asarray(full[view.file_rows])
+        rng = np.random.default_rng(seed)
+        picks = rng.choice(len(view), size=min(sample, len(view)), replace=False)
+        queries = live[picks]
+        k = min(k, len(view))
+        exact = NumpyIndex._top_k(queries @ live.T, k)
+        found = self.search_many(queries, k)
+        hits = 0
+        for expected, result in zip(exact, found):
+            expected_ids = {view.ids[i] for i in expected}
+            hits += sum(1 for hit in result if hit.id in expected_ids)
+        return hits / (len(queries) * k)
+
+    def __len__(self) -> int:
+        view = self._view
+        return 0 if view is None else len(view)
+
+    def close(self) -> None:
+        with self._write_lock:
+            self._view = None
+            self._vectors_map = None
+            if not self._vectors_file.closed:
+                self._vectors_file.close()
+            if self._owns_vectors_file and os.path.exists(self._vectors_path):
+                os.remove(self._vectors_path)
+            self._codes = None
+            self._scales = None
+            self._rows = None
+            self._size = 0
+            self._ids = []
+            self._texts = []
+            self._sources = []
+            self._positions = {}
+
+
+_INDEX_REGISTRY: dict[str, type[VectorIndex]] = {
+    ChromaIndex.key: ChromaIndex,
+    NumpyIndex.key: NumpyIndex,
+    IVFFlatIndex.key: IVFFlatIndex,
+    QuantizedIndex.key: QuantizedIndex,
+}
+
+
+def available_backends() -> list[str]:
+    """Return the keys of all registered vector index backends."""
+    return sorted(_INDEX_REGISTRY)
+
+
+def vector_index_class(backend: str) -> type[VectorIndex]:
+    """Return the registered vector index class for a backend key."""
+    try:
+        return _INDEX_REGISTRY[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown vector backend '{backend}'. Available: {', '.join(available_backends())}"
+        ) from None
+
+
+def create_vector_index(backend: str, **params: Any) -> VectorIndex:
+    """Instantiate a registered vector index backend by key."""
+    return vector_index_class(backend)(**params)